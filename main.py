@@ -1,20 +1,68 @@
+import hmac
+import logging
+import re
+import time
+import uuid
 from datetime import datetime
-
-from fastapi import Body, FastAPI, HTTPException
+from typing import Optional, Union
+
+from fastapi import (
+    BackgroundTasks,
+    Body,
+    FastAPI,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ValidationError
 
+from src.config.logger import (
+    request_id_var,
+    set_log_level,
+    setup_logging,
+    shutdown_logging,
+)
+from src.config.metrics import METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from src.config.profiler import ProfilerMiddleware, profile_id_var, read_profile
+from src.config.settings import ADMIN_API_TOKEN
+from src.config.tracing import (
+    SPAN_KIND_SERVER,
+    parse_traceparent,
+    setup_tracing,
+    shutdown_tracing,
+    start_span,
+)
 from src.models.exceptions import ServiceException
+from src.models.serializer import encode_json, get_encoder
 from src.models.types import (
     AddUsingFlashcardRequest,
+    BatchUpdateFlashcardResultModel,
+    CollectOrphanedMediasRequest,
+    CollectOrphanedMediasResponseModel,
     CompareMediasRequest,
     CreateDefaultFlashcardRequest,
     CreateMediaRequest,
     CreateTemplateRequest,
+    DeckImportResponse,
     FlashcardResponseModel,
+    JobResponse,
+    JobResponseModel,
     MeaningResponseModel,
+    MediaResponseModel,
     NotComparedMediaResponseModel,
+    ReviewFlashcardRequest,
     SetUpUserRequest,
+    StudyCardResponseModel,
+    StudySessionCardResponseModel,
+    StudySessionResponse,
+    SyncFlashcardResponseModel,
+    SyncResponse,
     TemplatesResponseModel,
     UpdateFlagRequest,
     UpdateMemoRequest,
@@ -23,37 +71,129 @@ from src.models.types import (
     UpdateUsingMeaningsRequest,
     UserResponse,
     UserResponseModel,
+    WordCompletionResponse,
+    WordCompletionResponseModel,
     WordForExtensionResponseModel,
+    WordLookupSummaryModel,
+    WordResponseModel,
 )
 from src.services.add_using_flashcard import add_using_flashcard
+from src.services.collect_orphaned_medias import collect_orphaned_medias
 from src.services.compare_medias import compare_medias
+from src.services.delete_user import run_delete_user_job, start_delete_user_job
+from src.services.export_deck import build_deck_export, iter_deck_archive
+from src.services.etag import (
+    REVALIDATE_CACHE_CONTROL,
+    etag_matches,
+    make_payload_etag,
+)
 from src.services.firebase.schemas.prompt_template_schema import PromptTemplateSchema
 from src.services.firebase.unit.firestore_flashcard import (
     update_flashcard_doc_on_check_flag,
     update_flashcard_doc_on_memo,
     update_flashcard_doc_on_using_meaning_id_list,
 )
+from src.services.firebase.unit.firestore_job import read_job_doc
 from src.services.firebase.unit.firestore_meaning import read_meaning_docs
 from src.services.firebase.unit.firestore_prompt_template import (
     create_prompt_template_doc,
     read_prompt_template_docs,
     update_prompt_template_doc,
 )
-from src.services.firebase.unit.firestore_user import (
-    delete_user_doc,
-    read_user_doc,
-    update_user_doc,
-)
+from src.services.firebase.unit.firestore_user import read_user_doc, update_user_doc
 from src.services.firebase.unit.firestore_word import read_word_doc
-from src.services.get_flashcard_list import get_flashcard_list
+from src.services.get_flashcard_list import (
+    get_flashcard_list,
+    parse_flashcard_list_fields,
+    resolve_flashcard_page,
+)
 from src.services.get_not_compared_media_list import get_not_compared_media_list
 from src.services.get_word_for_extension import get_word_for_extension
+from src.services.image.input_media_loader import close_input_media_session
+from src.services.import_deck import import_deck
+from src.services.lookup_words import lookup_words
+from src.services.remove_using_flashcard import remove_using_flashcard
 from src.services.setup_default_flashcard import setup_default_flashcard
 from src.services.setup_media import setup_media
 from src.services.setup_user import setup_user
+from src.services.study_scheduler import get_next_study_cards, review_flashcard
+from src.services.study_session import close_study_session_prefetch, get_study_session
+from src.services.sync_flashcards import sync_flashcards
+from src.services.update_flashcards_in_batch import update_flashcards_in_batch
+from src.services.word_index import (
+    MAX_WORD_SEARCH_LIMIT,
+    close_word_index,
+    search_words,
+)
+
+setup_logging()
+setup_tracing()
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# クライアントが指定したリクエストIDとして受け付ける形式
+REQUEST_ID_PATTERN = re.compile(r"[0-9A-Za-z._-]{1,128}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_input_media_session()
+    close_word_index()
+    close_study_session_prefetch()
+    shutdown_tracing()
+    shutdown_logging()
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """
+    リクエストIDを発行してログに紐づけ、X-Request-IDヘッダーで返す
+    トレーシングが有効な場合は、リクエスト全体のスパン（traceparentヘッダーがあればその子）を記録する
+    """
+    request_id = request.headers.get("X-Request-ID")
+    if not request_id or not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    started_at = time.perf_counter()
+    try:
+        with start_span(
+            f"{request.method} {request.url.path}",
+            {"http.method": request.method, "http.target": request.url.path},
+            SPAN_KIND_SERVER,
+            parent=parse_traceparent(request.headers.get("traceparent")),
+        ) as span:
+            span.set_attribute("request.id", request_id)
+            profile_id = profile_id_var.get()
+            if profile_id:
+                span.set_attribute("profile.id", profile_id)
+            response = await call_next(request)
+            # スパン名はパスパラメータを含まないルートにする
+            route = request.scope.get("route")
+            if route is not None:
+                span.update_name(f"{request.method} {route.path}")
+            span.set_attribute("http.status_code", response.status_code)
+        response.headers["X-Request-ID"] = request_id
+        extra = {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "durationMs": round((time.perf_counter() - started_at) * 1000, 1),
+        }
+        if profile_id:
+            extra["profileId"] = profile_id  # プロファイラーのログと突き合わせる
+        logger.info("request completed", extra=extra)
+        return response
+    except Exception:
+        logger.exception(
+            "request failed",
+            extra={"method": request.method, "path": request.url.path},
+        )
+        raise
+    finally:
+        request_id_var.reset(token)
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -63,6 +203,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ルートごとの処理時間を記録する（最後に追加したミドルウェアが最も外側で実行される）
+app.add_middleware(MetricsMiddleware)
+
 # エラータイプとHTTPステータスコードのマッピング
 ERROR_TYPE_TO_HTTP_STATUS = {
     "not_found": 404,
@@ -74,6 +217,58 @@ ERROR_TYPE_TO_HTTP_STATUS = {
 }
 
 
+def is_admin_token(admin_token: Optional[str]) -> bool:
+    """管理者の認証トークンかどうかを返す（トークンが未設定の場合は常にFalse）"""
+    return bool(
+        ADMIN_API_TOKEN
+        and admin_token
+        and hmac.compare_digest(admin_token, ADMIN_API_TOKEN)
+    )
+
+
+def verify_admin_token(admin_token: Optional[str]) -> None:
+    """管理用エンドポイントの認証トークンを検証する"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(admin_token):
+        raise HTTPException(status_code=403, detail="管理者権限がありません")
+
+
+# 管理者のX-Profileヘッダー、またはサンプリングで選ばれたリクエストのプロファイルを取得する
+app.add_middleware(ProfilerMiddleware, is_authorized=is_admin_token)
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    """ETagと再検証用のキャッシュ制御ヘッダーを作成する"""
+    return {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    """If-None-Matchが一致した場合の304レスポンスを作成する"""
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def encoded_response(payload, headers: Optional[dict[str, str]] = None) -> Response:
+    """
+    dataclassを含むレスポンスをエンコード済みのJSONとして返す
+    dictへの変換とレスポンスモデルによる再検証を省く（response_modelはドキュメント用）
+    """
+    return Response(
+        content=encode_json(payload), media_type="application/json", headers=headers
+    )
+
+
+def conditional_response(payload, if_none_match: Optional[str]) -> Response:
+    """本文のハッシュ値をETagとし、If-None-Matchが一致する場合は304を返す"""
+    content = encode_json(payload)
+    etag = make_payload_etag(content)
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    return Response(
+        content=content, media_type="application/json", headers=etag_headers(etag)
+    )
+
+
 @app.get("/")
 async def root(description: str = "サーバーの稼働確認用エンドポイント"):
     return {"message": "Hello World"}
@@ -89,19 +284,23 @@ class GetUserResponseModel(BaseModel):
     description="ユーザー情報の取得用エンドポイント",
     response_model=GetUserResponseModel,
 )
-async def get_user_endpoint(userId: str):
+async def get_user_endpoint(userId: str, if_none_match: Optional[str] = Header(None)):
     try:
         user_instance = await read_user_doc(userId)
         if not user_instance:
             raise HTTPException(
                 status_code=404, detail="指定されたユーザーは存在しません"
             )
-        user_response = user_instance.to_dict()
-        user_response["user_id"] = userId
-        return {
+        body = {
             "message": "User retrieved successfully",
-            "user": UserResponse.from_dict(user_response).to_dict(),
+            "user": UserResponse(
+                user_id=userId,
+                email=user_instance.email,
+                user_name=user_instance.user_name,
+                flashcard_id_list=user_instance.flashcard_id_list,
+            ),
         }
+        return conditional_response(body, if_none_match)
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -206,19 +405,22 @@ async def add_using_flashcard_endpoint(
 
 class DeleteUserResponseModel(BaseModel):
     message: str
+    jobId: str
 
 
 @app.delete(
     "/user/{userId}",
-    description="ユーザ情報の削除用エンドポイント",
+    description="ユーザ情報と、ユーザが所有するフラッシュカード・メディアの削除用エンドポイント（削除はバックグラウンドで実行）",
     response_model=DeleteUserResponseModel,
+    status_code=202,
 )
-async def delete_user_endpoint(userId: str):
+async def delete_user_endpoint(userId: str, background_tasks: BackgroundTasks):
     try:
         user_id = userId
-        await delete_user_doc(user_id=user_id)
-        # TODO: ユーザーの使用したFlashcardを削除する処理を実装
-        return {"message": "User delete successful"}
+        job_id, should_run = await start_delete_user_job(user_id=user_id)
+        if should_run:
+            background_tasks.add_task(run_delete_user_job, job_id, user_id)
+        return {"message": "User delete accepted", "jobId": job_id}
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -228,24 +430,85 @@ async def delete_user_endpoint(userId: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class GetJobResponseModel(BaseModel):
+    message: str
+    job: JobResponseModel
+
+
+@app.get(
+    "/job/{jobId}",
+    description="バックグラウンドジョブの進捗取得用エンドポイント",
+    response_model=GetJobResponseModel,
+)
+async def get_job_endpoint(jobId: str):
+    try:
+        job_instance = await read_job_doc(job_id=jobId)
+        if not job_instance:
+            raise HTTPException(
+                status_code=404, detail="指定されたジョブは存在しません"
+            )
+        job_response = JobResponse(
+            job_id=jobId,
+            job_type=job_instance.job_type,
+            target_id=job_instance.target_id,
+            status=job_instance.status,
+            progress=job_instance.progress,
+            error=job_instance.error,
+            updated_at=(
+                job_instance.updated_at.isoformat() if job_instance.updated_at else None
+            ),
+        )
+        return encoded_response(
+            {"message": "Job retrieved successfully", "job": job_response}
+        )
+    except HTTPException:
+        raise  # 再発生
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 class GetFlashcardsResponseModel(BaseModel):
     message: str
-    flashcards: list[FlashcardResponseModel]
+    # fieldsを指定した場合はflashcardIdと指定したフィールドのみを返す
+    flashcards: list[Union[FlashcardResponseModel, dict]]
+    # 次のページのカーソル（最後のページの場合はNone）
+    nextCursor: Optional[str] = None
 
 
 @app.get(
     "/flashcard/{userId}",
-    description="ユーザのフラッシュカード一覧取得用エンドポイント",
+    description="ユーザのフラッシュカード一覧取得用エンドポイント（limit・afterでページ分割、fieldsで取得するフィールドを指定）",
     response_model=GetFlashcardsResponseModel,
 )
-async def get_flashcards_endpoint(userId: str):
+async def get_flashcards_endpoint(
+    userId: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None, description="カンマ区切り（word, meanings, media, thumbnail, memo, version, checkFlag）"
+    ),
+    if_none_match: Optional[str] = Header(None),
+):
     try:
         user_id = userId
-        flashcard_responses = await get_flashcard_list(user_id)
-        return {
-            "message": "Flashcards retrieved successfully",
-            "flashcards": [flashcard.to_dict() for flashcard in flashcard_responses],
-        }
+        # 単語・意味・メディアの結合より前に、更新日時のみで変更の有無を判定する
+        page = await resolve_flashcard_page(
+            user_id, limit, after, parse_flashcard_list_fields(fields)
+        )
+        if etag_matches(if_none_match, page.etag):
+            return not_modified_response(page.etag)
+        flashcard_responses = await get_flashcard_list(page)
+        return encoded_response(
+            {
+                "message": "Flashcards retrieved successfully",
+                "flashcards": flashcard_responses,
+                "nextCursor": page.next_cursor,
+            },
+            headers=etag_headers(page.etag),
+        )
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -333,6 +596,235 @@ async def update_using_meaning_id_list_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class BatchUpdateFlashcardResponseModel(BaseModel):
+    message: str
+    results: list[BatchUpdateFlashcardResultModel]
+
+
+@app.put(
+    "/flashcard/update/batch",
+    description="複数のフラッシュカードのチェックフラグ・メモ・意味IDリストを一括で更新するエンドポイント",
+    response_model=BatchUpdateFlashcardResponseModel,
+)
+async def update_flashcards_in_batch_endpoint(
+    _request: dict = Body(
+        ...,
+        example={
+            "operations": [
+                {"op": "checkFlag", "flashcardId": "12345", "checkFlag": True},
+                {"op": "memo", "flashcardId": "12345", "memo": "新しいメモ内容"},
+                {
+                    "op": "usingMeaningIdList",
+                    "flashcardId": "67890",
+                    "usingMeaningIdList": ["54321"],
+                },
+            ]
+        },
+    ),
+):
+    try:
+        results = await update_flashcards_in_batch(_request.get("operations"))
+        return encoded_response(
+            {"message": "Flashcards batch update processed", "results": results}
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete(
+    "/flashcard/{userId}/{flashcardId}",
+    description="ユーザーからフラッシュカードを削除するエンドポイント（同期中のクライアントには削除として通知される）",
+    response_model=UpdateFlashcardResponseModel,
+)
+async def remove_using_flashcard_endpoint(userId: str, flashcardId: str):
+    try:
+        await remove_using_flashcard(user_id=userId, flashcard_id=flashcardId)
+        return {"message": "Flashcard removed successfully"}
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get(
+    "/flashcard/{userId}/export",
+    description="ユーザのフラッシュカードをzip形式でエクスポートするエンドポイント（索引とメディアファイルをストリームで返す）",
+    response_class=StreamingResponse,
+)
+async def export_deck_endpoint(userId: str):
+    try:
+        deck_export = await build_deck_export(user_id=userId)
+        file_name = f"deck-{userId}-{datetime.now():%Y%m%d}.zip"
+        return StreamingResponse(
+            iter_deck_archive(deck_export),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class ImportDeckResponseModel(BaseModel):
+    message: str
+    flashcardIds: list[str]
+    createdWordCount: int
+    createdMeaningCount: int
+    createdMediaCount: int
+    uploadedFileCount: int
+
+
+@app.post(
+    "/flashcard/{userId}/import",
+    description="エクスポートしたzipをユーザのフラッシュカードとしてインポートするエンドポイント",
+    response_model=ImportDeckResponseModel,
+)
+async def import_deck_endpoint(userId: str, file: UploadFile = File(...)):
+    try:
+        result = await import_deck(user_id=userId, archive_file=file.file)
+        return {
+            "message": "Deck imported successfully",
+            **get_encoder(DeckImportResponse)(result),
+        }
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+
+
+class SyncResponseModel(BaseModel):
+    message: str
+    flashcards: list[SyncFlashcardResponseModel]
+    words: list[WordResponseModel]
+    meanings: list[MeaningResponseModel]
+    medias: list[MediaResponseModel]
+    removedFlashcardIds: list[str]
+    syncToken: str
+    hasMore: bool
+    reset: bool
+
+
+@app.get(
+    "/sync/{userId}",
+    description="前回の同期以降に変更・削除されたフラッシュカードの取得用エンドポイント（sinceに前回のsyncTokenを指定）",
+    response_model=SyncResponseModel,
+)
+async def sync_endpoint(userId: str, since: Optional[str] = None):
+    try:
+        sync_response = await sync_flashcards(user_id=userId, since=since)
+        return encoded_response(
+            {
+                "message": "Flashcards synced successfully",
+                **get_encoder(SyncResponse)(sync_response),
+            }
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class GetStudyCardsResponseModel(BaseModel):
+    message: str
+    flashcards: list[StudyCardResponseModel]
+
+
+@app.get(
+    "/study/{userId}/next",
+    description="復習日時を過ぎたフラッシュカードを復習日時の古い順に取得するエンドポイント",
+    response_model=GetStudyCardsResponseModel,
+)
+async def get_next_study_cards_endpoint(userId: str, n: int = 20):
+    try:
+        study_cards = await get_next_study_cards(user_id=userId, n=n)
+        return encoded_response(
+            {"message": "Study cards retrieved successfully", "flashcards": study_cards}
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class GetStudySessionResponseModel(BaseModel):
+    message: str
+    cards: list[StudySessionCardResponseModel]
+    nextCursor: Optional[str] = None
+
+
+@app.get(
+    "/study/{userId}/session",
+    description="復習待ちのフラッシュカードn件の単語・意味・メディアをまとめて取得するエンドポイント（次のページは先読みされる）",
+    response_model=GetStudySessionResponseModel,
+)
+async def get_study_session_endpoint(
+    userId: str, n: int = 20, after: Optional[str] = None, prefetch: bool = True
+):
+    try:
+        session = await get_study_session(
+            user_id=userId, n=n, after=after, prefetch=prefetch
+        )
+        return encoded_response(
+            {
+                "message": "Study session retrieved successfully",
+                **get_encoder(StudySessionResponse)(session),
+            }
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class ReviewFlashcardResponseModel(BaseModel):
+    message: str
+    intervalDays: int
+    easeFactor: float
+    repetitions: int
+    dueAt: str
+
+
+@app.post(
+    "/study/review",
+    description="解答の評価（0〜5）からフラッシュカードの次の復習日時を更新するエンドポイント",
+    response_model=ReviewFlashcardResponseModel,
+)
+async def review_flashcard_endpoint(
+    _request: dict = Body(..., example={"flashcardId": "12345", "grade": 4}),
+):
+    try:
+        review_request = ReviewFlashcardRequest.from_dict(_request)
+        state = await review_flashcard(
+            flashcard_id=review_request.flashcard_id, grade=review_request.grade
+        )
+        return {
+            "message": "Review recorded successfully",
+            "intervalDays": state.interval_days,
+            "easeFactor": state.ease_factor,
+            "repetitions": state.repetitions,
+            "dueAt": state.due_at.isoformat(),
+        }
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except ValidationError as ve:
+        raise HTTPException(status_code=422, detail=f"Invalid request format: {ve}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 class CreateDefaultFlashcardResponseModel(BaseModel):
     message: str
     flashcardId: str
@@ -353,8 +845,9 @@ async def create_default_flashcard_endpoint(
 ):
     try:
         create_flashcard_request = CreateDefaultFlashcardRequest.from_dict(_request)
-        print(
-            f"Received request to create default flashcard for word: {create_flashcard_request.word}"
+        logger.info(
+            "creating default flashcard",
+            extra={"word": create_flashcard_request.word},
         )
         flashcard_id = await setup_default_flashcard(create_flashcard_request.word)
         return {
@@ -375,6 +868,7 @@ class CreateMediaResponseModel(BaseModel):
     comparisonId: str
     newMediaId: str
     newMediaUrls: list[str]
+    newMediaVariants: Optional[list[dict[str, str]]] = None
 
 
 @app.post(
@@ -412,6 +906,7 @@ async def setup_media_endpoint(
             "comparisonId": setup_result.comparison_id,
             "newMediaId": setup_result.media_id,
             "newMediaUrls": setup_result.media_urls,
+            "newMediaVariants": setup_result.media_variants,
         }
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
@@ -436,10 +931,12 @@ async def get_comparison_endpoint(userId: str):
     try:
         user_id = userId
         media_list = await get_not_compared_media_list(user_id=user_id)
-        return {
-            "message": "Not compared medias retrieved successfully",
-            "comparisons": [media.to_dict() for media in media_list],
-        }
+        return encoded_response(
+            {
+                "message": "Not compared medias retrieved successfully",
+                "comparisons": media_list,
+            }
+        )
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -472,7 +969,10 @@ async def update_comparison_endpoint(
 ):
     try:
         compare_medias_request = CompareMediasRequest.from_dict(_request)
-        print(f"Received comparison request: {compare_medias_request}")
+        logger.debug(
+            "comparison request received",
+            extra={"request": compare_medias_request},
+        )
         await compare_medias(compare_medias_request=compare_medias_request)
         return {"message": "Flashcard comparison ID updated successfully"}
     except ServiceException as se:
@@ -494,7 +994,9 @@ class GetAllMeaningsResponseModel(BaseModel):
     description="単語の全ての意味一覧取得用エンドポイント",
     response_model=GetAllMeaningsResponseModel,
 )
-async def get_meanings_endpoint(wordId: str):
+async def get_meanings_endpoint(
+    wordId: str, if_none_match: Optional[str] = Header(None)
+):
     try:
         word_id = wordId
         word_instance = await read_word_doc(word_id=word_id)
@@ -509,10 +1011,8 @@ async def get_meanings_endpoint(wordId: str):
         meanings = await read_meaning_docs(meaning_ids=word_instance.meaning_id_list)
         if not meanings:
             raise HTTPException(status_code=404, detail="意味が見つかりません")
-        return {
-            "message": "Meanings retrieved successfully",
-            "meanings": [meaning.to_dict() for meaning in meanings],
-        }
+        body = {"message": "Meanings retrieved successfully", "meanings": meanings}
+        return conditional_response(body, if_none_match)
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -531,13 +1031,14 @@ class GetTemplateResponseModel(BaseModel):
     description="ユーザのフラッシュカード一覧取得用エンドポイント",
     response_model=GetTemplateResponseModel,
 )
-async def get_template_endpoint():
+async def get_template_endpoint(if_none_match: Optional[str] = Header(None)):
     try:
         template_list = await read_prompt_template_docs()
-        return {
+        body = {
             "message": "User templates retrieved successfully",
-            "templates": [template.to_dict() for template in template_list],
+            "templates": template_list,
         }
+        return conditional_response(body, if_none_match)
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -641,15 +1142,123 @@ async def update_template_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class SearchWordsResponseModel(BaseModel):
+    message: str
+    words: list[WordCompletionResponseModel]
+
+
+# /word/{word}より前に定義する（"search"が単語として扱われないように）
+@app.get(
+    "/word/search",
+    description="単語の前方一致検索用エンドポイント（入力補完用、よく使われる単語から順に返す）",
+    response_model=SearchWordsResponseModel,
+)
+async def search_words_endpoint(
+    prefix: str, limit: int = Query(10, ge=1, le=MAX_WORD_SEARCH_LIMIT)
+):
+    try:
+        completions = await search_words(prefix, limit)
+        return encoded_response(
+            {
+                "message": "Words searched successfully",
+                "words": [
+                    WordCompletionResponse(word_id=word_id, word=word)
+                    for word, word_id in completions
+                ],
+            }
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get(
     "/word/{word}",
     description="単語の詳細情報取得用エンドポイント",
     response_model=WordForExtensionResponseModel,
 )
-async def get_word_for_extension_endpoint(word: str):
+async def get_word_for_extension_endpoint(
+    word: str, if_none_match: Optional[str] = Header(None)
+):
     try:
         word_response = await get_word_for_extension(word)
-        return word_response.to_dict()
+        return conditional_response(word_response, if_none_match)
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except ValidationError as ve:
+        raise HTTPException(status_code=422, detail=f"Invalid request format: {ve}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class LookupWordsResponseModel(BaseModel):
+    message: str
+    # 正規化した単語ごとのデフォルトフラッシュカードの概要
+    words: dict[str, WordLookupSummaryModel]
+    notFound: list[str]
+
+
+@app.post(
+    "/words/lookup",
+    description="拡張機能用の複数単語の一括検索エンドポイント（ページ内の単語をまとめて検索する）",
+    response_model=LookupWordsResponseModel,
+)
+async def lookup_words_endpoint(
+    _request: dict = Body(..., example={"words": ["The", "cats", "running,"]}),
+):
+    try:
+        summaries, not_found = await lookup_words(_request.get("words"))
+        return encoded_response(
+            {
+                "message": "Words looked up successfully",
+                "words": summaries,
+                "notFound": not_found,
+            }
+        )
+    except ServiceException as se:
+        status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
+        raise HTTPException(status_code=status_code, detail=se.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class CollectOrphanedMediasEndpointResponseModel(BaseModel):
+    message: str
+    result: CollectOrphanedMediasResponseModel
+
+
+# 不要メディアの削除API（定期実行ジョブから呼び出す）
+@app.post(
+    "/admin/gc/medias",
+    description="どこからも参照されていないメディアとファイルの削除用エンドポイント",
+    response_model=CollectOrphanedMediasEndpointResponseModel,
+)
+async def collect_orphaned_medias_endpoint(
+    _request: dict = Body(
+        ...,
+        example={
+            "dryRun": True,
+            "gracePeriodHours": 24,
+            "maxDeletesPerSecond": 20,
+        },
+    ),
+    x_admin_token: Optional[str] = Header(None),
+):
+    verify_admin_token(x_admin_token)
+    try:
+        gc_request = CollectOrphanedMediasRequest.from_dict(_request)
+        result = await collect_orphaned_medias(
+            dry_run=gc_request.dry_run,
+            grace_period_hours=gc_request.grace_period_hours,
+            max_deletes_per_second=gc_request.max_deletes_per_second,
+        )
+        return {
+            "message": "Orphaned medias collected successfully",
+            "result": result.to_dict(),
+        }
     except ServiceException as se:
         status_code = ERROR_TYPE_TO_HTTP_STATUS.get(se.error_type, 500)
         raise HTTPException(status_code=status_code, detail=se.message)
@@ -659,6 +1268,64 @@ async def get_word_for_extension_endpoint(word: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class UpdateLogLevelResponseModel(BaseModel):
+    message: str
+    level: str
+
+
+@app.put(
+    "/admin/log-level",
+    description="ログレベルの変更用エンドポイント（DEBUG / INFO / WARNING / ERROR）",
+    response_model=UpdateLogLevelResponseModel,
+)
+async def update_log_level_endpoint(
+    _request: dict = Body(..., example={"level": "DEBUG"}),
+    x_admin_token: Optional[str] = Header(None),
+):
+    verify_admin_token(x_admin_token)
+    try:
+        level = str(_request.get("level", ""))
+        set_log_level(level)
+        return {"message": "Log level updated successfully", "level": level.upper()}
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@app.get(
+    "/metrics",
+    description="Prometheus形式のメトリクスの取得用エンドポイント（X-Admin-TokenまたはAuthorization: Bearerで認証）",
+    response_class=Response,
+)
+async def metrics_endpoint(
+    x_admin_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    if not x_admin_token and authorization and authorization.startswith("Bearer "):
+        x_admin_token = authorization[len("Bearer ") :]
+    verify_admin_token(x_admin_token)
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get(
+    "/admin/profiles/{profileId}",
+    description=(
+        "リクエストのプロファイル（collapsed stacks形式、flamegraph.pl・speedscopeで表示）の取得用エンドポイント。"
+        "プロファイルは計測したインスタンスのPROFILE_DIR（既定ではメモリ上の/tmp）にのみ保存されるため、"
+        "複数インスタンスで動作している場合は、計測したインスタンスに振り分けられた場合のみ取得できる"
+    ),
+    response_class=Response,
+)
+async def get_profile_endpoint(
+    profileId: str,
+    x_admin_token: Optional[str] = Header(None),
+):
+    verify_admin_token(x_admin_token)
+    profile = read_profile(profileId)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="指定されたプロファイルは存在しません")
+    return Response(content=profile, media_type="text/plain; charset=utf-8")
+
+
 #  エラー報告の仕様を整理したうえで実装
 # 単語の意味追加API（注：ユーザーごとの意味追加APIとは別）
 @app.post("/apply/add_meaning")
@@ -0,0 +1,67 @@
+"""
+復習スケジュール導入前のユーザーのフラッシュカードに、復習日時（作成日時）を設定する移行スクリプト
+dueAtのないフラッシュカードは復習待ちのクエリ（dueAt <= 現在日時）に含まれないため、
+導入後に一度だけ実行する（設定済みのフラッシュカードは変更しないため、再実行してもよい）
+
+    python -m scripts.backfill_flashcard_due_at            # 対象の件数のみ表示
+    python -m scripts.backfill_flashcard_due_at --execute  # 更新する
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+
+from src.config.settings import db
+from src.services.firebase.unit.firestore_bulk import (
+    FIRESTORE_BATCH_LIMIT,
+    WriteOperation,
+    commit_writes_in_batches,
+    stream_collection,
+)
+
+
+async def backfill_flashcard_due_at(dry_run: bool = True) -> int:
+    """
+    dueAtのないユーザーのフラッシュカードに、作成日時を復習日時として設定する関数
+    デフォルトのフラッシュカードは学習対象ではないため対象外
+
+    Args:
+        dry_run (bool): Trueの場合は更新せず、対象の件数のみ求める
+
+    Returns:
+        int: 対象（dry_runでない場合は更新した）フラッシュカードの件数
+    """
+    count = 0
+    writes: list[WriteOperation] = []
+    async for doc in stream_collection(
+        "flashcards", field_paths=["createdBy", "createdAt", "dueAt"]
+    ):
+        flashcard = doc.to_dict()
+        if flashcard.get("createdBy") == "default" or flashcard.get("dueAt"):
+            continue
+        count += 1
+        writes.append(
+            (
+                "update",
+                db.collection("flashcards").document(doc.id),
+                {"dueAt": flashcard.get("createdAt") or datetime.now()},
+            )
+        )
+        # 書き込みをすべてメモリに溜めず、1バッチ分ずつコミットする
+        if len(writes) >= FIRESTORE_BATCH_LIMIT:
+            if not dry_run:
+                await commit_writes_in_batches(writes)
+            writes = []
+    if writes and not dry_run:
+        await commit_writes_in_batches(writes)
+    return count
+
+
+if __name__ == "__main__":
+    execute = "--execute" in sys.argv
+    count = asyncio.run(backfill_flashcard_due_at(dry_run=not execute))
+    print(
+        f"{count}件のフラッシュカードを更新しました"
+        if execute
+        else f"{count}件のフラッシュカードが対象です（--executeで更新します）"
+    )
@@ -0,0 +1,98 @@
+"""
+ブロッキング処理をイベントループ外で実行するための実行プール
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from src.config.tracing import current_span_context, export_span, run_traced
+
+T = TypeVar("T")
+
+# Cloud Storageとの通信に使用するスレッド数の上限
+STORAGE_IO_MAX_WORKERS = int(os.getenv("STORAGE_IO_MAX_WORKERS", "8"))
+
+# 動画・画像のエンコードなどCPU負荷の高い処理に使用するプロセス数の上限
+MEDIA_PROCESS_MAX_WORKERS = int(
+    os.getenv("MEDIA_PROCESS_MAX_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+
+# Cloud Storageのアップロード・ダウンロード専用のスレッドプール
+storage_io_executor = ThreadPoolExecutor(
+    max_workers=STORAGE_IO_MAX_WORKERS, thread_name_prefix="storage-io"
+)
+
+# メディア処理用のプロセスプール（初回利用時に生成）
+_media_process_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_media_process_executor() -> ProcessPoolExecutor:
+    """
+    メディア処理用のプロセスプールを取得する関数
+    gRPCのスレッドを持つ親プロセスをforkしないよう、spawnで子プロセスを生成する
+
+    Returns:
+        ProcessPoolExecutor: メディア処理用のプロセスプール
+    """
+    global _media_process_executor
+    if _media_process_executor is None:
+        _media_process_executor = ProcessPoolExecutor(
+            max_workers=MEDIA_PROCESS_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _media_process_executor
+
+
+async def run_in_storage_io(func: Callable[..., T], *args: Any) -> T:
+    """
+    同期的なCloud Storage処理を専用スレッドプールで実行する関数
+    呼び出し元のコンテキスト（リクエストID・実行中のスパンなど）を引き継いで実行する
+
+    Args:
+        func (Callable[..., T]): 実行する同期関数
+        *args (Any): 関数に渡す引数
+
+    Returns:
+        T: 関数の戻り値
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        storage_io_executor, functools.partial(context.run, func, *args)
+    )
+
+
+async def run_in_media_process(func: Callable[..., T], *args: Any) -> T:
+    """
+    CPU負荷の高いメディア処理をプロセスプールで実行する関数
+    funcと引数はpickle可能である必要がある（モジュールのトップレベルで定義された関数）
+    トレーシングが有効な場合は、子プロセスでの実行時間を呼び出し元の子スパンとして記録する
+
+    Args:
+        func (Callable[..., T]): 実行する関数
+        *args (Any): 関数に渡す引数
+
+    Returns:
+        T: 関数の戻り値
+    """
+    loop = asyncio.get_running_loop()
+    parent = current_span_context()
+    if parent is None:
+        return await loop.run_in_executor(get_media_process_executor(), func, *args)
+    span, result, error = await loop.run_in_executor(
+        get_media_process_executor(),
+        run_traced,
+        parent,
+        f"process.{func.__name__}",
+        func,
+        *args,
+    )
+    export_span(span)
+    if error is not None:
+        raise error
+    return result
@@ -0,0 +1,149 @@
+"""
+構造化ログ（1行1件のJSON）の設定
+ログの出力は専用スレッドで行うため、リクエストの処理中に標準出力への書き込みを待たない
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from src.config.tracing import current_span_context
+
+# ログレベル（DEBUG / INFO / WARNING / ERROR）
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# メッセージ・追加フィールドの文字列をこの文字数で切り詰める
+LOG_VALUE_MAX_CHARS = int(os.getenv("LOG_VALUE_MAX_CHARS", "1000"))
+
+# 出力待ちのログの上限（超えた場合は新しいログを捨て、リクエストの処理を止めない）
+LOG_QUEUE_MAX_SIZE = 10000
+
+# リクエストごとのID（ミドルウェアで設定し、同じリクエストのログを紐づける）
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecordが標準で持つ属性（これ以外の属性はextraで渡された追加フィールドとして出力する）
+_RESERVED_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "request_id", "trace_id", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+def truncate(value: Any, max_chars: int = LOG_VALUE_MAX_CHARS) -> Any:
+    """
+    ログに出力する値を切り詰める関数
+    APIのレスポンスや生成結果などの大きな値は、先頭のみと元の文字数を出力する
+
+    Args:
+        value (Any): 出力する値（文字列・数値・真偽値・None以外は文字列に変換する）
+        max_chars (int): 最大文字数
+
+    Returns:
+        Any: 切り詰めた値
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}...(truncated, {len(text)} chars)"
+
+
+class JsonFormatter(logging.Formatter):
+    """ログを1行のJSONに変換するフォーマッター"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage()),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["requestId"] = request_id
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["traceId"] = trace_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRIBUTES:
+                entry[key] = truncate(value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    # 出力用スレッドではリクエストのコンテキストを参照できないため、ログの作成時にIDを記録する
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        span_context = current_span_context()
+        record.trace_id = span_context[0] if span_context else None
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # 出力が追いつかない場合は捨てる
+
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """
+    ルートロガーに構造化ログの出力を設定する関数（複数回呼び出しても設定は1回のみ）
+    ログはJSONに変換してキューに積み、専用スレッドが標準出力に書き込む
+
+    Args:
+        level (Optional[str]): ログレベル（Noneの場合は環境変数LOG_LEVEL）
+    """
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(_RequestIdFilter())
+    queue_handler.setFormatter(JsonFormatter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    set_log_level(level or LOG_LEVEL)
+
+
+def set_log_level(level: str) -> None:
+    """
+    ルートロガーのログレベルを変更する関数
+
+    Args:
+        level (str): ログレベル（DEBUG / INFO / WARNING / ERROR）
+
+    Raises:
+        ValueError: ログレベルが不正な場合
+    """
+    level_name = level.upper()
+    if level_name not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+        raise ValueError(f"不正なログレベルです: {level}")
+    logging.getLogger().setLevel(level_name)
+
+
+def shutdown_logging() -> None:
+    """
+    出力待ちのログを書き込み、出力用スレッドを停止する関数（アプリ終了時に呼び出す）
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    _listener = None
+
@@ -0,0 +1,326 @@
+"""
+Prometheus形式のメトリクス（カウンター・ヒストグラム）の集計と出力
+記録は値の加算のみで行い、テキスト形式への変換は/metricsの取得時のみ行う
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from src.config.tracing import SPAN_KIND_CLIENT, start_span
+
+# テキスト形式のContent-Type
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTPリクエストの処理時間のバケット（秒）
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 外部呼び出しの処理時間のバケット（秒、画像・動画の生成は数十秒〜数分かかる）
+EXTERNAL_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+)
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+            *self._samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """増加のみする値（呼び出し回数・バイト数・トークン数など）"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """値の分布（処理時間など）をバケットごとの件数・合計・件数で集計する"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = HTTP_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル -> [バケットごとの件数（累積でない、最後は+Inf）, 合計, 件数]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                    0,
+                ]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = [
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._values.items()
+            ]
+        lines = []
+        bucket_label_names = (*self.label_names, "le")
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(
+                    bucket_label_names, (*labels, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    """
+    登録されたすべてのメトリクスをPrometheusのテキスト形式に変換する関数
+
+    Returns:
+        str: テキスト形式のメトリクス
+    """
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTPリクエストの処理時間",
+    ("method", "route", "status"),
+    HTTP_LATENCY_BUCKETS,
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "external_call_duration_seconds",
+    "Firestore・Cloud Storage・生成AI・WordsAPIの呼び出し時間",
+    ("target", "operation", "outcome"),
+    EXTERNAL_LATENCY_BUCKETS,
+)
+EXTERNAL_CALL_BYTES = Counter(
+    "external_call_bytes_total",
+    "Cloud Storage・生成AIとの間で送受信したバイト数",
+    ("target", "operation", "direction"),
+)
+AI_TOKENS = Counter(
+    "ai_tokens_total",
+    "生成AIの使用トークン数",
+    ("model", "kind"),
+)
+
+
+def record_bytes(target: str, operation: str, direction: str, size: int) -> None:
+    """
+    送受信したバイト数を記録する関数
+
+    Args:
+        target (str): 呼び出し先（storage / veo など）
+        operation (str): 処理名
+        direction (str): "sent" または "received"
+        size (int): バイト数
+    """
+    EXTERNAL_CALL_BYTES.inc(target, operation, direction, amount=size)
+
+
+def record_tokens(
+    model: str, prompt_tokens: Optional[int], candidates_tokens: Optional[int]
+) -> None:
+    """
+    生成AIの使用トークン数を記録する関数
+
+    Args:
+        model (str): モデル名
+        prompt_tokens (Optional[int]): 入力のトークン数
+        candidates_tokens (Optional[int]): 出力のトークン数
+    """
+    if prompt_tokens:
+        AI_TOKENS.inc(model, "prompt", amount=prompt_tokens)
+    if candidates_tokens:
+        AI_TOKENS.inc(model, "candidates", amount=candidates_tokens)
+
+
+def instrumented(target: str) -> Callable[[Callable], Callable]:
+    """
+    関数の呼び出し時間・結果（ok / error）を記録するデコレーター
+    同期関数・コルーチン関数・非同期ジェネレーター（最後まで読み込むまでの時間）に使える
+    トレーシングが有効な場合は、呼び出しを「target.関数名」のスパンとしても記録する
+
+    Args:
+        target (str): 呼び出し先（firestore / storage / gemini / imagen / veo / words_api）
+
+    Returns:
+        Callable[[Callable], Callable]: デコレーター
+    """
+
+    def decorator(func: Callable) -> Callable:
+        operation = func.__name__
+        span_name = f"{target}.{operation}"
+        span_attributes = {"peer.service": target}
+
+        def observe(started_at: float, outcome: str) -> None:
+            EXTERNAL_CALL_DURATION.observe(
+                time.perf_counter() - started_at, target, operation, outcome
+            )
+
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def async_generator_wrapper(*args: Any, **kwargs: Any):
+                started_at = time.perf_counter()
+                outcome = "error"
+                # yieldをまたぐため、呼び出し元のスパンは切り替えない
+                with start_span(
+                    span_name, span_attributes, SPAN_KIND_CLIENT, activate=False
+                ):
+                    try:
+                        async for item in func(*args, **kwargs):
+                            yield item
+                        outcome = "ok"
+                    finally:
+                        observe(started_at, outcome)
+
+            return async_generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def coroutine_wrapper(*args: Any, **kwargs: Any):
+                started_at = time.perf_counter()
+                outcome = "error"
+                with start_span(span_name, span_attributes, SPAN_KIND_CLIENT):
+                    try:
+                        result = await func(*args, **kwargs)
+                        outcome = "ok"
+                        return result
+                    finally:
+                        observe(started_at, outcome)
+
+            return coroutine_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any):
+            started_at = time.perf_counter()
+            outcome = "error"
+            with start_span(span_name, span_attributes, SPAN_KIND_CLIENT):
+                try:
+                    result = func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    observe(started_at, outcome)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ルート（パスのテンプレート）・メソッド・ステータスごとにHTTPリクエストの処理時間を記録するASGIミドルウェア
+    パスパラメータを含む実際のパスではなくルートで集計するため、ラベルの種類はルートの数に収まる
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # ルーティング後のscopeにマッチしたルートが設定される
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
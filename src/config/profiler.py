@@ -0,0 +1,296 @@
+"""
+リクエスト単位のサンプリングプロファイラー
+管理者のヘッダー指定、またはPROFILE_SAMPLE_RATEの割合で選ばれたリクエストのみを計測し、
+フレームグラフ用のcollapsed stacks形式（flamegraph.pl・speedscopeで読み込める形式）で保存する
+"""
+
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# ヘッダー指定なしで計測するリクエストの割合（0〜1、0の場合はヘッダー指定のみ）
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# スタックを取得する間隔（秒）
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+
+# プロファイルの保存先
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "zenn-hack-profiles")
+)
+
+# 1リクエストの計測時間の上限（秒、超えた分は計測しない）
+PROFILE_MAX_SECONDS = 120
+
+# 保持するプロファイルの上限（超えた場合は古いものから削除する）
+PROFILE_MAX_FILES = 100
+
+# 計測を要求するヘッダー（管理者トークンと一緒に指定する）
+PROFILE_HEADER = b"x-profile"
+
+# プロファイルIDの形式
+PROFILE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# スタックを取得するワーカースレッド（Cloud Storage処理用のスレッドプール）の名前の接頭辞
+PROFILED_THREAD_PREFIXES = ("storage-io",)
+
+# 計測中のリクエストがあるかどうか（同時に計測するのは1件のみ）
+_active = False
+
+# 計測中のリクエストのプロファイルID（リクエストのログ・スパンに記録し、プロファイルと突き合わせる）
+profile_id_var: ContextVar[Optional[str]] = ContextVar("profile_id", default=None)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        filename = filename.split(marker, 1)[1]
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    # collapsed stacks形式ではセミコロンが区切り文字のため置き換える
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse_stack(frame: Optional[FrameType]) -> list[str]:
+    """
+    フレームを呼び出し元から順のラベルのリストに変換する関数
+
+    Args:
+        frame (Optional[FrameType]): 最も内側のフレーム
+
+    Returns:
+        list[str]: 呼び出し元から順のフレームのラベル
+    """
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _is_idle_worker(stack: list[str]) -> bool:
+    # スレッドプールのワーカーが次の処理を待っている状態（_workerでSimpleQueue.getを待つ）
+    return stack[-1].startswith("_worker ")
+
+
+def _is_idle_event_loop(stack: list[str]) -> bool:
+    # イベントループがI/Oを待っている状態（selectorのselect）
+    return bool(stack) and stack[-1].split(" ", 1)[0].endswith("Selector.select")
+
+
+def format_collapsed_stacks(stacks: Counter) -> str:
+    """
+    スタックごとの件数をcollapsed stacks形式に変換する関数
+
+    Args:
+        stacks (Counter): セミコロン区切りのスタック -> 件数
+
+    Returns:
+        str: 1行に「スタック 件数」を並べたテキスト（件数の多い順）
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """
+    専用スレッドから一定間隔で対象スレッドのスタックを取得し、スタックごとの件数を集計する
+    対象はイベントループのスレッドと、Cloud Storage処理用のワーカースレッド
+    """
+
+    def __init__(
+        self,
+        loop_thread_id: int,
+        interval: float = PROFILE_INTERVAL_SECONDS,
+        max_seconds: float = PROFILE_MAX_SECONDS,
+    ):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _target_threads(self) -> dict[int, str]:
+        targets = {self.loop_thread_id: "event-loop"}
+        for thread in threading.enumerate():
+            if thread.ident and thread.name.startswith(PROFILED_THREAD_PREFIXES):
+                targets[thread.ident] = thread.name.split("_", 1)[0]
+        return targets
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        self.sample_count += 1
+        for thread_id, role in self._target_threads().items():
+            stack = collapse_stack(frames.get(thread_id))
+            if not stack:
+                continue
+            if role == "event-loop":
+                if _is_idle_event_loop(stack):
+                    stack = ["(idle)"]
+            elif _is_idle_worker(stack):
+                continue
+            self.stacks[";".join([role, *stack])] += 1
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stopped.wait(self.interval):
+            if time.monotonic() > deadline:
+                return
+            self.sample()
+
+
+def save_profile(profile_id: str, stacks: Counter) -> str:
+    """
+    プロファイルをcollapsed stacks形式で保存し、上限を超えた古いプロファイルを削除する関数
+
+    Args:
+        profile_id (str): プロファイルID
+        stacks (Counter): スタックごとの件数
+
+    Returns:
+        str: 保存先のパス
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(format_collapsed_stacks(stacks))
+    paths = sorted(
+        (os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR)),
+        key=os.path.getmtime,
+    )
+    for old_path in paths[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def read_profile(profile_id: str) -> Optional[str]:
+    """
+    保存したプロファイルを読み込む関数
+
+    Args:
+        profile_id (str): プロファイルID
+
+    Returns:
+        Optional[str]: collapsed stacks形式のプロファイル（存在しない・IDが不正な場合はNone）
+    """
+    if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+        return None
+    try:
+        with open(
+            os.path.join(PROFILE_DIR, f"{profile_id}.folded"), encoding="utf-8"
+        ) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class ProfilerMiddleware:
+    """
+    選ばれたリクエストの処理中のスタックをサンプリングするASGIミドルウェア
+    X-Profile: 1と管理者トークン（X-Admin-Token）を指定したリクエスト、
+    またはPROFILE_SAMPLE_RATEの割合で選ばれたリクエストを計測し、X-Profile-IDヘッダーでIDを返す
+    選ばれなかったリクエストはヘッダーの確認のみで、そのまま処理する
+    計測中は同じプロセスで並行して処理される他のリクエストのスタックも含まれるため、
+    計測は同時に1件のみとする
+    リクエストIDを付与するミドルウェアより外側で動くため、IDはレスポンスのX-Request-IDから記録する
+    """
+
+    def __init__(self, app: Any, is_authorized: Callable[[Optional[str]], bool]):
+        self.app = app
+        self.is_authorized = is_authorized
+
+    def _should_profile(self, scope: dict) -> bool:
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return True
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) not in (b"1", b"true"):
+            return False
+        admin_token = headers.get(b"x-admin-token")
+        return self.is_authorized(admin_token.decode("latin-1") if admin_token else None)
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        global _active
+        if scope["type"] != "http" or _active or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        _active = True
+        profile_id = uuid.uuid4().hex
+        profiler = SamplingProfiler(threading.get_ident())
+        status = 500
+        request_id = None
+
+        async def send_with_profile_id(message: dict) -> None:
+            nonlocal status, request_id
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = dict(message.get("headers", []))
+                if b"x-request-id" in headers:
+                    request_id = headers[b"x-request-id"].decode("latin-1")
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode("ascii")),
+                ]
+            await send(message)
+
+        token = profile_id_var.set(profile_id)
+        started_at = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            profile_id_var.reset(token)
+            _active = False
+            duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            try:
+                path = save_profile(profile_id, profiler.stacks)
+                logger.info(
+                    "request profiled",
+                    extra={
+                        "profileId": profile_id,
+                        "requestId": request_id,
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "durationMs": duration_ms,
+                        "samples": profiler.sample_count,
+                        "profilePath": path,
+                    },
+                )
+            except OSError as e:
+                logger.warning(
+                    "プロファイルの保存に失敗しました",
+                    extra={"profileId": profile_id, "error": str(e)},
+                )
@@ -14,9 +14,15 @@ GOOGLE_VEO_MODEL = "veo-2.0-generate-001"
 # 環境変数の読み込み
 load_dotenv()
 
+# 生成動画のフレームレート変更方式（"opencv" または "ffmpeg"）
+VIDEO_FPS_STRATEGY = os.getenv("VIDEO_FPS_STRATEGY", "opencv")
+
 # APIキーの設定
 WORDS_API_KEY = os.getenv("WORDS_API_KEY")
 
+# 管理用エンドポイントの認証トークン（未設定の場合は管理用エンドポイントを無効化）
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
 # Vertex AI設定
 GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
 GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
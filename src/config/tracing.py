@@ -0,0 +1,443 @@
+"""
+OpenTelemetry互換の分散トレーシング（スパンの記録とOTLP/JSON形式での出力）
+TRACE_EXPORTERを設定しない場合はスパンを記録せず、呼び出しのたびの負荷はほぼない
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# スパンの出力先（"file": TRACE_EXPORT_PATHに追記 / "otlp": OTLP/HTTPでコレクターに送信 / 未設定: 記録しない）
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+
+# "file"の場合の出力先（1行に1バッチのOTLP/JSON）
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+
+# "otlp"の場合の送信先（OpenTelemetry CollectorのOTLP/HTTPレシーバー）
+TRACE_OTLP_ENDPOINT = os.getenv(
+    "TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+
+# resourceのservice.name
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "zenn-hack-backend")
+
+# 一度に出力するスパンの上限と、出力までの最大待ち時間（秒）
+TRACE_BATCH_SIZE = 512
+TRACE_FLUSH_INTERVAL_SECONDS = 5.0
+
+# 出力待ちのスパンの上限（超えた場合は新しいスパンを捨てる）
+TRACE_QUEUE_MAX_SIZE = 10000
+
+# スパンの種類（OTLPのSpanKind）
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# スパンの状態（OTLPのStatusCode）
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+# 親スパンの (トレースID, スパンID)
+SpanContext = Tuple[str, str]
+
+
+@dataclass(slots=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    name: str
+    kind: int
+    start_time_ns: int
+    end_time_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status_code: int = STATUS_CODE_OK
+    status_message: str = ""
+
+    @property
+    def context(self) -> SpanContext:
+        return self.trace_id, self.span_id
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def record_error(self, error: BaseException) -> None:
+        self.status_code = STATUS_CODE_ERROR
+        self.status_message = str(error)[:1000]
+        self.attributes["exception.type"] = type(error).__name__
+
+    def end(self) -> None:
+        self.end_time_ns = time.time_ns()
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": [
+                _otlp_attribute(key, value) for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    # トレーシングが無効な場合に返すスパン（何も記録しない）
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _new_span(
+    name: str, kind: int, parent: Optional[SpanContext], attributes: Optional[dict]
+) -> Span:
+    trace_id, parent_span_id = parent if parent else (secrets.token_hex(16), None)
+    return Span(
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent_span_id,
+        name=name,
+        kind=kind,
+        start_time_ns=time.time_ns(),
+        attributes=dict(attributes) if attributes else {},
+    )
+
+
+class _BatchSpanExporter:
+    # 終了したスパンをキューに積み、専用スレッドがまとめてファイル・コレクターに出力する
+    def __init__(self, export_func: Callable[[bytes], None]) -> None:
+        self._export_func = export_func
+        self._queue: queue.Queue = queue.Queue(maxsize=TRACE_QUEUE_MAX_SIZE)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="trace-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # 出力が追いつかない場合は捨てる
+
+    def _run(self) -> None:
+        # 一定間隔でキューを空にし、停止時は残りを出力してから終了する
+        while not self._stopped.wait(TRACE_FLUSH_INTERVAL_SECONDS):
+            self._flush()
+        self._flush()
+
+    def _flush(self) -> None:
+        while True:
+            batch: list[Span] = []
+            while len(batch) < TRACE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._export(batch)
+
+    def _export(self, spans: list[Span]) -> None:
+        try:
+            self._export_func(encode_otlp_spans(spans))
+        except Exception as e:
+            logger.warning(
+                "トレースの出力に失敗しました",
+                extra={"error": str(e), "spanCount": len(spans)},
+            )
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=TRACE_FLUSH_INTERVAL_SECONDS + 5)
+
+
+_exporter: Optional[_BatchSpanExporter] = None
+
+
+def _write_to_file(data: bytes) -> None:
+    with open(TRACE_EXPORT_PATH, "ab") as f:
+        f.write(data + b"\n")
+
+
+def _post_to_collector(data: bytes) -> None:
+    request = urllib.request.Request(
+        TRACE_OTLP_ENDPOINT,
+        data=data,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
+
+
+def encode_otlp_spans(spans: list[Span]) -> bytes:
+    """
+    スパンをOTLP/JSON形式（ExportTraceServiceRequest）に変換する関数
+
+    Args:
+        spans (list[Span]): 終了したスパン
+
+    Returns:
+        bytes: OTLP/JSON
+    """
+    payload = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        _otlp_attribute("service.name", TRACE_SERVICE_NAME)
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def setup_tracing(exporter: Optional[str] = None) -> None:
+    """
+    スパンの出力を開始する関数（複数回呼び出しても設定は1回のみ）
+
+    Args:
+        exporter (Optional[str]): 出力先（"file" / "otlp"、Noneの場合は環境変数TRACE_EXPORTER）
+
+    Raises:
+        ValueError: 出力先が不正な場合
+    """
+    global _exporter
+    if _exporter is not None:
+        return
+    exporter = (exporter or TRACE_EXPORTER).lower()
+    if not exporter:
+        return
+    if exporter == "file":
+        _exporter = _BatchSpanExporter(_write_to_file)
+    elif exporter == "otlp":
+        _exporter = _BatchSpanExporter(_post_to_collector)
+    else:
+        raise ValueError(f"不正なトレースの出力先です: {exporter}")
+
+
+def shutdown_tracing() -> None:
+    """
+    出力待ちのスパンを出力し、出力用スレッドを停止する関数（アプリ終了時に呼び出す）
+    """
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+    _exporter = None
+
+
+def tracing_enabled() -> bool:
+    """
+    スパンを記録するかどうかを返す関数
+
+    Returns:
+        bool: 出力先が設定されている場合はTrue
+    """
+    return _exporter is not None
+
+
+def current_span_context() -> Optional[SpanContext]:
+    """
+    実行中のスパンの (トレースID, スパンID) を返す関数
+
+    Returns:
+        Optional[SpanContext]: 実行中のスパンがない場合はNone
+    """
+    span = _current_span.get()
+    return span.context if span else None
+
+
+def export_span(span: Span) -> None:
+    """
+    終了したスパンを出力する関数（子プロセスで記録したスパンの出力にも使う）
+
+    Args:
+        span (Span): 終了したスパン
+    """
+    if _exporter is not None:
+        _exporter.on_end(span)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    attributes: Optional[dict[str, Any]] = None,
+    kind: int = SPAN_KIND_INTERNAL,
+    parent: Optional[SpanContext] = None,
+    activate: bool = True,
+) -> Iterator[Union[Span, _NoopSpan]]:
+    """
+    スパンを開始し、ブロックを抜けた時点で終了する関数
+    例外が発生した場合はスパンをエラーとして記録し、例外はそのまま再発生させる
+
+    Args:
+        name (str): スパン名
+        attributes (Optional[dict[str, Any]]): 属性
+        kind (int): スパンの種類
+        parent (Optional[SpanContext]): 親スパン（Noneの場合は実行中のスパン）
+        activate (bool): ブロック内で実行中のスパンとして扱うかどうか
+            （非同期ジェネレーターのようにyieldをまたぐ場合はFalse）
+
+    Yields:
+        Union[Span, _NoopSpan]: 開始したスパン（トレーシングが無効な場合は何も記録しないスパン）
+    """
+    if _exporter is None:
+        yield _NOOP_SPAN
+        return
+    span = _new_span(name, kind, parent or current_span_context(), attributes)
+    token = _current_span.set(span) if activate else None
+    try:
+        yield span
+    except Exception as e:
+        span.record_error(e)
+        raise
+    finally:
+        span.end()
+        if token is not None:
+            _current_span.reset(token)
+        export_span(span)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    """
+    W3C Trace Contextのtraceparentヘッダーから親スパンを求める関数
+
+    Args:
+        header (Optional[str]): traceparentヘッダーの値
+
+    Returns:
+        Optional[SpanContext]: 形式が不正な場合はNone
+    """
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+def run_traced(
+    parent: SpanContext, name: str, func: Callable[..., T], *args: Any
+) -> Tuple[Span, Optional[T], Optional[BaseException]]:
+    """
+    子プロセスで関数を実行し、実行時間のスパンを結果と一緒に返す関数
+    子プロセスからはスパンを出力できないため、親プロセスでexport_spanに渡す
+
+    Args:
+        parent (SpanContext): 親スパン
+        name (str): スパン名
+        func (Callable[..., T]): 実行する関数
+        *args (Any): 関数に渡す引数
+
+    Returns:
+        Tuple[Span, Optional[T], Optional[BaseException]]: (スパン, 戻り値, 発生した例外)
+    """
+    span = _new_span(name, SPAN_KIND_INTERNAL, parent, {"process.pid": os.getpid()})
+    try:
+        return span, func(*args), None
+    except Exception as e:
+        span.record_error(e)
+        return span, None, e
+    finally:
+        span.end()
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    関数の実行をスパンとして記録するデコレーター（同期関数・コルーチン関数に使える）
+
+    Args:
+        name (Optional[str]): スパン名（Noneの場合は関数名）
+
+    Returns:
+        Callable[[Callable], Callable]: デコレーター
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def coroutine_wrapper(*args: Any, **kwargs: Any):
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return coroutine_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,312 @@
+import dataclasses
+import json
+import types
+import typing
+from datetime import datetime
+from enum import Enum
+from functools import cache
+from typing import Any, Callable, Optional
+
+# レスポンスのJSONの区切り文字（空白を省いて転送量を減らす）
+JSON_SEPARATORS = (",", ":")
+
+# JSONにそのまま出力できる型
+_JSON_NATIVE_TYPES = (str, int, float, bool, type(None), Any)
+
+Converter = Optional[Callable[[Any], Any]]
+
+
+def _field_config(field: dataclasses.Field) -> dict:
+    return field.metadata.get("dataclasses_json", {})
+
+
+def _json_key(cls: type, field: dataclasses.Field) -> str:
+    """dataclasses_jsonと同じ規則でJSONのキー名を求める（フィールド単位の指定を優先）"""
+    letter_case = _field_config(field).get("letter_case")
+    if letter_case is None:
+        class_config = getattr(cls, "dataclass_json_config", None) or {}
+        letter_case = class_config.get("letter_case")
+    return letter_case(field.name) if letter_case else field.name
+
+
+def _unwrap_optional(tp: Any) -> tuple[Any, bool]:
+    if typing.get_origin(tp) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return tp, False
+
+
+def _encoder_for_type(tp: Any) -> Converter:
+    """型に応じたJSON用の変換関数を返す（変換不要の場合はNone）"""
+    tp, _ = _unwrap_optional(tp)
+    if tp in _JSON_NATIVE_TYPES:
+        return None
+    if isinstance(tp, type):
+        if dataclasses.is_dataclass(tp):
+            return get_encoder(tp)
+        if issubclass(tp, Enum):
+            return lambda value: value.value
+        if issubclass(tp, datetime):
+            return lambda value: value.isoformat()
+    origin = typing.get_origin(tp)
+    if origin in (list, tuple, set, frozenset):
+        item_encoder = _encoder_for_type((typing.get_args(tp) or (Any,))[0])
+        if item_encoder is None and origin is list:
+            return None
+        if item_encoder is None:
+            return list
+        return lambda values: [
+            None if value is None else item_encoder(value) for value in values
+        ]
+    if origin is dict:
+        value_encoder = _encoder_for_type((typing.get_args(tp) or (Any, Any))[1])
+        if value_encoder is None:
+            return None
+        return lambda values: {
+            key: None if value is None else value_encoder(value)
+            for key, value in values.items()
+        }
+    # 型から変換方法を決められない場合は値を見て変換する
+    return to_primitive
+
+
+def _decoder_for_type(tp: Any) -> Converter:
+    """型に応じたJSON（Firestore）からの変換関数を返す（変換不要の場合はNone）"""
+    tp, _ = _unwrap_optional(tp)
+    if isinstance(tp, type):
+        if dataclasses.is_dataclass(tp):
+            return get_decoder(tp)
+        if issubclass(tp, Enum):
+            return tp
+        return None
+    origin = typing.get_origin(tp)
+    if origin is list:
+        item_decoder = _decoder_for_type((typing.get_args(tp) or (Any,))[0])
+        if item_decoder is None:
+            return None
+        return lambda values: [
+            None if value is None else item_decoder(value) for value in values
+        ]
+    if origin is dict:
+        value_decoder = _decoder_for_type((typing.get_args(tp) or (Any, Any))[1])
+        if value_decoder is None:
+            return None
+        return lambda values: {
+            key: None if value is None else value_decoder(value)
+            for key, value in values.items()
+        }
+    return None
+
+
+def _compile(name: str, source: str, namespace: dict) -> Callable:
+    exec(compile(source, f"<serializer {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+@cache
+def get_encoder(cls: type) -> Callable[[Any], dict]:
+    """
+    dataclassをJSON用のdictに変換する関数を生成する
+    dataclasses_jsonのto_dictと同じキー名・エンコーダー・除外条件を使うが、
+    フィールドごとの型判定を生成時に済ませるため、変換時は属性の読み出しと代入のみになる
+
+    Args:
+        cls (type): 変換するdataclass
+
+    Returns:
+        Callable[[Any], dict]: 変換関数
+    """
+    hints = typing.get_type_hints(cls)
+    namespace: dict[str, Any] = {}
+    lines = ["def encode(obj):", "    data = {}"]
+    for index, field in enumerate(dataclasses.fields(cls)):
+        key = _json_key(cls, field)
+        config = _field_config(field)
+        encoder = config.get("encoder") or _encoder_for_type(hints[field.name])
+        lines.append(f"    value = obj.{field.name}")
+        indent = "    "
+        if config.get("exclude"):
+            namespace[f"exclude_{index}"] = config["exclude"]
+            lines.append(f"    if not exclude_{index}(value):")
+            indent = "        "
+        if encoder is None:
+            lines.append(f"{indent}data[{key!r}] = value")
+        else:
+            namespace[f"encode_{index}"] = encoder
+            lines.append(
+                f"{indent}data[{key!r}] = None if value is None else encode_{index}(value)"
+            )
+    lines.append("    return data")
+    return _compile("encode", "\n".join(lines), namespace)
+
+
+@cache
+def get_decoder(cls: type) -> Callable[[dict], Any]:
+    """
+    JSON（Firestoreのドキュメント）のdictからdataclassを生成する関数を生成する
+    dataclasses_jsonのfrom_dictと同じキー名・デコーダーを使い、
+    存在しないキーは既定値（なければNone）とする
+
+    Args:
+        cls (type): 生成するdataclass
+
+    Returns:
+        Callable[[dict], Any]: 変換関数
+    """
+    hints = typing.get_type_hints(cls)
+    namespace: dict[str, Any] = {"cls": cls, "MISSING": dataclasses.MISSING}
+    lines = ["def decode(data):", "    get = data.get"]
+    arguments = []
+    for index, field in enumerate(dataclasses.fields(cls)):
+        if not field.init:
+            continue
+        key = _json_key(cls, field)
+        decoder = _field_config(field).get("decoder") or _decoder_for_type(
+            hints[field.name]
+        )
+        if field.default is not dataclasses.MISSING:
+            namespace[f"default_{index}"] = field.default
+            fallback = f"default_{index}"
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"default_{index}"] = field.default_factory
+            fallback = f"default_{index}()"
+        else:
+            fallback = "None"
+        if key == field.name:
+            lines.append(f"    value_{index} = get({key!r}, MISSING)")
+        else:
+            # dataclasses_jsonと同様に、フィールド名のままのキーも受け付ける
+            lines.append(
+                f"    value_{index} = get({key!r}, get({field.name!r}, MISSING))"
+            )
+        lines.append(f"    if value_{index} is MISSING:")
+        lines.append(f"        value_{index} = {fallback}")
+        if decoder is not None:
+            namespace[f"decode_{index}"] = decoder
+            lines.append(f"    if value_{index} is not None:")
+            lines.append(f"        value_{index} = decode_{index}(value_{index})")
+        arguments.append(f"{field.name}=value_{index}")
+    lines.append(f"    return cls({', '.join(arguments)})")
+    return _compile("decode", "\n".join(lines), namespace)
+
+
+def to_primitive(value: Any) -> Any:
+    """dataclass・Enum・datetimeを含む値をJSONに出力できる値に変換する"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return get_encoder(type(value))(value)
+    if isinstance(value, dict):
+        return {key: to_primitive(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_primitive(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_json(value: Any) -> bytes:
+    """
+    レスポンス用にJSONへエンコードする関数
+
+    Args:
+        value (Any): dataclass、またはdataclassを含むdict・list
+
+    Returns:
+        bytes: UTF-8のJSON
+    """
+    return json.dumps(
+        to_primitive(value), ensure_ascii=False, separators=JSON_SEPARATORS
+    ).encode("utf-8")
+
+
+if __name__ == "__main__":
+    import timeit
+
+    from fastapi.encoders import jsonable_encoder
+
+    from src.models.types import (
+        FlashcardResponse,
+        MediaResponse,
+        MeaningResponse,
+        WordResponse,
+    )
+    from src.services.firebase.schemas.word_schema import WordSchema
+
+    # 1枚あたりのシリアライズのコストを、従来の経路と比較する
+    word = WordSchema(
+        word="cat",
+        meaning_id_list=["m1", "m2", "m3"],
+        core_meaning="猫",
+        explanation="しばしば犬と対比される小型の哺乳類",
+    )
+    meaning_doc = {
+        "pos": "noun",
+        "translation": "猫",
+        "pronunciation": "kæt",
+        "exampleEng": "The cat sat on the mat.",
+        "exampleJpn": "猫がマットの上に座っていました。",
+        "rank": 1,
+    }
+    media_doc = {
+        "flashcardId": "f1",
+        "meaningId": "m1",
+        "mediaUrls": ["https://storage.googleapis.com/bucket/media/ab/abcdef.png"],
+        "mediaVariants": [
+            {
+                "full": "https://storage.googleapis.com/bucket/media/cd/cdef.webp",
+                "medium": "https://storage.googleapis.com/bucket/media/ef/efab.webp",
+                "thumbnail": "https://storage.googleapis.com/bucket/media/12/1234.webp",
+            }
+        ],
+    }
+
+    def legacy_path():
+        word_response = word.to_dict()
+        word_response["wordId"] = "w1"
+        flashcard = FlashcardResponse(
+            flashcard_id="f1",
+            word=WordResponse.from_dict(word_response),
+            meanings=[
+                MeaningResponse.from_dict({**meaning_doc, "meaning_id": f"m{i}"})
+                for i in range(3)
+            ],
+            media=MediaResponse.from_dict({**media_doc, "media_id": "me1"}),
+            memo="",
+            version=1,
+        )
+        # FastAPIが戻り値のdictに対して行うエンコード（レスポンスモデルの検証は含まない）
+        return json.dumps(
+            jsonable_encoder(flashcard.to_dict()), ensure_ascii=False
+        ).encode("utf-8")
+
+    decode_meaning = get_decoder(MeaningResponse)
+    decode_media = get_decoder(MediaResponse)
+
+    def compiled_path():
+        flashcard = FlashcardResponse(
+            flashcard_id="f1",
+            word=WordResponse(
+                word_id="w1",
+                word=word.word,
+                core_meaning=word.core_meaning,
+                explanation=word.explanation,
+            ),
+            meanings=[
+                decode_meaning({**meaning_doc, "meaningId": f"m{i}"})
+                for i in range(3)
+            ],
+            media=decode_media({**media_doc, "mediaId": "me1"}),
+            memo="",
+            version=1,
+        )
+        return encode_json(flashcard)
+
+    assert json.loads(legacy_path()) == json.loads(compiled_path())
+    count = 5000
+    for name, func in (("dataclasses_json", legacy_path), ("compiled", compiled_path)):
+        elapsed = timeit.timeit(func, number=count)
+        print(f"{name:>16}: {elapsed / count * 1e6:8.1f} us/card")
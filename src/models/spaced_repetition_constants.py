@@ -0,0 +1,18 @@
+# 復習のスケジュール（SM-2）の設定値
+# スキーマ・サービスの両方から参照するため、サービスに依存しないモジュールに置く
+
+# 解答の評価（SM-2の0〜5、3以上を正解とする）
+MIN_GRADE = 0
+MAX_GRADE = 5
+PASSING_GRADE = 3
+
+# 新しいフラッシュカードの容易度と、容易度の下限
+INITIAL_EASE_FACTOR = 2.5
+MIN_EASE_FACTOR = 1.3
+
+# 1回目・2回目に正解した後の復習間隔（日）
+FIRST_INTERVAL_DAYS = 1
+SECOND_INTERVAL_DAYS = 6
+
+# 不正解だった場合に、同じ学習の中で再度出題するまでの時間
+LAPSE_RETRY_MINUTES = 10
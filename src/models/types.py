@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from dataclasses_json import LetterCase, dataclass_json
 from pydantic import BaseModel
@@ -47,7 +47,7 @@ class WordAndMeanings:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class TranslationByGemini:
     pos: PartOfSpeech
     definition_jpn: str
@@ -59,14 +59,14 @@ class TranslationByGemini:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ExplanationByGemini:
     explanation: str
     core_meaning: Optional[str]
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class PromptForImagenByGemini:
     generated_prompt: str
     prompt_token_count: int
@@ -75,7 +75,7 @@ class PromptForImagenByGemini:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ModifiedOtherSettingsByGemini:
     generated_other_settings: str
     prompt_token_count: int
@@ -84,7 +84,7 @@ class ModifiedOtherSettingsByGemini:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class TokenInfo:
     prompt_token_count: int
     candidates_token_count: int
@@ -92,7 +92,7 @@ class TokenInfo:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class SetUpUserRequest:
     user_id: str
     email: str
@@ -100,7 +100,7 @@ class SetUpUserRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateUserRequest:
     user_id: str
     email: str
@@ -108,28 +108,55 @@ class UpdateUserRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class AddUsingFlashcardRequest:
     user_id: str
     flashcard_id: str
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateFlagRequest:
     flashcard_id: str
     check_flag: bool
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateMemoRequest:
     flashcard_id: str
     memo: str
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class BatchUpdateFlashcardResult:
+    # リクエストのoperations内の位置
+    index: int
+    flashcard_id: Optional[str]
+    # updated / invalid / not_found / failed
+    status: str
+    error: Optional[str] = None
+
+
 @dataclass
+class BatchUpdateFlashcardResultModel(BaseModel):
+    index: int
+    flashcardId: Optional[str]
+    status: str
+    error: Optional[str] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True)
+class ReviewFlashcardRequest:
+    flashcard_id: str
+    # 解答の評価（0: 全く思い出せない 〜 5: 完璧に思い出せた）
+    grade: int
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True)
 class CreateMediaRequest:
     flashcard_id: str
     old_media_id: Optional[str]
@@ -149,7 +176,7 @@ class CreateMediaRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GetNotComparedMediaResponse:
     comparison_id: str
     flashcard_id: str
@@ -166,7 +193,7 @@ class NotComparedMediaResponseModel:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CompareMediasRequest:
     flashcard_id: str
     comparison_id: str
@@ -176,7 +203,7 @@ class CompareMediasRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CreateTemplateRequest:
     generation_type: str
     target: Optional[str]
@@ -184,7 +211,7 @@ class CreateTemplateRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateTemplateRequest:
     template_id: str
     generation_type: str
@@ -193,20 +220,20 @@ class UpdateTemplateRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateUsingMeaningsRequest:
     flashcard_id: str
     using_meaning_id_list: List[str]
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CreateDefaultFlashcardRequest:
     word: str
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ApplyAddMeaningRequest:
     word_id: str
     translation: str
@@ -215,7 +242,7 @@ class ApplyAddMeaningRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ApplyModifyMeaningRequest:
     word_id: str
     meaning_id: str
@@ -225,7 +252,7 @@ class ApplyModifyMeaningRequest:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UserResponse:
     user_id: str
     email: str
@@ -242,7 +269,7 @@ class UserResponseModel(BaseModel):
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class WordResponse:
     word_id: str
     word: str
@@ -251,7 +278,7 @@ class WordResponse:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MeaningResponse:
     meaning_id: str
     pos: str
@@ -262,15 +289,16 @@ class MeaningResponse:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MediaResponse:
     media_id: str
     meaning_id: Optional[str]
     media_urls: List[str]
+    media_variants: Optional[List[Dict[str, str]]] = None
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FlashcardResponse:
     flashcard_id: str
     word: WordResponse
@@ -281,6 +309,93 @@ class FlashcardResponse:
     check_flag: bool = False
 
 
+@dataclass(slots=True, frozen=True)
+class FlashcardPage:
+    user_id: str
+    # このページに含めるフラッシュカードID（ユーザーのflashcardIdListの順）
+    flashcard_ids: List[str]
+    # 取得するフィールド（Noneの場合は全フィールド）
+    fields: Optional[frozenset]
+    next_cursor: Optional[str]
+    etag: str
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class SyncFlashcardResponse:
+    flashcard_id: str
+    word_id: str
+    using_meaning_id_list: List[str]
+    current_media_id: str
+    memo: str
+    version: int
+    check_flag: bool
+    updated_at: Optional[str] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class SyncResponse:
+    # 変更されたフラッシュカードと、それらが参照する単語・意味・メディア
+    flashcards: List[SyncFlashcardResponse]
+    words: List[WordResponse]
+    meanings: List[MeaningResponse]
+    medias: List[MediaResponse]
+    # 削除されたフラッシュカードのID
+    removed_flashcard_ids: List[str]
+    # 次回の同期に指定するトークン
+    sync_token: str
+    # Trueの場合は続きがあるため、sync_tokenを指定してすぐに再度同期する
+    has_more: bool
+    # Trueの場合はクライアントが保持するフラッシュカードをすべて破棄してから反映する
+    reset: bool
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class StudyCardResponse:
+    flashcard_id: str
+    word_id: str
+    using_meaning_id_list: List[str]
+    current_media_id: str
+    check_flag: bool
+    interval_days: int
+    ease_factor: float
+    repetitions: int
+    due_at: Optional[str] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class StudySessionCardResponse:
+    card: StudyCardResponse
+    word: WordResponse
+    meanings: List[MeaningResponse]
+    media: MediaResponse
+    # 一覧表示用のサムネイル（動画はポスター画像）のURL
+    thumbnail_url: Optional[str] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class StudySessionResponse:
+    cards: List[StudySessionCardResponse]
+    # 次のページのカーソル（続きがない場合はNone）
+    next_cursor: Optional[str] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class DeckImportResponse:
+    # 作成したフラッシュカードのID（アーカイブ内の順）
+    flashcard_ids: List[str]
+    created_word_count: int
+    created_meaning_count: int
+    created_media_count: int
+    # アップロードしたメディアファイルの数（保存済みの内容は含まない）
+    uploaded_file_count: int
+
+
 @dataclass
 class WordResponseModel(BaseModel):
     wordId: str
@@ -304,6 +419,7 @@ class MediaResponseModel(BaseModel):
     mediaId: str
     meaningId: Optional[str]
     mediaUrls: List[str]
+    mediaVariants: Optional[List[Dict[str, str]]] = None
 
 
 @dataclass
@@ -317,8 +433,42 @@ class FlashcardResponseModel(BaseModel):
     checkFlag: bool = False
 
 
-@dataclass_json(letter_case=LetterCase.CAMEL)
 @dataclass
+class SyncFlashcardResponseModel(BaseModel):
+    flashcardId: str
+    wordId: str
+    usingMeaningIdList: List[str]
+    currentMediaId: str
+    memo: str
+    version: int
+    checkFlag: bool
+    updatedAt: Optional[str] = None
+
+
+@dataclass
+class StudyCardResponseModel(BaseModel):
+    flashcardId: str
+    wordId: str
+    usingMeaningIdList: List[str]
+    currentMediaId: str
+    checkFlag: bool
+    intervalDays: int
+    easeFactor: float
+    repetitions: int
+    dueAt: Optional[str] = None
+
+
+@dataclass
+class StudySessionCardResponseModel(BaseModel):
+    card: StudyCardResponseModel
+    word: WordResponseModel
+    meanings: List[MeaningResponseModel]
+    media: MediaResponseModel
+    thumbnailUrl: Optional[str] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
 class TemplatesResponse:
     template_id: str
     generation_type: str
@@ -335,7 +485,7 @@ class TemplatesResponseModel:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CreateTemplateResponse:
     template_id: str
 
@@ -346,7 +496,7 @@ class CreateTemplateResponseModel:
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True, frozen=True)
 class WordForExtensionResponse:
     message: str
     flashcard_id: str
@@ -365,8 +515,93 @@ class WordForExtensionResponseModel(BaseModel):
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class WordLookupSummary:
+    flashcard_id: str
+    word_id: str
+    word: str
+    core_meaning: Optional[str]
+    thumbnail_url: Optional[str]
+
+
 @dataclass
+class WordLookupSummaryModel(BaseModel):
+    flashcardId: str
+    wordId: str
+    word: str
+    coreMeaning: Optional[str]
+    thumbnailUrl: Optional[str]
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class WordCompletionResponse:
+    word_id: str
+    word: str
+
+
+@dataclass
+class WordCompletionResponseModel(BaseModel):
+    wordId: str
+    word: str
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
 class SetupMediaResponse:
     comparison_id: str
     media_id: str
     media_urls: List[str]
+    media_variants: Optional[List[Dict[str, str]]] = None
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True)
+class CollectOrphanedMediasRequest:
+    dry_run: bool = True
+    grace_period_hours: float = 24.0
+    max_deletes_per_second: int = 20
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class CollectOrphanedMediasResponse:
+    dry_run: bool
+    scanned_media_count: int
+    orphaned_media_ids: List[str]
+    orphaned_blob_paths: List[str]
+    deleted_media_count: int
+    deleted_blob_count: int
+
+
+@dataclass
+class CollectOrphanedMediasResponseModel:
+    dryRun: bool
+    scannedMediaCount: int
+    orphanedMediaIds: List[str]
+    orphanedBlobPaths: List[str]
+    deletedMediaCount: int
+    deletedBlobCount: int
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True, frozen=True)
+class JobResponse:
+    job_id: str
+    job_type: str
+    target_id: str
+    status: str
+    progress: Dict[str, int]
+    error: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+@dataclass
+class JobResponseModel:
+    jobId: str
+    jobType: str
+    targetId: str
+    status: str
+    progress: Dict[str, int]
+    error: Optional[str] = None
+    updatedAt: Optional[str] = None
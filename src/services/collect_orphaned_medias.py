@@ -0,0 +1,145 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from src.models.exceptions import ServiceException
+from src.models.types import CollectOrphanedMediasResponse
+from src.services.firebase.unit.firestore_bulk import (
+    DEFAULT_PAGE_SIZE,
+    delete_docs_in_batches,
+    stream_collection,
+)
+from src.services.firebase.unit.firestore_media import collect_media_file_urls
+from src.services.media_file_release import (
+    apply_media_file_release,
+    delete_blobs_throttled,
+    plan_media_file_release,
+)
+
+
+async def collect_orphaned_medias(
+    dry_run: bool = True,
+    grace_period_hours: float = 24.0,
+    max_deletes_per_second: int = 20,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> CollectOrphanedMediasResponse:
+    """どこからも参照されていないメディアとそのファイルを削除する関数
+    users・flashcards・comparisonsをページ単位で読み込み、参照されているメディアIDを集める
+    存在するユーザー（またはdefault）のフラッシュカードの現在のメディア・メディア履歴と、
+    未比較の比較データの新旧メディアを参照ありとみなす
+    作成から猶予期間が経過していないメディアと、最後の更新（重複排除での再利用を含む）から
+    猶予期間が経過していないファイルは、生成処理中の可能性があるため対象外
+
+    Args:
+        dry_run (bool): Trueの場合は削除せず、削除対象の集計のみ行う
+        grace_period_hours (float): 削除対象とするまでの猶予期間（時間）
+        max_deletes_per_second (int): 1秒あたりに削除するファイル数の上限
+        page_size (int): 1ページあたりに読み込むドキュメント数
+
+    Returns:
+        CollectOrphanedMediasResponse: 削除対象と削除結果
+
+    Raises:
+        ServiceException: 処理に失敗した場合
+    """
+    try:
+        if max_deletes_per_second <= 0:
+            raise ServiceException(
+                "max_deletes_per_secondは1以上を指定してください", "validation"
+            )
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_period_hours)
+
+        user_ids = set()
+        async for doc in stream_collection(
+            "users", field_paths=[], page_size=page_size
+        ):
+            user_ids.add(doc.id)
+
+        live_flashcard_ids = set()
+        referenced_media_ids = set()
+        async for doc in stream_collection(
+            "flashcards",
+            field_paths=["createdBy", "currentMediaId", "mediaIdList"],
+            page_size=page_size,
+        ):
+            flashcard = doc.to_dict()
+            created_by = flashcard.get("createdBy")
+            if created_by != "default" and created_by not in user_ids:
+                continue  # 削除済みユーザーのフラッシュカードは参照元とみなさない
+            live_flashcard_ids.add(doc.id)
+            if flashcard.get("currentMediaId"):
+                referenced_media_ids.add(flashcard["currentMediaId"])
+            referenced_media_ids.update(flashcard.get("mediaIdList") or [])
+
+        async for doc in stream_collection(
+            "comparisons",
+            field_paths=["flashcardId", "oldMediaId", "newMediaId", "isSelectedNew"],
+            page_size=page_size,
+        ):
+            comparison = doc.to_dict()
+            if comparison.get("flashcardId") not in live_flashcard_ids:
+                continue
+            # 未比較の場合は新旧どちらが選ばれてもよいよう両方を残す
+            if comparison.get("isSelectedNew") == "":
+                for key in ("oldMediaId", "newMediaId"):
+                    if comparison.get(key):
+                        referenced_media_ids.add(comparison[key])
+
+        scanned_media_count = 0
+        orphaned_media_urls: dict[str, list[str]] = {}
+        async for doc in stream_collection(
+            "medias", field_paths=["mediaUrls", "mediaVariants"], page_size=page_size
+        ):
+            scanned_media_count += 1
+            if doc.id in referenced_media_ids or doc.create_time > cutoff:
+                continue
+            orphaned_media_urls[doc.id] = collect_media_file_urls(doc.to_dict())
+
+        release = await plan_media_file_release(orphaned_media_urls)
+        # メディアと紐付けられないまま残ったファイル
+        async for doc in stream_collection(
+            "media_blobs",
+            field_paths=["path"],
+            filters=[("mediaIdList", "==", [])],
+            page_size=page_size,
+        ):
+            # 重複排除で再利用されると更新日時が更新されるため、最後の更新から猶予期間を数える
+            if doc.update_time <= cutoff:
+                release.deletable_blobs[doc.id] = doc.to_dict()["path"]
+
+        deleted_media_count = 0
+        deleted_blob_count = 0
+        if not dry_run:
+            deleted_blob_count = await apply_media_file_release(
+                release,
+                partial(
+                    delete_blobs_throttled,
+                    max_deletes_per_second=max_deletes_per_second,
+                ),
+            )
+            deleted_media_count = await delete_docs_in_batches(
+                "medias", release.media_ids
+            )
+
+        return CollectOrphanedMediasResponse(
+            dry_run=dry_run,
+            scanned_media_count=scanned_media_count,
+            orphaned_media_ids=release.media_ids,
+            orphaned_blob_paths=release.blob_paths,
+            deleted_media_count=deleted_media_count,
+            deleted_blob_count=deleted_blob_count,
+        )
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"不要なメディアの削除中にエラーが発生しました: {str(e)}", "general"
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    # 定期実行ジョブから `python -m src.services.collect_orphaned_medias --execute` で実行する
+    result = asyncio.run(collect_orphaned_medias(dry_run="--execute" not in sys.argv))
+    print(result.to_json(ensure_ascii=False, indent=2))
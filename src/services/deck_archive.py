@@ -0,0 +1,156 @@
+import json
+import time
+import zipfile
+from typing import Iterable, Iterator
+
+# エクスポートしたデッキのアーカイブ形式
+DECK_ARCHIVE_FORMAT = "zenn-hack-deck"
+DECK_ARCHIVE_VERSION = 1
+
+# アーカイブ内の索引（フラッシュカード・単語・意味・メディア）のファイル名
+DECK_INDEX_NAME = "index.json"
+
+# アーカイブ内のメディアファイルのディレクトリ（ファイル名は内容のハッシュ値）
+DECK_MEDIA_DIRECTORY = "media"
+
+# 索引が持つ表
+DECK_INDEX_TABLES = ("flashcards", "words", "meanings", "medias", "files")
+
+
+class _ChunkSink:
+    # zipfileの書き込み先として、書き込まれたデータをストリームに流すまで保持する
+    #   tellを持たないため、zipfileはシークせずにデータディスクリプタ形式で書き込む
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def to_columns(rows: list[dict], keys: Iterable[str]) -> dict[str, list]:
+    """
+    行のリストを列ごとのリストに変換する関数
+    キー名を行ごとに繰り返さないため、索引を小さくできる
+
+    Args:
+        rows (list[dict]): 行のリスト
+        keys (Iterable[str]): 列名
+
+    Returns:
+        dict[str, list]: 列名 -> 値のリスト（ない値はNone）
+    """
+    return {key: [row.get(key) for row in rows] for key in keys}
+
+
+def from_columns(table: dict[str, list]) -> list[dict]:
+    """
+    列ごとのリストを行のリストに変換する関数
+
+    Args:
+        table (dict[str, list]): to_columnsで変換した表
+
+    Returns:
+        list[dict]: 行のリスト
+
+    Raises:
+        ValueError: 表の形式が不正な場合
+    """
+    if not isinstance(table, dict) or not all(
+        isinstance(column, list) for column in table.values()
+    ):
+        raise ValueError("table must be a dict of lists")
+    lengths = {len(column) for column in table.values()}
+    if len(lengths) > 1:
+        raise ValueError("columns must have the same length")
+    keys = list(table)
+    return [dict(zip(keys, values)) for values in zip(*table.values())]
+
+
+def encode_deck_index(tables: dict[str, dict[str, list]], exported_at: str) -> bytes:
+    """
+    索引をアーカイブに書き込むJSONに変換する関数
+
+    Args:
+        tables (dict[str, dict[str, list]]): 表の名前 -> to_columnsで変換した表
+        exported_at (str): エクスポート日時（ISO 8601）
+
+    Returns:
+        bytes: 索引のJSON
+    """
+    index = {
+        "format": DECK_ARCHIVE_FORMAT,
+        "version": DECK_ARCHIVE_VERSION,
+        "exportedAt": exported_at,
+        **tables,
+    }
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_deck_index(data: bytes) -> dict[str, list[dict]]:
+    """
+    アーカイブの索引を表の名前 -> 行のリストに変換する関数
+
+    Args:
+        data (bytes): 索引のJSON
+
+    Returns:
+        dict[str, list[dict]]: 表の名前 -> 行のリスト
+
+    Raises:
+        ValueError: 索引の形式・バージョンが不正な場合
+    """
+    index = json.loads(data)
+    if not isinstance(index, dict) or index.get("format") != DECK_ARCHIVE_FORMAT:
+        raise ValueError("not a deck archive")
+    if index.get("version") != DECK_ARCHIVE_VERSION:
+        raise ValueError(f"unsupported version: {index.get('version')}")
+    return {name: from_columns(index.get(name, {})) for name in DECK_INDEX_TABLES}
+
+
+def iter_zip_stream(
+    entries: Iterable[tuple[str, Iterable[bytes], bool]],
+) -> Iterator[bytes]:
+    """
+    ファイルをzip形式で書き込み、書き込んだ分から順にバイト列として返す関数
+    ファイルの内容もチャンク単位で受け取るため、アーカイブ全体・ファイル全体をメモリに保持しない
+    読み込めないファイル（最初のチャンクの取得でFileNotFoundErrorが発生するもの）はアーカイブに含めない
+
+    Args:
+        entries (Iterable[tuple[str, Iterable[bytes], bool]]): (アーカイブ内のパス, 内容のチャンク, 圧縮するかどうか)
+
+    Yields:
+        bytes: zipファイルのデータ
+    """
+    sink = _ChunkSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, chunks, compress in entries:
+            chunk_iterator = iter(chunks)
+            try:
+                first_chunk = next(chunk_iterator, b"")
+            except FileNotFoundError:
+                continue
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            # 画像・動画はすでに圧縮されているため、索引のみを圧縮する
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            with archive.open(info, "w") as entry:
+                entry.write(first_chunk)
+                for chunk in chunk_iterator:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # 最後にセントラルディレクトリを書き込む
+    yield sink.drain()
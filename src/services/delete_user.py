@@ -0,0 +1,188 @@
+import logging
+import time
+from datetime import datetime
+from functools import partial
+
+from src.models.exceptions import ServiceException
+from src.services.firebase.schemas.job_schema import JobSchema
+from src.services.firebase.unit.firestore_bulk import (
+    build_delete_writes,
+    commit_writes_in_batches,
+    delete_docs_in_batches,
+)
+from src.services.firebase.unit.firestore_comparison import (
+    read_comparison_ids_by_flashcard_ids,
+)
+from src.services.firebase.unit.firestore_flashcard import (
+    read_flashcard_ids_by_created_by,
+)
+from src.services.firebase.unit.firestore_job import (
+    create_job_doc,
+    read_job_doc,
+    update_job_doc_on_progress,
+)
+from src.services.firebase.unit.firestore_media import (
+    read_media_file_urls_by_flashcard_ids,
+)
+from src.services.firebase.unit.firestore_user import read_user_doc
+from src.services.media_file_release import (
+    apply_media_file_release,
+    delete_blobs_concurrently,
+    plan_media_file_release,
+)
+
+logger = logging.getLogger(__name__)
+
+DELETE_USER_JOB_TYPE = "delete_user"
+
+# 1回にまとめて削除するフラッシュカード数
+DELETE_USER_PAGE_SIZE = 100
+
+# Cloud Storageのオブジェクト削除の同時実行数
+BLOB_DELETE_CONCURRENCY = 8
+
+# 実行中のジョブがこの秒数更新されていない場合は中断されたものとみなして再開する
+JOB_STALE_AFTER_SECONDS = 300
+
+
+def _delete_user_job_id(user_id: str) -> str:
+    return f"{DELETE_USER_JOB_TYPE}_{user_id}"
+
+
+def _empty_progress() -> dict[str, int]:
+    return {"flashcards": 0, "comparisons": 0, "medias": 0, "blobs": 0}
+
+
+async def start_delete_user_job(user_id: str) -> tuple[str, bool]:
+    """
+    ユーザー削除ジョブを登録する関数
+    ジョブIDはユーザーごとに固定のため、中断・失敗したジョブは同じIDのまま再開される
+    完了済みのジョブがあっても、同じユーザーIDで再登録されたユーザーがいる場合は新しく実行し直す
+
+    Args:
+        user_id (str): 削除するユーザーID
+
+    Returns:
+        tuple[str, bool]: ジョブIDと、ジョブを実行する必要があるかどうか
+
+    Raises:
+        ServiceException: ユーザーが存在しない（削除済みの）場合
+    """
+    try:
+        job_id = _delete_user_job_id(user_id)
+        job = await read_job_doc(job_id)
+        if job is None or job.status == "succeeded":
+            # Firebase Authでの再登録はユーザーIDが変わらないため、完了済みでもユーザーの有無を確認する
+            if await read_user_doc(user_id) is None:
+                raise ServiceException("指定されたユーザーは存在しません", "not_found")
+            now = datetime.now()
+            await create_job_doc(
+                job_id,
+                JobSchema(
+                    job_type=DELETE_USER_JOB_TYPE,
+                    target_id=user_id,
+                    status="pending",
+                    progress=_empty_progress(),
+                    created_at=now,
+                    updated_at=now,
+                ),
+            )
+            return job_id, True
+
+        if (
+            job.status in ("pending", "running")
+            and job.updated_at
+            and time.time() - job.updated_at.timestamp() < JOB_STALE_AFTER_SECONDS
+        ):
+            return job_id, False  # 他のリクエストで実行中
+
+        await update_job_doc_on_progress(job_id, "pending", job.progress)
+        return job_id, True
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"ユーザー削除ジョブの登録中にエラーが発生しました: {str(e)}", "general"
+        )
+
+
+async def run_delete_user_job(job_id: str, user_id: str) -> None:
+    """
+    ユーザーと、ユーザーが所有するフラッシュカード・比較データ・メディア・ファイルを削除する関数
+    フラッシュカードをDELETE_USER_PAGE_SIZE件ずつ処理し、処理済みのデータは削除されるため、
+    途中で中断しても再実行すれば残りのデータから処理が再開される
+    共有のデフォルトフラッシュカードのメディアは、ユーザーのフラッシュカードに紐づかないため削除されない
+    バックグラウンドで実行されることを想定し、エラーは送出せずジョブの状態に記録する
+
+    Args:
+        job_id (str): ジョブID
+        user_id (str): 削除するユーザーID
+    """
+    progress = _empty_progress()
+    try:
+        job = await read_job_doc(job_id)
+        if job:
+            progress.update(job.progress)
+        await update_job_doc_on_progress(job_id, "running", progress)
+        # ユーザーを先に削除し、削除中に新しいフラッシュカードが追加されないようにする
+        await delete_docs_in_batches("users", [user_id])
+
+        delete_blobs = partial(
+            delete_blobs_concurrently, max_concurrency=BLOB_DELETE_CONCURRENCY
+        )
+        while True:
+            flashcard_ids = await read_flashcard_ids_by_created_by(
+                user_id, DELETE_USER_PAGE_SIZE
+            )
+            if not flashcard_ids:
+                break
+
+            media_urls_by_id = await read_media_file_urls_by_flashcard_ids(
+                flashcard_ids
+            )
+            comparison_ids = await read_comparison_ids_by_flashcard_ids(flashcard_ids)
+
+            # ファイルを先に削除し、参照元のドキュメントが残っている状態で再開できるようにする
+            release = await plan_media_file_release(media_urls_by_id)
+            progress["blobs"] += await apply_media_file_release(release, delete_blobs)
+
+            # フラッシュカードは最後に削除する（残っている限り再開時に再度列挙される）
+            writes = (
+                build_delete_writes("medias", release.media_ids)
+                + build_delete_writes("comparisons", comparison_ids)
+                + build_delete_writes("flashcards", flashcard_ids)
+            )
+            await commit_writes_in_batches(writes)
+            progress["medias"] += len(release.media_ids)
+            progress["comparisons"] += len(comparison_ids)
+            progress["flashcards"] += len(flashcard_ids)
+            await update_job_doc_on_progress(job_id, "running", progress)
+
+        await update_job_doc_on_progress(job_id, "succeeded", progress)
+    except Exception as e:
+        message = e.message if isinstance(e, ServiceException) else str(e)
+        logger.error(
+            "ユーザー削除ジョブが失敗しました", extra={"jobId": job_id, "error": message}
+        )
+        try:
+            await update_job_doc_on_progress(job_id, "failed", progress, message)
+        except ServiceException as se:
+            logger.error(
+                "ジョブの状態を更新できませんでした",
+                extra={"jobId": job_id, "error": se.message},
+            )
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    async def main():
+        # 中断したジョブの再開などに `python -m src.services.delete_user <userId>` で実行する
+        user_id = sys.argv[1]
+        job_id, should_run = await start_delete_user_job(user_id)
+        if should_run:
+            await run_delete_user_job(job_id, user_id)
+        print((await read_job_doc(job_id)).to_json(ensure_ascii=False, indent=2))
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import hashlib
+from typing import Optional
+
+# 条件付きGETで返すレスポンスに付与するキャッシュ制御（毎回ETagで再検証させる）
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """
+    バージョン情報（ドキュメントのupdate_time等）からETagを作成する関数
+    同じ内容を表す限り同じ値になればよいため、弱いETagとして返す
+
+    Args:
+        *parts (object): ETagの元にする値
+
+    Returns:
+        str: ETag（例: W/"3f2a..."）
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def make_payload_etag(content: bytes) -> str:
+    """
+    エンコード済みのレスポンスのハッシュ値からETagを作成する関数
+
+    Args:
+        content (bytes): レスポンスの本文
+
+    Returns:
+        str: ETag
+    """
+    return f'W/"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Matchヘッダーが指定したETagに一致するか判定する関数（弱い比較）
+
+    Args:
+        if_none_match (Optional[str]): If-None-Matchヘッダーの値
+        etag (str): 現在のETag
+
+    Returns:
+        bool: 一致する（304を返してよい）場合はTrue
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
@@ -0,0 +1,296 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator
+
+from src.models.exceptions import ServiceException
+from src.services.deck_archive import (
+    DECK_INDEX_NAME,
+    DECK_MEDIA_DIRECTORY,
+    encode_deck_index,
+    iter_zip_stream,
+    to_columns,
+)
+from src.services.firebase.unit.cloud_storage_image import (
+    extract_blob_name,
+    extract_content_hash,
+    iter_blob_chunks,
+)
+from src.services.firebase.unit.firestore_bulk import read_docs_by_ids
+from src.services.firebase.unit.firestore_user import read_user_doc_stamp
+
+# 索引の各表の列
+FLASHCARD_COLUMNS = (
+    "flashcardId",
+    "word",
+    "meanings",
+    "media",
+    "memo",
+    "checkFlag",
+    "intervalDays",
+    "easeFactor",
+    "repetitions",
+    "dueAt",
+)
+WORD_COLUMNS = ("wordId", "word", "coreMeaning", "explanation", "frequency")
+MEANING_COLUMNS = (
+    "meaningId",
+    "word",
+    "pos",
+    "translation",
+    "pronunciation",
+    "exampleEng",
+    "exampleJpn",
+    "rank",
+)
+MEDIA_COLUMNS = (
+    "mediaId",
+    "meaning",
+    "files",
+    "variants",
+    "generationType",
+    "userPrompt",
+    "generatedPrompt",
+)
+FILE_COLUMNS = ("path", "url")
+
+
+@dataclass(slots=True, frozen=True)
+class DeckExport:
+    # 索引のJSON
+    index: bytes
+    # (アーカイブ内のパス, オブジェクト名) のリスト（内容が同じファイルは1件のみ）
+    files: list[tuple[str, str]]
+
+
+class _FileTable:
+    # メディアURLをファイルの表に登録し、同じ内容のファイルは同じ行を参照させる
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+        self.blobs: list[tuple[str, str]] = []
+        self._rows_by_key: dict[str, int] = {}
+
+    def add(self, url: str) -> int:
+        blob_name = extract_blob_name(url)
+        if blob_name is None:
+            # 他のサイトのURLはファイルを含めず、URLのみを保持する
+            key, path = url, None
+        else:
+            # 内容アドレス形式でない古いURLは、オブジェクト名のハッシュ値で重複を除く
+            content_hash = (
+                extract_content_hash(url)
+                or hashlib.sha256(blob_name.encode("utf-8")).hexdigest()
+            )
+            extension = os.path.splitext(blob_name)[1].lower()
+            path = key = f"{DECK_MEDIA_DIRECTORY}/{content_hash}{extension}"
+        if key not in self._rows_by_key:
+            self._rows_by_key[key] = len(self.rows)
+            self.rows.append({"path": path, "url": url})
+            if path is not None:
+                self.blobs.append((path, blob_name))
+        return self._rows_by_key[key]
+
+
+def _row_indexes(ids: list[str]) -> dict[str, int]:
+    return {doc_id: index for index, doc_id in enumerate(ids)}
+
+
+async def build_deck_export(user_id: str) -> DeckExport:
+    """
+    ユーザーのデッキのエクスポート用の索引と、アーカイブに含めるメディアファイルを求める関数
+    索引は表ごとに列のリストとして持ち、フラッシュカードは単語・意味・メディアを行番号で参照する
+    メディアファイルは内容のハッシュ値で重複を除くため、同じ画像を使うフラッシュカードが複数あっても1件のみ含める
+    フラッシュカードが過去に生成したメディアは含めず、現在のメディアのみを含める
+
+    Args:
+        user_id (str): ユーザーID
+
+    Returns:
+        DeckExport: 索引とメディアファイル
+
+    Raises:
+        ServiceException: ユーザーが存在しない場合、または読み込みに失敗した場合
+    """
+    try:
+        stamp = await read_user_doc_stamp(user_id)
+        if not stamp:
+            raise ServiceException("指定されたユーザーは存在しません", "not_found")
+        _, flashcard_ids = stamp
+
+        flashcard_docs = await read_docs_by_ids(
+            "flashcards",
+            flashcard_ids,
+            [
+                "wordId",
+                "usingMeaningIdList",
+                "currentMediaId",
+                "memo",
+                "checkFlag",
+                "intervalDays",
+                "easeFactor",
+                "repetitions",
+                "dueAt",
+            ],
+        )
+        flashcards = [
+            (fid, flashcard_docs[fid]) for fid in flashcard_ids if fid in flashcard_docs
+        ]
+        word_docs = await read_docs_by_ids(
+            "words",
+            [flashcard["wordId"] for _, flashcard in flashcards],
+            ["word", "coreMeaning", "explanation", "frequency"],
+        )
+        meaning_docs = await read_docs_by_ids(
+            "meanings",
+            [
+                meaning_id
+                for _, flashcard in flashcards
+                for meaning_id in flashcard.get("usingMeaningIdList") or []
+            ],
+            [
+                "pos",
+                "translation",
+                "pronunciation",
+                "exampleEng",
+                "exampleJpn",
+                "rank",
+            ],
+        )
+        media_docs = await read_docs_by_ids(
+            "medias",
+            [flashcard["currentMediaId"] for _, flashcard in flashcards],
+            [
+                "meaningId",
+                "mediaUrls",
+                "mediaVariants",
+                "generationType",
+                "userPrompt",
+                "generatedPrompt",
+            ],
+        )
+        # 単語・メディアが削除されたフラッシュカードは含めない
+        flashcards = [
+            (fid, flashcard)
+            for fid, flashcard in flashcards
+            if flashcard["wordId"] in word_docs
+            and flashcard["currentMediaId"] in media_docs
+        ]
+
+        word_ids = list(dict.fromkeys(flashcard["wordId"] for _, flashcard in flashcards))
+        word_rows = _row_indexes(word_ids)
+        meaning_ids = list(
+            dict.fromkeys(
+                meaning_id
+                for _, flashcard in flashcards
+                for meaning_id in flashcard.get("usingMeaningIdList") or []
+                if meaning_id in meaning_docs
+            )
+        )
+        meaning_rows = _row_indexes(meaning_ids)
+        media_ids = list(
+            dict.fromkeys(flashcard["currentMediaId"] for _, flashcard in flashcards)
+        )
+        media_rows = _row_indexes(media_ids)
+        # 意味のwordIdは単語の作成時のみ設定されるため、フラッシュカードから単語を求める
+        meaning_words = {
+            meaning_id: word_rows[flashcard["wordId"]]
+            for _, flashcard in flashcards
+            for meaning_id in flashcard.get("usingMeaningIdList") or []
+        }
+
+        files = _FileTable()
+        medias = []
+        for media_id in media_ids:
+            media = media_docs[media_id]
+            medias.append(
+                {
+                    "mediaId": media_id,
+                    "meaning": meaning_rows.get(media.get("meaningId")),
+                    "files": [files.add(url) for url in media.get("mediaUrls") or []],
+                    "variants": [
+                        {name: files.add(url) for name, url in variants.items()}
+                        for variants in media.get("mediaVariants") or []
+                    ]
+                    or None,
+                    "generationType": media.get("generationType"),
+                    "userPrompt": media.get("userPrompt"),
+                    "generatedPrompt": media.get("generatedPrompt"),
+                }
+            )
+
+        flashcard_rows = []
+        for flashcard_id, flashcard in flashcards:
+            due_at = flashcard.get("dueAt")
+            flashcard_rows.append(
+                {
+                    "flashcardId": flashcard_id,
+                    "word": word_rows[flashcard["wordId"]],
+                    "meanings": [
+                        meaning_rows[meaning_id]
+                        for meaning_id in flashcard.get("usingMeaningIdList") or []
+                        if meaning_id in meaning_rows
+                    ],
+                    "media": media_rows[flashcard["currentMediaId"]],
+                    "memo": flashcard.get("memo"),
+                    "checkFlag": flashcard.get("checkFlag"),
+                    "intervalDays": flashcard.get("intervalDays"),
+                    "easeFactor": flashcard.get("easeFactor"),
+                    "repetitions": flashcard.get("repetitions"),
+                    "dueAt": due_at.isoformat() if due_at else None,
+                }
+            )
+
+        index = encode_deck_index(
+            {
+                "flashcards": to_columns(flashcard_rows, FLASHCARD_COLUMNS),
+                "words": to_columns(
+                    [{**word_docs[wid], "wordId": wid} for wid in word_ids],
+                    WORD_COLUMNS,
+                ),
+                "meanings": to_columns(
+                    [
+                        {
+                            **meaning_docs[mid],
+                            "meaningId": mid,
+                            "word": meaning_words[mid],
+                        }
+                        for mid in meaning_ids
+                    ],
+                    MEANING_COLUMNS,
+                ),
+                "medias": to_columns(medias, MEDIA_COLUMNS),
+                "files": to_columns(files.rows, FILE_COLUMNS),
+            },
+            datetime.now().isoformat(),
+        )
+        return DeckExport(index=index, files=files.blobs)
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"デッキのエクスポート中にエラーが発生しました: {str(e)}", "general"
+        )
+
+
+def iter_deck_archive(deck_export: DeckExport) -> Iterator[bytes]:
+    """
+    索引とメディアファイルをzip形式で書き込み、書き込んだ分から順に返す関数（同期処理）
+    メディアファイルはCloud Storageからチャンク単位で読み込むため、アーカイブ全体をメモリに保持しない
+    削除されたメディアファイルはアーカイブに含めない（インポート時は元のURLを使う）
+
+    Args:
+        deck_export (DeckExport): build_deck_exportで求めた索引とメディアファイル
+
+    Yields:
+        bytes: zipファイルのデータ
+    """
+    yield from iter_zip_stream(
+        [
+            (DECK_INDEX_NAME, [deck_export.index], True),
+            *[
+                (path, iter_blob_chunks(blob_name), False)
+                for path, blob_name in deck_export.files
+            ],
+        ]
+    )
@@ -5,7 +5,7 @@ from dataclasses_json import LetterCase, dataclass_json
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ComparisonSchema:
     flashcard_id: str
     old_media_id: str
@@ -1,12 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional
 
-from dataclasses_json import LetterCase, dataclass_json
+from dataclasses_json import LetterCase, config, dataclass_json
+
+from src.models.spaced_repetition_constants import INITIAL_EASE_FACTOR
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class FlashcardSchema:
     word_id: str
     using_meaning_id_list: List[str]
@@ -19,19 +21,61 @@ class FlashcardSchema:
     check_flag: bool
     created_at: datetime = None
     updated_at: datetime = None
+    # 復習のスケジュール（SM-2）、dueAtはユーザーごとの復習待ちの並び替えに使う
+    interval_days: int = 0
+    ease_factor: float = INITIAL_EASE_FACTOR
+    repetitions: int = 0
+    due_at: Optional[datetime] = None
+    last_reviewed_at: Optional[datetime] = None
+    # 読み込み時にドキュメントIDを保持する（ドキュメントの本文には書き込まない）
+    flashcard_id: Optional[str] = field(
+        default=None, metadata=config(exclude=lambda _: True)
+    )
 
-@dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
-class FlashcardSchemaWithId:
-    flashcard_id: str
-    word_id: str
-    using_meaning_id_list: List[str]
-    memo: str
-    media_id_list: List[str]
-    current_media_id: str
-    comparison_id: Optional[str]
-    created_by: str
-    version: int
-    check_flag: bool
-    created_at: datetime = None
-    updated_at: datetime = None
\ No newline at end of file
+
+if __name__ == "__main__":
+    import dataclasses
+    import sys
+    import tracemalloc
+
+    # キャッシュに保持するフラッシュカード1件あたりのメモリ使用量を、__dict__を持つ場合と比較する
+    FlashcardSchemaWithDict = dataclasses.make_dataclass(
+        "FlashcardSchemaWithDict",
+        [(f.name, f.type, f) for f in dataclasses.fields(FlashcardSchema)],
+    )
+    count = 10000
+
+    def measure(cls) -> tuple[float, int]:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        entities = [
+            cls(
+                word_id=f"word_{i}",
+                using_meaning_id_list=[f"meaning_{i}"],
+                memo="",
+                media_id_list=[f"media_{i}"],
+                current_media_id=f"media_{i}",
+                comparison_id=None,
+                created_by="default",
+                version=1,
+                check_flag=False,
+                flashcard_id=f"flashcard_{i}",
+            )
+            for i in range(count)
+        ]
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        # 文字列・リストを除いたインスタンス本体（と__dict__）のサイズ
+        instance_size = sys.getsizeof(entities[0]) + (
+            sys.getsizeof(entities[0].__dict__)
+            if hasattr(entities[0], "__dict__")
+            else 0
+        )
+        return used / count, instance_size
+
+    for cls in (FlashcardSchemaWithDict, FlashcardSchema):
+        total, instance = measure(cls)
+        print(
+            f"{cls.__name__:>24}: {total:7.1f} bytes/entity "
+            f"(instance itself: {instance} bytes)"
+        )
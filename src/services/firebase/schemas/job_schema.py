@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from dataclasses_json import LetterCase, dataclass_json
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True)
+class JobSchema:
+    job_type: str
+    target_id: str
+    # pending / running / succeeded / failed
+    status: str
+    # 処理済みの件数（例: {"flashcards": 120, "medias": 340}）
+    progress: Dict[str, int]
+    error: Optional[str] = None
+    created_at: datetime = None
+    updated_at: datetime = None
@@ -1,13 +1,14 @@
 from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 
-from dataclasses_json import LetterCase, dataclass_json
+from dataclasses_json import LetterCase, config, dataclass_json
 
 from src.models.enums import PartOfSpeech, PartOfSpeechField
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class MeaningSchema:
     pos: PartOfSpeech = field(metadata=PartOfSpeechField)
     translation: str
@@ -16,4 +17,8 @@ class MeaningSchema:
     example_jpn: str
     rank: int
     created_at: datetime = None
-    updated_at: datetime = None
\ No newline at end of file
+    updated_at: datetime = None
+    # 単語の作成時に設定する（未設定の場合はドキュメントに書き込まない）
+    word_id: Optional[str] = field(
+        default=None, metadata=config(exclude=lambda value: value is None)
+    )
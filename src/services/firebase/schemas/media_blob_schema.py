@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+
+from dataclasses_json import LetterCase, dataclass_json
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True)
+class MediaBlobSchema:
+    path: str
+    content_type: str
+    size: int
+    media_id_list: List[str]
+    created_at: datetime = None
+    updated_at: datetime = None
@@ -1,12 +1,12 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from dataclasses_json import LetterCase, dataclass_json
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class MediaSchema:
     flashcard_id: str
     meaning_id: Optional[str]
@@ -22,3 +22,5 @@ class MediaSchema:
     created_by: str
     created_at: datetime = None
     updated_at: datetime = None
+    # media_urlsと同じ順序で、各メディアの派生ファイル（サムネイル等）のURLを保持する
+    media_variants: Optional[List[Dict[str, str]]] = None
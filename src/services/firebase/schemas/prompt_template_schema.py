@@ -5,7 +5,7 @@ from dataclasses_json import LetterCase, dataclass_json
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class PromptTemplateSchema:
     generation_type: str
     target: str
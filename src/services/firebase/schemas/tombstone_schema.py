@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from dataclasses_json import LetterCase, dataclass_json
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL)
+@dataclass(slots=True)
+class TombstoneSchema:
+    # 削除されたフラッシュカードを保持していたユーザー
+    user_id: str
+    flashcard_id: str
+    deleted_at: datetime
+    # FirestoreのTTLポリシーで削除される日時（これより古い同期トークンは全件同期に切り替える）
+    expire_at: datetime
@@ -6,11 +6,13 @@ from dataclasses_json import LetterCase, dataclass_json
 
 
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class WordSchema:
     word: str
     meaning_id_list: List[str]
     core_meaning: Optional[str]
     explanation: str
     created_at: datetime = None
-    updated_at: datetime = None
\ No newline at end of file
+    updated_at: datetime = None
+    # WordsAPIの出現頻度（Zipf値、値が大きいほどよく使われる）
+    frequency: Optional[float] = None
\ No newline at end of file
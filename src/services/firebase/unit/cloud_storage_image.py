@@ -1,33 +1,294 @@
+import asyncio
+import hashlib
 import io
+import logging
 import os
-from typing import Union
+import re
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+from urllib.parse import unquote, urlparse
 
-from google.genai import types
+from google.api_core.exceptions import NotFound
 from PIL import Image
 
-from src.config.settings import bucket, genai_client
+from src.config.executors import run_in_media_process, run_in_storage_io
+from src.config.metrics import instrumented, record_bytes
+from src.config.settings import bucket
 from src.models.exceptions import ServiceException
+from src.services.firebase.schemas.media_blob_schema import MediaBlobSchema
+from src.services.firebase.unit.firestore_media_blob import (
+    create_media_blob_doc,
+    update_media_blob_docs_on_lease,
+)
+from src.services.image.image_variants import (
+    IMAGE_VARIANT_CONTENT_TYPE,
+    IMAGE_VARIANT_EXTENSION,
+    IMAGE_VARIANT_SIZES,
+    encode_image_variants,
+)
+from src.services.video.video_previews import extract_video_previews
+
+logger = logging.getLogger(__name__)
+
+# アップロードと同時に公開設定を行うためのACL
+PUBLIC_READ_ACL = "publicRead"
+
+# resumable uploadで一度に送信するチャンクサイズ（256KBの倍数である必要がある）
+RESUMABLE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# メディアは内容のハッシュ値をパスとして保存する（同じパスの内容は変わらない）
+CONTENT_ADDRESSED_PREFIX = "media"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CONTENT_HASH_PATTERN = re.compile(
+    rf"/{CONTENT_ADDRESSED_PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})\.[0-9a-z]+$"
+)
+
+# 公開URLのホスト
+STORAGE_PUBLIC_HOST = "storage.googleapis.com"
+
+# ファイルのハッシュ値を計算する際に一度に読み込むバイト数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _content_address(content_hash: str, extension: str) -> str:
+    return f"{CONTENT_ADDRESSED_PREFIX}/{content_hash[:2]}/{content_hash}.{extension}"
+
+
+def _hash_file(file_path: str) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def extract_content_hash(media_url: str) -> Optional[str]:
+    """
+    メディアURLから内容のハッシュ値を取り出す関数
+
+    Args:
+        media_url (str): メディアの公開URL
+
+    Returns:
+        Optional[str]: ハッシュ値（内容アドレス形式でないURLの場合はNone）
+    """
+    match = CONTENT_HASH_PATTERN.search(media_url)
+    return match.group(1) if match else None
+
+
+def extract_blob_name(media_url: str) -> Optional[str]:
+    """
+    自分たちのバケットの公開URLからオブジェクト名を取り出す関数
+
+    Args:
+        media_url (str): メディアの公開URL
+
+    Returns:
+        Optional[str]: オブジェクト名（他のバケット・サイトのURLの場合はNone）
+    """
+    parsed = urlparse(media_url)
+    prefix = f"/{bucket.name}/"
+    if parsed.netloc == STORAGE_PUBLIC_HOST and parsed.path.startswith(prefix):
+        return unquote(parsed.path[len(prefix) :])
+    return None
+
+
+def collect_content_hashes(
+    media_urls: list[str], media_variants: Optional[list[dict[str, str]]] = None
+) -> list[str]:
+    """
+    メディアURLと派生ファイルURLから、内容のハッシュ値を重複なく取り出す関数
+
+    Args:
+        media_urls (list[str]): メディアURLのリスト
+        media_variants (Optional[list[dict[str, str]]]): 派生ファイルURLの辞書のリスト
+
+    Returns:
+        list[str]: ハッシュ値のリスト
+    """
+    urls = list(media_urls)
+    for variants in media_variants or []:
+        urls.extend(variants.values())
+    content_hashes = []
+    for url in urls:
+        content_hash = extract_content_hash(url)
+        if content_hash and content_hash not in content_hashes:
+            content_hashes.append(content_hash)
+    return content_hashes
+
+
+@instrumented("storage")
+def _upload_bytes(data: bytes, file_name: str, content_type: str) -> str:
+    """
+    バイトデータを公開状態でCloud Storageにアップロードする関数（同期処理）
+    predefined_aclを指定することで、アップロードと公開設定を1回のAPI呼び出しで行う
+
+    Args:
+        data (bytes): アップロードするデータ
+        file_name (str): 保存先のファイル名
+        content_type (str): コンテンツタイプ
+
+    Returns:
+        str: 公開URL
+    """
+    blob = bucket.blob(file_name)
+    blob.cache_control = IMMUTABLE_CACHE_CONTROL
+    blob.upload_from_string(
+        data,
+        content_type=content_type,
+        predefined_acl=PUBLIC_READ_ACL,
+    )
+    logger.debug("uploaded media bytes", extra={"blobName": file_name, "size": len(data)})
+    record_bytes("storage", "_upload_bytes", "sent", len(data))
+    return blob.public_url
+
+
+@instrumented("storage")
+def _upload_file(file_path: str, file_name: str, content_type: str) -> str:
+    """
+    ローカルファイルを公開状態でCloud Storageにアップロードする関数（同期処理）
+    chunk_sizeを指定したresumable uploadで送信するため、ファイル全体をメモリに読み込まない
+
+    Args:
+        file_path (str): アップロードするローカルファイルのパス
+        file_name (str): 保存先のファイル名
+        content_type (str): コンテンツタイプ
+
+    Returns:
+        str: 公開URL
+    """
+    blob = bucket.blob(file_name, chunk_size=RESUMABLE_UPLOAD_CHUNK_SIZE)
+    blob.cache_control = IMMUTABLE_CACHE_CONTROL
+    blob.upload_from_filename(
+        file_path,
+        content_type=content_type,
+        predefined_acl=PUBLIC_READ_ACL,
+    )
+    logger.debug("uploaded media file", extra={"blobName": file_name})
+    record_bytes("storage", "_upload_file", "sent", os.path.getsize(file_path))
+    return blob.public_url
+
+
+@instrumented("storage")
+def _delete_blob(file_name: str) -> bool:
+    blob = bucket.blob(file_name)
+    try:
+        blob.delete()
+        return True
+    except NotFound:
+        return False
+
+
+async def delete_media_blob(_file_name: str) -> bool:
+    """
+    Cloud Storageのオブジェクトを削除する関数
+
+    Args:
+        _file_name (str): 削除するオブジェクト名
+
+    Returns:
+        bool: 削除した場合はTrue、すでに存在しなかった場合はFalse
+
+    Raises:
+        ServiceException: 削除に失敗した場合
+    """
+    try:
+        return await run_in_storage_io(_delete_blob, _file_name)
+    except Exception as e:
+        raise ServiceException(
+            f"Mediaの削除中にエラーが発生しました: {str(e)}", "external_api"
+        )
+
+
+async def _store_content(
+    content_hash: str,
+    size: int,
+    extension: str,
+    content_type: str,
+    upload_func: Callable[[object, str, str], str],
+    source: object,
+) -> str:
+    """
+    内容のハッシュ値をパスとしてメディアを保存する関数
+    同じ内容がすでに保存されている場合はアップロードを省略する
+    再利用したファイルは索引の更新日時を更新し、参照が追加されるまでに削除されないようにする
+
+    Args:
+        content_hash (str): 内容のSHA-256ハッシュ値
+        size (int): バイト数
+        extension (str): 拡張子
+        content_type (str): コンテンツタイプ
+        upload_func (Callable): アップロードに使用する同期関数
+        source (object): upload_funcに渡すデータまたはファイルパス
+
+    Returns:
+        str: 公開URL
+    """
+    path = _content_address(content_hash, extension)
+    if await update_media_blob_docs_on_lease([content_hash]):
+        return bucket.blob(path).public_url
+
+    url = await run_in_storage_io(upload_func, source, path, content_type)
+    now = datetime.now()
+    await create_media_blob_doc(
+        content_hash,
+        MediaBlobSchema(
+            path=path,
+            content_type=content_type,
+            size=size,
+            media_id_list=[],
+            created_at=now,
+            updated_at=now,
+        ),
+    )
+    return url
+
+
+async def _store_bytes(data: bytes, extension: str, content_type: str) -> str:
+    content_hash = hashlib.sha256(data).hexdigest()
+    return await _store_content(
+        content_hash, len(data), extension, content_type, _upload_bytes, data
+    )
+
+
+async def _store_file(file_path: str, extension: str, content_type: str) -> str:
+    content_hash, size = await run_in_storage_io(_hash_file, file_path)
+    return await _store_content(
+        content_hash, size, extension, content_type, _upload_file, file_path
+    )
+
+
+def _encode_image(image: Image.Image) -> Tuple[bytes, str]:
+    image_format = image.format or "PNG"
+    img_byte_arr = io.BytesIO()
+    image.save(img_byte_arr, format=image_format)
+    return img_byte_arr.getvalue(), image_format
 
 
 async def create_image_url_from_image(
     _image: Image.Image,
-    _file_name: str,
 ) -> str:
-    try:
-        img_byte_arr = io.BytesIO()
-        _image.save(img_byte_arr, format=_image.format or "PNG")
-        img_byte_arr = img_byte_arr.getvalue()
+    """
+    画像をCloud Storageに保存してURLを返す関数
+    エンコードはストレージ用スレッドプールで実行される
 
-        blob = bucket.blob(_file_name)
+    Args:
+        _image (Image.Image): 保存する画像
+
+    Returns:
+        str: 画像URL
 
-        blob.upload_from_string(
-            img_byte_arr,
-            content_type=f"image/{_image.format.lower() if _image.format else 'png'}",
+    Raises:
+        ServiceException: 画像のアップロードに失敗した場合
+    """
+    try:
+        data, image_format = await run_in_storage_io(_encode_image, _image)
+        image_url = await _store_bytes(
+            data, image_format.lower(), f"image/{image_format.lower()}"
         )
-        print("File {} uploaded to {}.".format(_file_name, _file_name))
-        blob.make_public()
-        image_url = blob.public_url
-        print("image_url:", image_url)
+        logger.debug("stored image", extra={"url": image_url})
         return image_url
     except Exception as e:
         raise ServiceException(
@@ -35,16 +296,62 @@ async def create_image_url_from_image(
         )
 
 
-async def create_video_url_from_video(
-    _video: Union[types.Video, bytes],
-    _file_name: str,
+async def create_image_urls_with_variants(
+    _image: Image.Image,
+) -> Tuple[str, dict[str, str]]:
+    """
+    画像と派生画像（WebPの等倍・中サイズ・サムネイル）をCloud Storageに保存してURLを返す関数
+    エンコードはプロセスプール、アップロードはストレージ用スレッドプールで並行して実行される
+
+    Args:
+        _image (Image.Image): 保存する画像
+
+    Returns:
+        Tuple[str, dict[str, str]]: 元画像のURLと、派生名をキーとした派生画像URLの辞書
+
+    Raises:
+        ServiceException: 画像のアップロードに失敗した場合
+    """
+    try:
+        original_format = _image.format or "PNG"
+        encoded = await run_in_media_process(
+            encode_image_variants, _image, original_format
+        )
+        variant_names = list(IMAGE_VARIANT_SIZES.keys())
+        urls = await asyncio.gather(
+            _store_bytes(
+                encoded["original"],
+                original_format.lower(),
+                f"image/{original_format.lower()}",
+            ),
+            *[
+                _store_bytes(
+                    encoded[variant_name],
+                    IMAGE_VARIANT_EXTENSION,
+                    IMAGE_VARIANT_CONTENT_TYPE,
+                )
+                for variant_name in variant_names
+            ],
+        )
+        image_url = urls[0]
+        variant_urls = dict(zip(variant_names, urls[1:]))
+        logger.debug("stored image with variants", extra={"url": image_url})
+        return image_url, variant_urls
+    except Exception as e:
+        raise ServiceException(
+            f"Mediaのデータ送信中にエラーが発生しました: {str(e)}", "external_api"
+        )
+
+
+async def create_video_url_from_file(
+    _file_path: str,
 ) -> str:
     """
-    types.Video形式またはbytes形式の動画をCloud Storageに保存してURLを返す関数
+    ローカルに保存された動画ファイルをCloud Storageに保存してURLを返す関数
+    チャンク単位のresumable uploadで送信するため、動画の長さや解像度に関わらずメモリ使用量は一定
 
     Args:
-        _video (Union[types.Video, bytes]): 保存する動画オブジェクトまたはバイトデータ
-        _file_name (str): 保存するファイル名（.mp4拡張子を含む）
+        _file_path (str): アップロードする動画ファイルのパス（.mp4）
 
     Returns:
         str: 動画URL
@@ -53,38 +360,60 @@ async def create_video_url_from_video(
         ServiceException: 動画のアップロードに失敗した場合
     """
     try:
-        # バイト形式の場合はそのまま使用、Video形式の場合はダウンロード
-        if isinstance(_video, bytes):
-            video_data = _video
-        elif isinstance(_video, types.Video):
-            # video_bytesがある場合はそれを使用、ない場合はgenai_clientでダウンロード
-            if _video.video_bytes:
-                video_data = _video.video_bytes
-
-            elif _video.uri:
-                # genai_clientを使用して認証されたダウンロードを実行
-                print(f"Downloading video from: {_video.uri}")
-                video_data = genai_client.files.download(file=_video)
-            else:
-                raise ServiceException(
-                    "動画データまたはURIが見つかりません", "validation"
-                )
-        else:
-            raise ServiceException("サポートされていない動画形式です", "validation")
+        if not os.path.exists(_file_path):
+            raise ServiceException("動画ファイルが見つかりません", "validation")
+        video_url = await _store_file(_file_path, "mp4", "video/mp4")
+        logger.debug("stored video", extra={"url": video_url})
+        return video_url
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"動画のデータ送信中にエラーが発生しました: {str(e)}", "external_api"
+        )
 
-        # Cloud Storageに動画をアップロード
-        blob = bucket.blob(_file_name)
 
-        blob.upload_from_string(
-            video_data,
-            content_type="video/mp4",
+async def create_video_urls_with_previews(
+    _file_path: str,
+) -> Tuple[str, dict[str, str]]:
+    """
+    動画と、そのポスター画像・軽量プレビューをCloud Storageに保存してURLを返す関数
+    ポスター画像とプレビューは動画ファイルと同じディレクトリに生成してからアップロードする
+    生成に失敗した場合でも動画自体のアップロードは行う
+
+    Args:
+        _file_path (str): アップロードする動画ファイルのパス（.mp4）
+
+    Returns:
+        Tuple[str, dict[str, str]]: 動画URLと、"poster"・"preview"をキーとしたURLの辞書
+
+    Raises:
+        ServiceException: 動画のアップロードに失敗した場合
+    """
+    local_base = os.path.splitext(_file_path)[0]
+    poster_path = f"{local_base}_poster.jpg"
+    preview_path = f"{local_base}_preview.webp"
+    try:
+        await run_in_media_process(
+            extract_video_previews, _file_path, poster_path, preview_path
         )
-        print("File {} uploaded to {}.".format(_file_name, _file_name))
-        blob.make_public()
-        video_url = blob.public_url
-        print("video_url:", video_url)
-        return video_url
+        has_previews = True
+    except Exception as e:
+        logger.warning(
+            "ポスター画像・プレビューの生成に失敗しました", extra={"error": str(e)}
+        )
+        has_previews = False
 
+    if not has_previews:
+        return await create_video_url_from_file(_file_path), {}
+
+    try:
+        video_url, poster_url, preview_url = await asyncio.gather(
+            create_video_url_from_file(_file_path),
+            _store_file(poster_path, "jpg", "image/jpeg"),
+            _store_file(preview_path, "webp", "image/webp"),
+        )
+        return video_url, {"poster": poster_url, "preview": preview_url}
     except ServiceException:
         raise  # 再発生
     except Exception as e:
@@ -93,11 +422,75 @@ async def create_video_url_from_video(
         )
 
 
-if __name__ == "__main__":
-    import asyncio
+async def create_media_url_from_file(
+    _file_path: str, _extension: str, _content_type: str
+) -> str:
+    """
+    ローカルのメディアファイルを内容のハッシュ値をパスとしてCloud Storageに保存し、URLを返す関数
+    同じ内容がすでに保存されている場合はアップロードを省略する
+    再利用したファイルは索引の更新日時を更新し、参照が追加されるまでに削除されないようにする
+
+    Args:
+        _file_path (str): アップロードするファイルのパス
+        _extension (str): 拡張子（"."を含まない）
+        _content_type (str): コンテンツタイプ
+
+    Returns:
+        str: メディアURL
+
+    Raises:
+        ServiceException: アップロードに失敗した場合
+    """
+    try:
+        return await _store_file(_file_path, _extension, _content_type)
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイルのデータ送信中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+def public_url_of_blob(blob_name: str) -> str:
+    """
+    オブジェクト名から公開URLを求める関数（APIは呼び出さない）
+
+    Args:
+        blob_name (str): オブジェクト名
 
+    Returns:
+        str: 公開URL
+    """
+    return bucket.blob(blob_name).public_url
+
+
+def iter_blob_chunks(blob_name: str) -> Iterator[bytes]:
+    """
+    Cloud Storageのオブジェクトをチャンク単位で読み込む関数（同期処理）
+    範囲指定でHASH_CHUNK_SIZEずつ取得するため、オブジェクト全体をメモリに読み込まない
+
+    Args:
+        blob_name (str): オブジェクト名
+
+    Yields:
+        bytes: 読み込んだデータ
+
+    Raises:
+        FileNotFoundError: オブジェクトが存在しない場合
+    """
+    try:
+        with bucket.blob(blob_name).open("rb", chunk_size=HASH_CHUNK_SIZE) as reader:
+            for chunk in iter(lambda: reader.read(HASH_CHUNK_SIZE), b""):
+                record_bytes("storage", "iter_blob_chunks", "received", len(chunk))
+                yield chunk
+    except NotFound:
+        raise FileNotFoundError(blob_name)
+
+
+if __name__ == "__main__":
     # スクリプトの場所を基準としたパスを生成
     current_dir = os.path.dirname(os.path.abspath(__file__))
     image_path = os.path.join(current_dir, "sample.png")
     print(f"Loading image from: {image_path}")
-    asyncio.run(create_image_url_from_image(Image.open(image_path), "sample.png"))
+    asyncio.run(create_image_url_from_image(Image.open(image_path)))
@@ -0,0 +1,164 @@
+from typing import AsyncIterator, Literal, Optional, Tuple
+
+from google.cloud.firestore import DocumentReference, DocumentSnapshot
+
+from src.config.metrics import instrumented
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+
+# 1回のWriteBatchに含められる書き込みの上限
+FIRESTORE_BATCH_LIMIT = 500
+
+# in演算子で1回のクエリに指定できる値の上限
+FIRESTORE_IN_QUERY_LIMIT = 30
+
+# ページ単位で読み込む際の既定の件数
+DEFAULT_PAGE_SIZE = 300
+
+WriteOperation = Tuple[
+    Literal["set", "update", "delete"], DocumentReference, Optional[dict]
+]
+
+
+@instrumented("firestore")
+async def stream_collection(
+    collection_name: str,
+    field_paths: Optional[list[str]] = None,
+    filters: Optional[list[Tuple[str, str, object]]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[DocumentSnapshot]:
+    """
+    コレクションをドキュメントID順にページ単位で読み込む関数
+    カーソルで次のページを取得するため、コレクション全体を一度にメモリに載せない
+
+    Args:
+        collection_name (str): コレクション名
+        field_paths (Optional[list[str]]): 取得するフィールド（Noneの場合は全フィールド）
+        filters (Optional[list[Tuple[str, str, object]]]): (フィールド, 演算子, 値) の絞り込み条件
+        page_size (int): 1ページあたりの件数
+
+    Yields:
+        DocumentSnapshot: 読み込んだドキュメント
+    """
+    try:
+        query = db.collection(collection_name)
+        for field_path, op_string, value in filters or []:
+            query = query.where(field_path, op_string, value)
+        if field_paths is not None:
+            query = query.select(field_paths)
+        query = query.order_by("__name__").limit(page_size)
+
+        last_doc = None
+        while True:
+            page_query = query.start_after(last_doc) if last_doc else query
+            docs = page_query.get()
+            for doc in docs:
+                yield doc
+            if len(docs) < page_size:
+                return
+            last_doc = docs[-1]
+    except Exception as e:
+        raise ServiceException(
+            f"{collection_name}の一括読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_docs_by_ids(
+    collection_name: str,
+    doc_ids: list[str],
+    field_paths: Optional[list[str]] = None,
+) -> dict[str, dict]:
+    """
+    ドキュメントIDを指定して1回のリクエストでまとめて読み込む関数
+    in演算子のクエリと異なり件数の上限がなく、重複したIDは1回だけ読み込む
+
+    Args:
+        collection_name (str): コレクション名
+        doc_ids (list[str]): ドキュメントIDのリスト
+        field_paths (Optional[list[str]]): 取得するフィールド（Noneの場合は全フィールド）
+
+    Returns:
+        dict[str, dict]: ドキュメントIDとその内容（存在しないドキュメントは含まない）
+    """
+    try:
+        unique_ids = list(dict.fromkeys(doc_ids))
+        if not unique_ids:
+            return {}
+        collection = db.collection(collection_name)
+        docs = db.get_all(
+            [collection.document(doc_id) for doc_id in unique_ids],
+            field_paths=field_paths,
+        )
+        return {doc.id: doc.to_dict() for doc in docs if doc.exists}
+    except Exception as e:
+        raise ServiceException(
+            f"{collection_name}の一括読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def commit_writes_in_batches(writes: list[WriteOperation]) -> int:
+    """
+    書き込みをFIRESTORE_BATCH_LIMIT件ずつのWriteBatchにまとめてコミットする関数
+    各バッチはアトミックに反映されるが、バッチをまたいだ原子性はない
+
+    Args:
+        writes (list[WriteOperation]): ("set" | "update" | "delete", ドキュメント参照, データ) のリスト
+
+    Returns:
+        int: コミットした書き込みの件数
+    """
+    try:
+        committed = 0
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            chunk = writes[start : start + FIRESTORE_BATCH_LIMIT]
+            for operation, doc_ref, data in chunk:
+                if operation == "set":
+                    batch.set(doc_ref, data)
+                elif operation == "update":
+                    batch.update(doc_ref, data)
+                elif operation == "delete":
+                    batch.delete(doc_ref)
+                else:
+                    raise ServiceException(
+                        f"サポートされていない書き込み種別です: {operation}",
+                        "validation",
+                    )
+            batch.commit()
+            committed += len(chunk)
+        return committed
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"一括書き込み中にエラーが発生しました: {str(e)}", "external_api"
+        )
+
+
+def build_delete_writes(
+    collection_name: str, doc_ids: list[str]
+) -> list[WriteOperation]:
+    """指定したドキュメントを削除する書き込みのリストを作成する"""
+    collection = db.collection(collection_name)
+    return [("delete", collection.document(doc_id), None) for doc_id in doc_ids]
+
+
+@instrumented("firestore")
+async def delete_docs_in_batches(collection_name: str, doc_ids: list[str]) -> int:
+    """
+    指定したドキュメントをWriteBatchでまとめて削除する関数
+
+    Args:
+        collection_name (str): コレクション名
+        doc_ids (list[str]): 削除するドキュメントIDのリスト
+
+    Returns:
+        int: 削除した件数
+    """
+    return await commit_writes_in_batches(
+        build_delete_writes(collection_name, doc_ids)
+    )
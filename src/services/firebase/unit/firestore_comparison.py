@@ -1,11 +1,14 @@
 from datetime import datetime
 from typing import Optional
 
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
 from src.services.firebase.schemas.comparison_schema import ComparisonSchema
+from src.services.firebase.unit.firestore_bulk import FIRESTORE_IN_QUERY_LIMIT
 
 
+@instrumented("firestore")
 async def create_comparison_doc(
     comparison_instance: ComparisonSchema,
 ) -> str:
@@ -19,6 +22,7 @@ async def create_comparison_doc(
         )
 
 
+@instrumented("firestore")
 async def update_comparison_doc(
     comparison_id: str, comparison_instance: ComparisonSchema
 ) -> None:
@@ -31,6 +35,7 @@ async def update_comparison_doc(
         )
 
 
+@instrumented("firestore")
 async def read_comparison_doc(
     comparison_id: str,
 ) -> Optional[ComparisonSchema]:
@@ -46,6 +51,7 @@ async def read_comparison_doc(
         )
 
 
+@instrumented("firestore")
 async def read_comparison_docs(
     comparison_ids: list[str],
 ) -> list[ComparisonSchema]:
@@ -71,6 +77,7 @@ async def read_comparison_docs(
         )
 
 
+@instrumented("firestore")
 async def update_comparison_doc_on_is_selected_new(
     comparison_id: str, is_selected_new: str
 ) -> None:
@@ -82,3 +89,28 @@ async def update_comparison_doc_on_is_selected_new(
         raise ServiceException(
             f"比較データの更新中にエラーが発生しました: {str(e)}", "external_api"
         )
+
+
+@instrumented("firestore")
+async def read_comparison_ids_by_flashcard_ids(flashcard_ids: list[str]) -> list[str]:
+    try:
+        comparison_ids = []
+        # in演算子で指定できる値はFIRESTORE_IN_QUERY_LIMIT件まで
+        for start in range(0, len(flashcard_ids), FIRESTORE_IN_QUERY_LIMIT):
+            docs = (
+                db.collection("comparisons")
+                .where(
+                    "flashcardId",
+                    "in",
+                    flashcard_ids[start : start + FIRESTORE_IN_QUERY_LIMIT],
+                )
+                .select([])
+                .get()
+            )
+            comparison_ids.extend(doc.id for doc in docs)
+        return comparison_ids
+    except Exception as e:
+        raise ServiceException(
+            f"比較データIDの読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
@@ -1,14 +1,18 @@
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
+from google.cloud.firestore import transactional
+
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
-from src.services.firebase.schemas.flashcard_schema import (
-    FlashcardSchema,
-    FlashcardSchemaWithId,
-)
+from src.models.serializer import get_decoder
+from src.models.spaced_repetition_constants import INITIAL_EASE_FACTOR
+from src.services.firebase.schemas.flashcard_schema import FlashcardSchema
+from src.services.firebase.unit.firestore_bulk import FIRESTORE_IN_QUERY_LIMIT
 
 
+@instrumented("firestore")
 async def create_flashcard_doc(
     flashcard_instance: FlashcardSchema,
 ) -> str:
@@ -22,6 +26,7 @@ async def create_flashcard_doc(
         )
 
 
+@instrumented("firestore")
 async def update_flashcard_doc(
     flashcard_id: str, flashcard_instance: FlashcardSchema
 ) -> None:
@@ -34,6 +39,7 @@ async def update_flashcard_doc(
         )
 
 
+@instrumented("firestore")
 async def read_flashcard_doc(
     flashcard_id: str,
 ) -> Optional[FlashcardSchema]:
@@ -41,7 +47,7 @@ async def read_flashcard_doc(
         doc_ref = db.collection("flashcards").document(flashcard_id)
         doc = doc_ref.get()
         if doc.exists:
-            return FlashcardSchema.from_dict(doc.to_dict())
+            return get_decoder(FlashcardSchema)(doc.to_dict())
         raise ServiceException(
             "指定されたフラッシュカードが見つかりません", "not_found"
         )
@@ -54,9 +60,10 @@ async def read_flashcard_doc(
         )
 
 
+@instrumented("firestore")
 async def read_flashcard_docs(
     flashcard_ids: list[str],
-) -> list[FlashcardSchemaWithId]:
+) -> list[FlashcardSchema]:
     try:
         if not flashcard_ids:
             raise ServiceException(
@@ -68,7 +75,7 @@ async def read_flashcard_docs(
         for doc in docs:
             flashcard_instance = doc.to_dict()
             flashcard_instance["flashcard_id"] = doc.id
-            flashcard = FlashcardSchemaWithId.from_dict(flashcard_instance)
+            flashcard = get_decoder(FlashcardSchema)(flashcard_instance)
             flashcards.append(flashcard)
         return flashcards
     except ServiceException:
@@ -80,6 +87,7 @@ async def read_flashcard_docs(
         )
 
 
+@instrumented("firestore")
 async def update_flashcard_doc_on_memo(flashcard_id: str, memo: str) -> None:
     try:
         now = datetime.now()
@@ -92,6 +100,7 @@ async def update_flashcard_doc_on_memo(flashcard_id: str, memo: str) -> None:
         )
 
 
+@instrumented("firestore")
 async def update_flashcard_doc_on_check_flag(
     flashcard_id: str, check_flag: bool
 ) -> None:
@@ -106,6 +115,7 @@ async def update_flashcard_doc_on_check_flag(
         )
 
 
+@instrumented("firestore")
 async def update_flashcard_doc_on_using_meaning_id_list(
     flashcard_id: str, using_meaning_id_list: list[str]
 ) -> None:
@@ -120,6 +130,7 @@ async def update_flashcard_doc_on_using_meaning_id_list(
         )
 
 
+@instrumented("firestore")
 async def update_flashcard_doc_on_comparison_id(
     flashcard_id: str, comparison_id: str
 ) -> None:
@@ -133,6 +144,7 @@ async def update_flashcard_doc_on_comparison_id(
         )
 
 
+@instrumented("firestore")
 async def update_flashcard_doc_on_comparison_id_and_current_media(
     flashcard_id: str, comparison_id: str | None, current_media_id: str
 ) -> None:
@@ -153,6 +165,18 @@ async def update_flashcard_doc_on_comparison_id_and_current_media(
         )
 
 
+def _new_review_fields(now: datetime) -> dict:
+    # コピーしたフラッシュカードは未学習として、すぐに復習待ちに入れる
+    return {
+        "intervalDays": 0,
+        "easeFactor": INITIAL_EASE_FACTOR,
+        "repetitions": 0,
+        "dueAt": now,
+        "lastReviewedAt": None,
+    }
+
+
+@instrumented("firestore")
 async def copy_flashcard_doc(
     flashcard_id: str,
     user_id: str,
@@ -171,6 +195,7 @@ async def copy_flashcard_doc(
             flashcard_instance["createdAt"] = now
             flashcard_instance["updatedAt"] = now
             flashcard_instance["createdBy"] = user_id
+            flashcard_instance.update(_new_review_fields(now))
             new_doc = db.collection("flashcards").add(flashcard_instance)
             return new_doc[1].id
         else:
@@ -187,6 +212,7 @@ async def copy_flashcard_doc(
         )
 
 
+@instrumented("firestore")
 async def copy_flashcard_docs(flashcard_ids: list[str], user_id: str) -> list[str]:
     try:
         now = datetime.now()
@@ -203,6 +229,7 @@ async def copy_flashcard_docs(flashcard_ids: list[str], user_id: str) -> list[st
                 flashcard_instance["createdAt"] = now
                 flashcard_instance["updatedAt"] = now
                 flashcard_instance["createdBy"] = user_id
+                flashcard_instance.update(_new_review_fields(now))
                 new_doc = db.collection("flashcards").add(flashcard_instance)
                 new_flashcard_ids.append(new_doc[1].id)
             else:
@@ -220,9 +247,10 @@ async def copy_flashcard_docs(flashcard_ids: list[str], user_id: str) -> list[st
         )
 
 
+@instrumented("firestore")
 async def read_flashcard_by_word_id(
     word_id: str,
-) -> Optional[FlashcardSchemaWithId]:
+) -> Optional[FlashcardSchema]:
     try:
         docs = (
             db.collection("flashcards")
@@ -237,7 +265,7 @@ async def read_flashcard_by_word_id(
 
         flashcard_instance = docs[0].to_dict()
         flashcard_instance["flashcard_id"] = docs[0].id
-        return FlashcardSchemaWithId.from_dict(flashcard_instance)
+        return get_decoder(FlashcardSchema)(flashcard_instance)
     except ServiceException:
         raise
     except Exception as e:
@@ -245,3 +273,179 @@ async def read_flashcard_by_word_id(
             f"単語IDによるフラッシュカード読み込み中にエラーが発生しました: {str(e)}",
             "external_api",
         )
+
+
+@instrumented("firestore")
+async def read_flashcard_ids_by_created_by(user_id: str, limit: int) -> list[str]:
+    try:
+        docs = (
+            db.collection("flashcards")
+            .where("createdBy", "==", user_id)
+            .select([])
+            .limit(limit)
+            .get()
+        )
+        return [doc.id for doc in docs]
+    except Exception as e:
+        raise ServiceException(
+            f"ユーザーのフラッシュカードIDの読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_flashcard_doc_stamps(flashcard_ids: list[str]) -> dict[str, datetime]:
+    try:
+        if not flashcard_ids:
+            return {}
+        # 更新日時のみが必要なため、取得するフィールドを最小限にする
+        docs = db.get_all(
+            [db.collection("flashcards").document(fid) for fid in flashcard_ids],
+            field_paths=["version"],
+        )
+        return {doc.id: doc.update_time for doc in docs if doc.exists}
+    except Exception as e:
+        raise ServiceException(
+            f"フラッシュカードの更新日時の読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_flashcard_docs_updated_since(
+    user_id: str,
+    until: datetime,
+    after_updated_at: Optional[datetime] = None,
+    after_flashcard_id: Optional[str] = None,
+    limit: int = 500,
+) -> list[FlashcardSchema]:
+    try:
+        # createdBy・updatedAtの複合インデックス（firestore.indexes.json）を使う
+        query = (
+            db.collection("flashcards")
+            .where("createdBy", "==", user_id)
+            .where("updatedAt", "<=", until)
+        )
+        if after_updated_at is not None and after_flashcard_id is None:
+            query = query.where("updatedAt", ">", after_updated_at)
+        query = query.order_by("updatedAt").order_by("__name__")
+        if after_updated_at is not None and after_flashcard_id is not None:
+            # 同じ更新日時のフラッシュカードが複数ある場合も、ドキュメントIDで続きから取得する
+            query = query.start_after(
+                {
+                    "updatedAt": after_updated_at,
+                    "__name__": db.collection("flashcards").document(
+                        after_flashcard_id
+                    ),
+                }
+            )
+        flashcards = []
+        for doc in query.limit(limit).get():
+            flashcard_instance = doc.to_dict()
+            flashcard_instance["flashcard_id"] = doc.id
+            flashcards.append(get_decoder(FlashcardSchema)(flashcard_instance))
+        return flashcards
+    except Exception as e:
+        raise ServiceException(
+            f"更新されたフラッシュカードの読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_default_flashcard_docs_by_word_ids(
+    word_ids: list[str], field_paths: list[str]
+) -> dict[str, tuple[str, dict]]:
+    try:
+        flashcards = {}
+        unique_word_ids = list(dict.fromkeys(word_ids))
+        # in演算子で指定できる値はFIRESTORE_IN_QUERY_LIMIT件まで
+        for start in range(0, len(unique_word_ids), FIRESTORE_IN_QUERY_LIMIT):
+            docs = (
+                db.collection("flashcards")
+                .where("createdBy", "==", "default")
+                .where(
+                    "wordId",
+                    "in",
+                    unique_word_ids[start : start + FIRESTORE_IN_QUERY_LIMIT],
+                )
+                .select(list(dict.fromkeys(["wordId", *field_paths])))
+                .get()
+            )
+            for doc in docs:
+                flashcard = doc.to_dict()
+                flashcards.setdefault(flashcard["wordId"], (doc.id, flashcard))
+        return flashcards
+    except Exception as e:
+        raise ServiceException(
+            f"単語IDによるフラッシュカードの一括読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_due_flashcard_docs(
+    user_id: str,
+    until: datetime,
+    limit: int,
+    after_due_at: Optional[datetime] = None,
+    after_flashcard_id: Optional[str] = None,
+) -> list[FlashcardSchema]:
+    try:
+        # createdBy・dueAtの複合インデックス（firestore.indexes.json）を使う
+        query = (
+            db.collection("flashcards")
+            .where("createdBy", "==", user_id)
+            .where("dueAt", "<=", until)
+            .order_by("dueAt")
+            .order_by("__name__")
+        )
+        if after_due_at is not None and after_flashcard_id is not None:
+            # 同じ復習日時のフラッシュカードが複数ある場合も、ドキュメントIDで続きから取得する
+            query = query.start_after(
+                {
+                    "dueAt": after_due_at,
+                    "__name__": db.collection("flashcards").document(
+                        after_flashcard_id
+                    ),
+                }
+            )
+        flashcards = []
+        for doc in query.limit(limit).get():
+            flashcard_instance = doc.to_dict()
+            flashcard_instance["flashcard_id"] = doc.id
+            flashcards.append(get_decoder(FlashcardSchema)(flashcard_instance))
+        return flashcards
+    except Exception as e:
+        raise ServiceException(
+            f"復習待ちのフラッシュカードの読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def update_flashcard_doc_in_transaction(
+    flashcard_id: str, build_update: Callable[[dict], dict]
+) -> dict:
+    try:
+        doc_ref = db.collection("flashcards").document(flashcard_id)
+
+        @transactional
+        def apply(transaction) -> dict:
+            # 他のリクエストと同時に更新された場合は、最新の内容で再実行される
+            doc = doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                raise ServiceException(
+                    "指定されたフラッシュカードが見つかりません", "not_found"
+                )
+            update = build_update(doc.to_dict())
+            transaction.update(doc_ref, update)
+            return update
+
+        return apply(db.transaction())
+    except ServiceException:
+        raise
+    except Exception as e:
+        raise ServiceException(
+            f"フラッシュカードの更新中にエラーが発生しました: {str(e)}", "external_api"
+        )
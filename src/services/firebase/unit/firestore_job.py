@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+
+from src.config.metrics import instrumented
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+from src.services.firebase.schemas.job_schema import JobSchema
+
+
+@instrumented("firestore")
+async def create_job_doc(job_id: str, job_instance: JobSchema) -> None:
+    try:
+        db.collection("jobs").document(job_id).set(job_instance.to_dict())
+    except Exception as e:
+        raise ServiceException(
+            f"ジョブデータの作成中にエラーが発生しました: {str(e)}", "external_api"
+        )
+
+
+@instrumented("firestore")
+async def read_job_doc(job_id: str) -> Optional[JobSchema]:
+    try:
+        doc = db.collection("jobs").document(job_id).get()
+        if doc.exists:
+            return JobSchema.from_dict(doc.to_dict())
+        return None
+    except Exception as e:
+        raise ServiceException(
+            f"ジョブデータの読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def update_job_doc_on_progress(
+    job_id: str,
+    status: str,
+    progress: dict[str, int],
+    error: Optional[str] = None,
+) -> None:
+    try:
+        db.collection("jobs").document(job_id).update(
+            {
+                "status": status,
+                "progress": progress,
+                "error": error,
+                "updatedAt": datetime.now(),
+            }
+        )
+    except Exception as e:
+        raise ServiceException(
+            f"ジョブデータの更新中にエラーが発生しました: {str(e)}", "external_api"
+        )
@@ -1,11 +1,14 @@
 from typing import Optional
 
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
 from src.models.types import MeaningResponse
 from src.services.firebase.schemas.meaning_schema import MeaningSchema
 
 
+@instrumented("firestore")
 async def create_meaning_doc(
     meaning_instance: MeaningSchema,
 ) -> str:
@@ -19,6 +22,7 @@ async def create_meaning_doc(
         )
 
 
+@instrumented("firestore")
 async def update_meaning_doc(meaning_id: str, meaning_instance: MeaningSchema) -> None:
     try:
         doc_ref = db.collection("meanings").document(meaning_id)
@@ -29,6 +33,7 @@ async def update_meaning_doc(meaning_id: str, meaning_instance: MeaningSchema) -
         )
 
 
+@instrumented("firestore")
 async def read_meaning_doc(
     meaning_id: str,
 ) -> Optional[MeaningSchema]:
@@ -36,7 +41,7 @@ async def read_meaning_doc(
         doc_ref = db.collection("meanings").document(meaning_id)
         doc = doc_ref.get()
         if doc.exists:
-            return MeaningSchema.from_dict(doc.to_dict())
+            return get_decoder(MeaningSchema)(doc.to_dict())
         return None
     except Exception as e:
         raise ServiceException(
@@ -44,6 +49,7 @@ async def read_meaning_doc(
         )
 
 
+@instrumented("firestore")
 async def read_meaning_docs(
     meaning_ids: list[str],
 ) -> list[MeaningResponse]:
@@ -55,7 +61,7 @@ async def read_meaning_docs(
         for doc in docs:
             meaning_instance = doc.to_dict()
             meaning_instance["meaning_id"] = doc.id
-            meanings.append(MeaningResponse.from_dict(meaning_instance))
+            meanings.append(get_decoder(MeaningResponse)(meaning_instance))
         return meanings
     except ServiceException:
         raise  # 再発生
@@ -1,11 +1,16 @@
+from datetime import datetime
 from typing import Optional
 
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
 from src.models.types import MediaResponse
 from src.services.firebase.schemas.media_schema import MediaSchema
+from src.services.firebase.unit.firestore_bulk import FIRESTORE_IN_QUERY_LIMIT
 
 
+@instrumented("firestore")
 async def create_media_doc(
     media_instance: MediaSchema,
 ) -> str:
@@ -19,6 +24,7 @@ async def create_media_doc(
         )
 
 
+@instrumented("firestore")
 async def update_media_doc(media_id: str, media_instance: MediaSchema) -> None:
     try:
         doc_ref = db.collection("medias").document(media_id)
@@ -29,6 +35,7 @@ async def update_media_doc(media_id: str, media_instance: MediaSchema) -> None:
         )
 
 
+@instrumented("firestore")
 async def read_media_doc(
     media_id: str,
 ) -> Optional[MediaResponse]:
@@ -38,7 +45,7 @@ async def read_media_doc(
         if doc.exists:
             media_instance = doc.to_dict()
             media_instance["media_id"] = doc.id
-            return MediaResponse.from_dict(media_instance)
+            return get_decoder(MediaResponse)(media_instance)
         raise ServiceException("指定されたメディアデータが見つかりません", "not_found")
     except ServiceException:
         raise
@@ -49,6 +56,7 @@ async def read_media_doc(
         )
 
 
+@instrumented("firestore")
 async def read_media_docs(
     media_ids: list[str],
 ) -> list[MediaSchema]:
@@ -59,7 +67,7 @@ async def read_media_docs(
         docs = await db.collection("medias").where("__name__", "in", media_ids).get()
         media_list = []
         for doc in docs:
-            media_list.append(MediaSchema.from_dict(doc.to_dict()))
+            media_list.append(get_decoder(MediaSchema)(doc.to_dict()))
         return media_list
     except ServiceException:
         raise
@@ -70,11 +78,67 @@ async def read_media_docs(
         )
 
 
-async def update_media_doc_on_media_urls(media_id: str, media_urls: list[str]) -> None:
+@instrumented("firestore")
+async def update_media_doc_on_media_urls(
+    media_id: str,
+    media_urls: list[str],
+    media_variants: Optional[list[dict[str, str]]] = None,
+) -> None:
     try:
+        now = datetime.now()
         doc_ref = db.collection("medias").document(media_id)
-        doc_ref.update({"mediaUrls": media_urls})
+        doc_ref.update(
+            {"mediaUrls": media_urls, "mediaVariants": media_variants, "updatedAt": now}
+        )
     except Exception as e:
         raise ServiceException(
             f"メディアデータの更新中にエラーが発生しました: {str(e)}", "external_api"
         )
+
+
+def collect_media_file_urls(media: dict) -> list[str]:
+    """メディアドキュメントから本体・派生ファイルのURLをすべて取り出す"""
+    urls = list(media.get("mediaUrls") or [])
+    for variants in media.get("mediaVariants") or []:
+        urls.extend(variants.values())
+    return urls
+
+
+def pick_thumbnail_url(media: dict) -> Optional[str]:
+    """一覧表示用のURL（画像はサムネイル、動画はポスター画像、派生ファイルがなければ元のファイル）"""
+    variants = media.get("mediaVariants") or []
+    first_variants = variants[0] if variants else {}
+    media_urls = media.get("mediaUrls") or []
+    return (
+        first_variants.get("thumbnail")
+        or first_variants.get("poster")
+        or (media_urls[0] if media_urls else None)
+    )
+
+
+@instrumented("firestore")
+async def read_media_file_urls_by_flashcard_ids(
+    flashcard_ids: list[str],
+) -> dict[str, list[str]]:
+    try:
+        media_urls_by_id = {}
+        # in演算子で指定できる値はFIRESTORE_IN_QUERY_LIMIT件まで
+        for start in range(0, len(flashcard_ids), FIRESTORE_IN_QUERY_LIMIT):
+            docs = (
+                db.collection("medias")
+                .where(
+                    "flashcardId",
+                    "in",
+                    flashcard_ids[start : start + FIRESTORE_IN_QUERY_LIMIT],
+                )
+                .select(["mediaUrls", "mediaVariants"])
+                .get()
+            )
+            for doc in docs:
+                media_urls_by_id[doc.id] = collect_media_file_urls(doc.to_dict())
+        return media_urls_by_id
+    except Exception as e:
+        raise ServiceException(
+            f"メディアデータの読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud.firestore import ArrayRemove, ArrayUnion, transactional
+
+from src.config.metrics import instrumented
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+from src.services.firebase.schemas.media_blob_schema import MediaBlobSchema
+from src.services.firebase.unit.firestore_bulk import commit_writes_in_batches
+
+# 重複排除で再利用された（または作成された）ファイルは、この秒数の間は参照がなくても削除しない
+# 再利用してからメディアを作成して参照を追加するまでの間に削除されないようにする
+MEDIA_BLOB_LEASE_SECONDS = 6 * 60 * 60
+
+
+@instrumented("firestore")
+async def create_media_blob_doc(
+    content_hash: str,
+    media_blob_instance: MediaBlobSchema,
+) -> None:
+    try:
+        doc_ref = db.collection("media_blobs").document(content_hash)
+        doc_ref.create(media_blob_instance.to_dict())
+    except AlreadyExists:
+        # 同一内容のメディアが並行してアップロードされた場合は既存のドキュメントを使う
+        return
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の作成中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_media_blob_doc(
+    content_hash: str,
+) -> Optional[MediaBlobSchema]:
+    try:
+        doc_ref = db.collection("media_blobs").document(content_hash)
+        doc = doc_ref.get()
+        if doc.exists:
+            return MediaBlobSchema.from_dict(doc.to_dict())
+        return None
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def update_media_blob_docs_on_lease(content_hashes: list[str]) -> list[str]:
+    try:
+        now = datetime.now()
+        leased = []
+        for content_hash in dict.fromkeys(content_hashes):
+            doc_ref = db.collection("media_blobs").document(content_hash)
+            try:
+                # 存在しないドキュメントの更新は失敗するため、存在確認と更新が1回で行われる
+                doc_ref.update({"updatedAt": now})
+            except NotFound:
+                continue
+            leased.append(content_hash)
+        return leased
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の更新中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def update_media_blob_docs_add_media_id(
+    content_hashes: list[str], media_id: str
+) -> None:
+    try:
+        if not content_hashes:
+            return
+        now = datetime.now()
+        batch = db.batch()
+        for content_hash in set(content_hashes):
+            doc_ref = db.collection("media_blobs").document(content_hash)
+            batch.update(
+                doc_ref, {"mediaIdList": ArrayUnion([media_id]), "updatedAt": now}
+            )
+        batch.commit()
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の更新中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def read_media_blob_docs(
+    content_hashes: list[str],
+) -> dict[str, MediaBlobSchema]:
+    try:
+        if not content_hashes:
+            return {}
+        doc_refs = [
+            db.collection("media_blobs").document(content_hash)
+            for content_hash in set(content_hashes)
+        ]
+        media_blobs = {}
+        for doc in db.get_all(doc_refs):
+            if doc.exists:
+                media_blobs[doc.id] = MediaBlobSchema.from_dict(doc.to_dict())
+        return media_blobs
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の一括読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def update_media_blob_docs_remove_media_ids(
+    content_hashes: list[str], media_ids: list[str]
+) -> None:
+    try:
+        if not content_hashes or not media_ids:
+            return
+        now = datetime.now()
+        writes = [
+            (
+                "update",
+                db.collection("media_blobs").document(content_hash),
+                {"mediaIdList": ArrayRemove(media_ids), "updatedAt": now},
+            )
+            for content_hash in set(content_hashes)
+        ]
+        await commit_writes_in_batches(writes)
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の更新中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
+
+
+@instrumented("firestore")
+async def delete_media_blob_docs_if_unreferenced(
+    content_hashes: list[str], media_ids: list[str]
+) -> list[str]:
+    try:
+        released = set(media_ids)
+        leased_after = datetime.now(timezone.utc) - timedelta(
+            seconds=MEDIA_BLOB_LEASE_SECONDS
+        )
+
+        @transactional
+        def apply(transaction, doc_ref) -> bool:
+            # 読み込み後に参照が追加された場合は、最新の内容で再実行される
+            doc = doc_ref.get(transaction=transaction)
+            if not doc.exists or doc.update_time > leased_after:
+                return False
+            if not set(doc.to_dict().get("mediaIdList") or []) <= released:
+                return False
+            transaction.delete(doc_ref)
+            return True
+
+        deleted = []
+        for content_hash in dict.fromkeys(content_hashes):
+            doc_ref = db.collection("media_blobs").document(content_hash)
+            if apply(db.transaction(), doc_ref):
+                deleted.append(content_hash)
+        return deleted
+    except Exception as e:
+        raise ServiceException(
+            f"メディアファイル索引の削除中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
@@ -1,11 +1,14 @@
 from typing import Optional
 
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
 from src.models.types import TemplatesResponse
 from src.services.firebase.schemas.prompt_template_schema import PromptTemplateSchema
 
 
+@instrumented("firestore")
 async def create_prompt_template_doc(
     template_instance: PromptTemplateSchema,
 ) -> str:
@@ -20,6 +23,7 @@ async def create_prompt_template_doc(
         )
 
 
+@instrumented("firestore")
 async def update_prompt_template_doc(
     template_id: str, template_instance: PromptTemplateSchema
 ) -> None:
@@ -42,6 +46,7 @@ async def update_prompt_template_doc(
         )
 
 
+@instrumented("firestore")
 async def read_prompt_template_doc(
     template_id: str,
 ) -> Optional[PromptTemplateSchema]:
@@ -58,11 +63,12 @@ async def read_prompt_template_doc(
         )
 
 
+@instrumented("firestore")
 async def read_prompt_template_docs() -> list[TemplatesResponse]:
     try:
         docs = db.collection("prompt_templates").get()
         templates = [
-            TemplatesResponse.from_dict({**doc.to_dict(), "template_id": doc.id})
+            get_decoder(TemplatesResponse)({**doc.to_dict(), "template_id": doc.id})
             for doc in docs
         ]
         return templates
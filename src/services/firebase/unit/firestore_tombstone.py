@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from src.config.metrics import instrumented
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+from src.services.firebase.schemas.tombstone_schema import TombstoneSchema
+from src.services.firebase.unit.firestore_bulk import WriteOperation
+
+# 削除の記録を保持する日数
+TOMBSTONE_RETENTION_DAYS = 30
+
+
+def build_tombstone_write(
+    user_id: str, flashcard_id: str, deleted_at: datetime
+) -> WriteOperation:
+    """フラッシュカードの削除と同じバッチで書き込む、削除の記録を作成する"""
+    tombstone_instance = TombstoneSchema(
+        user_id=user_id,
+        flashcard_id=flashcard_id,
+        deleted_at=deleted_at,
+        expire_at=deleted_at + timedelta(days=TOMBSTONE_RETENTION_DAYS),
+    )
+    doc_ref = db.collection("tombstones").document(f"{user_id}_{flashcard_id}")
+    return ("set", doc_ref, tombstone_instance.to_dict())
+
+
+@instrumented("firestore")
+async def read_tombstone_flashcard_ids(
+    user_id: str, since: datetime, until: datetime
+) -> list[str]:
+    try:
+        docs = (
+            db.collection("tombstones")
+            .where("userId", "==", user_id)
+            .where("deletedAt", ">", since)
+            .where("deletedAt", "<=", until)
+            .select(["flashcardId"])
+            .get()
+        )
+        return [doc.to_dict()["flashcardId"] for doc in docs]
+    except Exception as e:
+        raise ServiceException(
+            f"削除の記録の読み込み中にエラーが発生しました: {str(e)}", "external_api"
+        )
@@ -1,10 +1,14 @@
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Tuple
 
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
 from src.services.firebase.schemas.user_schema import UserSchema
 
 
+@instrumented("firestore")
 async def create_user_doc(
     user_id: str,
     user_instance: UserSchema,
@@ -26,6 +30,7 @@ async def create_user_doc(
         )
 
 
+@instrumented("firestore")
 async def update_user_doc(user_id: str, user_instance: UserSchema) -> None:
     try:
         doc_ref = db.collection("users").document(user_id)
@@ -36,12 +41,13 @@ async def update_user_doc(user_id: str, user_instance: UserSchema) -> None:
         )
 
 
+@instrumented("firestore")
 async def read_user_doc(user_id: str) -> Optional[UserSchema]:
     try:
         doc_ref = db.collection("users").document(user_id)
         doc = doc_ref.get()
         if doc.exists:
-            user_instance = UserSchema.from_dict(doc.to_dict())
+            user_instance = get_decoder(UserSchema)(doc.to_dict())
             return user_instance
         return None
     except Exception as e:
@@ -51,6 +57,7 @@ async def read_user_doc(user_id: str) -> Optional[UserSchema]:
         )
 
 
+@instrumented("firestore")
 async def read_user_docs(user_ids: list[str]) -> list[UserSchema]:
     try:
         if not user_ids:
@@ -59,7 +66,7 @@ async def read_user_docs(user_ids: list[str]) -> list[UserSchema]:
         docs = await db.collection("users").where("__name__", "in", user_ids).get()
         users = []
         for doc in docs:
-            users.append(UserSchema.from_dict(doc.to_dict()))
+            users.append(get_decoder(UserSchema)(doc.to_dict()))
         return users
     except ServiceException:
         raise  # 再発生
@@ -70,6 +77,7 @@ async def read_user_docs(user_ids: list[str]) -> list[UserSchema]:
         )
 
 
+@instrumented("firestore")
 async def delete_user_doc(user_id: str) -> None:
     try:
         doc_ref = db.collection("users").document(user_id)
@@ -85,6 +93,7 @@ async def delete_user_doc(user_id: str) -> None:
         )
 
 
+@instrumented("firestore")
 async def update_user_doc_add_using_flashcard(user_id: str, flashcard_id: str) -> None:
     try:
         doc_ref = db.collection("users").document(user_id)
@@ -104,3 +113,22 @@ async def update_user_doc_add_using_flashcard(user_id: str, flashcard_id: str) -
         raise ServiceException(
             f"ユーザーデータの更新中にエラーが発生しました: {str(e)}", "external_api"
         )
+
+
+@instrumented("firestore")
+async def read_user_doc_stamp(user_id: str) -> Optional[Tuple[datetime, list[str]]]:
+    try:
+        # 更新日時とフラッシュカードIDのみを取得し、本文の読み込みを省く
+        docs = db.get_all(
+            [db.collection("users").document(user_id)],
+            field_paths=["flashcardIdList"],
+        )
+        for doc in docs:
+            if doc.exists:
+                return doc.update_time, doc.to_dict().get("flashcardIdList", [])
+        return None
+    except Exception as e:
+        raise ServiceException(
+            f"ユーザーデータの更新日時の読み込み中にエラーが発生しました: {str(e)}",
+            "external_api",
+        )
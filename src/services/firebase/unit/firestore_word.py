@@ -1,17 +1,24 @@
+import logging
 from typing import Optional
 
+from src.config.metrics import instrumented
 from src.config.settings import db
 from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
 from src.services.firebase.schemas.word_schema import WordSchema
 
+logger = logging.getLogger(__name__)
 
+
+@instrumented("firestore")
 async def create_word_doc(
     word_instance: WordSchema,
 ) -> str:
     try:
-        print("word_instance.to_dict():", word_instance.to_dict())
+        word_data = word_instance.to_dict()
+        logger.debug("creating word document", extra={"word": word_data})
         doc_ref = db.collection("words")
-        new_doc = doc_ref.add(word_instance.to_dict())
+        new_doc = doc_ref.add(word_data)
         return new_doc[1].id
     except Exception as e:
         raise ServiceException(
@@ -19,6 +26,7 @@ async def create_word_doc(
         )
 
 
+@instrumented("firestore")
 async def update_word_doc(word_id: str, word_instance: WordSchema) -> None:
     try:
         doc_ref = db.collection("words").document(word_id)
@@ -29,6 +37,7 @@ async def update_word_doc(word_id: str, word_instance: WordSchema) -> None:
         )
 
 
+@instrumented("firestore")
 async def read_word_doc(word_id: str) -> Optional[WordSchema]:
     try:
         doc_ref = db.collection("words").document(word_id)
@@ -36,7 +45,7 @@ async def read_word_doc(word_id: str) -> Optional[WordSchema]:
         if doc.exists:
             word_instance = doc.to_dict()
             word_instance["word_id"] = doc.id
-            return WordSchema.from_dict(word_instance)
+            return get_decoder(WordSchema)(word_instance)
         return None
     except Exception as e:
         raise ServiceException(
@@ -44,6 +53,7 @@ async def read_word_doc(word_id: str) -> Optional[WordSchema]:
         )
 
 
+@instrumented("firestore")
 async def read_word_docs(word_ids: list[str]) -> list[WordSchema]:
     try:
         if not word_ids:
@@ -52,7 +62,7 @@ async def read_word_docs(word_ids: list[str]) -> list[WordSchema]:
         docs = db.collection("words").where("__name__", "in", word_ids).get()
         words = []
         for doc in docs:
-            words.append(WordSchema.from_dict(doc.to_dict()))
+            words.append(get_decoder(WordSchema)(doc.to_dict()))
         return words
     except ServiceException:
         raise  # 再発生
@@ -62,6 +72,7 @@ async def read_word_docs(word_ids: list[str]) -> list[WordSchema]:
         )
 
 
+@instrumented("firestore")
 async def read_word_id_by_word(
     _word: str,
 ) -> Optional[str]:
@@ -80,6 +91,7 @@ async def read_word_id_by_word(
         )
 
 
+@instrumented("firestore")
 async def get_word_id_by_word(
     _word: str,
 ) -> Optional[str]:
@@ -96,3 +108,4 @@ async def get_word_id_by_word(
         raise ServiceException(
             f"単語の読み込み中にエラーが発生しました: {str(e)}", "external_api"
         )
+
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Literal
 
 from src.models.exceptions import ServiceException
@@ -40,13 +41,11 @@ async def generate_and_store_image(
             raise ServiceException("画像の生成に失敗しました", "external_api")
 
         # 生成された画像をFirestorageに保存して、URLを取得
-        image_url_list = []
-        for image in generated_images:
-            image_url = await create_image_url_from_image(
-                image,
-                f"{_word}/{_pos}/{_meaning}/{_flashcard_id}.png",
+        image_url_list = list(
+            await asyncio.gather(
+                *[create_image_url_from_image(image) for image in generated_images]
             )
-            image_url_list.append(image_url)
+        )
 
         return image_url_list
 
@@ -59,8 +58,6 @@ async def generate_and_store_image(
 
 
 if __name__ == "__main__":
-    import asyncio
-
     async def main():
         # テスト用の単語
         test_word = "account"
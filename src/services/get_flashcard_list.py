@@ -1,61 +1,279 @@
-from typing import Optional, Tuple
+from typing import Optional, Union
 
 from src.models.exceptions.service_exception import ServiceException
-from src.models.types import FlashcardResponse, WordResponse
-from src.services.firebase.unit.firestore_flashcard import (
-    read_flashcard_docs,
+from src.models.serializer import get_decoder
+from src.models.types import (
+    FlashcardPage,
+    FlashcardResponse,
+    MediaResponse,
+    MeaningResponse,
+    WordResponse,
 )
-from src.services.firebase.unit.firestore_meaning import read_meaning_docs
-from src.services.firebase.unit.firestore_media import read_media_doc
-from src.services.firebase.unit.firestore_user import read_user_doc
-from src.services.firebase.unit.firestore_word import read_word_doc
+from src.services.etag import make_etag
+from src.services.firebase.unit.firestore_bulk import read_docs_by_ids
+from src.services.firebase.unit.firestore_flashcard import read_flashcard_doc_stamps
+from src.services.firebase.unit.firestore_media import pick_thumbnail_url
+from src.services.firebase.unit.firestore_user import read_user_doc_stamp
 
+# 1ページで取得できるフラッシュカードの上限
+MAX_FLASHCARD_PAGE_SIZE = 200
 
-async def get_flashcard_list(
+# fieldsで指定できるフィールド（flashcardIdは常に含む）
+#   thumbnailはメディアの代わりにサムネイル（動画はポスター画像）のURLのみを返す
+FLASHCARD_LIST_FIELDS = frozenset(
+    {"word", "meanings", "media", "thumbnail", "memo", "version", "checkFlag"}
+)
+
+# 取得するフィールドごとに読み込むフラッシュカードのフィールド
+_FLASHCARD_FIELD_PATHS = {
+    "word": "wordId",
+    "meanings": "usingMeaningIdList",
+    "media": "currentMediaId",
+    "thumbnail": "currentMediaId",
+    "memo": "memo",
+    "version": "version",
+    "checkFlag": "checkFlag",
+}
+
+
+def _encode_cursor(index: int, flashcard_id: str) -> str:
+    # flashcardIdList上の位置とフラッシュカードID（カードが削除されても位置から再開できる）
+    return f"{index}:{flashcard_id}"
+
+
+def _resume_index(after: str, flashcard_id_list: list[str]) -> int:
+    """
+    カーソルから、次のページの先頭のflashcardIdList上の位置を求める関数
+    カーソルのカードが一覧から削除されている場合は、カーソルの位置（後続のカードが詰められた位置）から再開する
+
+    Args:
+        after (str): 前のページのnextCursor（"位置:フラッシュカードID"、またはフラッシュカードID）
+        flashcard_id_list (list[str]): ユーザーのflashcardIdList
+
+    Returns:
+        int: 次のページの先頭の位置
+
+    Raises:
+        ServiceException: カーソルを解釈できない場合
+    """
+    index_text, separator, flashcard_id = after.partition(":")
+    if not separator:
+        # 位置を含まない形式のカーソルは、カードが一覧に残っている場合のみ受け付ける
+        if after not in flashcard_id_list:
+            raise ServiceException("カーソルが無効です", "validation")
+        return flashcard_id_list.index(after) + 1
+    if not index_text.isdigit() or not flashcard_id:
+        raise ServiceException("カーソルが無効です", "validation")
+    index = int(index_text)
+    if index < len(flashcard_id_list) and flashcard_id_list[index] == flashcard_id:
+        return index + 1
+    if flashcard_id in flashcard_id_list:
+        return flashcard_id_list.index(flashcard_id) + 1
+    return min(index, len(flashcard_id_list))
+
+
+def parse_flashcard_list_fields(fields: Optional[str]) -> Optional[frozenset]:
+    """
+    fieldsパラメータ（カンマ区切り）を解析する関数
+
+    Args:
+        fields (Optional[str]): 例: "word,thumbnail"
+
+    Returns:
+        Optional[frozenset]: 取得するフィールド（未指定の場合はNone = 全フィールド）
+
+    Raises:
+        ServiceException: 指定できないフィールドが含まれる場合
+    """
+    if fields is None:
+        return None
+    requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = requested - FLASHCARD_LIST_FIELDS
+    if unknown:
+        raise ServiceException(
+            f"指定できないフィールドです: {', '.join(sorted(unknown))}", "validation"
+        )
+    return requested
+
+
+async def resolve_flashcard_page(
     user_id: str,
-) -> list[FlashcardResponse]:
-    """Flashcardを取得する関数
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[frozenset] = None,
+) -> FlashcardPage:
+    """Flashcard一覧のページとETagを求める関数
+    ユーザーとページ内のFlashcardの更新日時のみから求めるため、単語・意味・メディアの結合より前に
+    変更の有無を判定できる（メディアは作成後に変更されず、切り替え時はFlashcardが更新される）
 
     Args:
         user_id (str): ユーザーのID
+        limit (Optional[int]): 1ページの件数（Noneの場合は残りすべて）
+        after (Optional[str]): 前のページのnextCursor（このカーソルのカードの次から取得する）
+        fields (Optional[frozenset]): 取得するフィールド（Noneの場合は全フィールド）
 
     Returns:
-        list[FlashcardResponse]: 取得したFlashcardのリスト
-        
+        FlashcardPage: ページに含めるフラッシュカードID・次のページのカーソル・ETag
+
     Raises:
-        ServiceException: フラッシュカード取得に失敗した場合
+        ServiceException: ユーザーが見つからない場合、またはlimit・afterを解釈できない場合
     """
     try:
-        user_instance = await read_user_doc(user_id)
-        if not user_instance:
+        if limit is not None and not 1 <= limit <= MAX_FLASHCARD_PAGE_SIZE:
+            raise ServiceException(
+                f"limitは1以上{MAX_FLASHCARD_PAGE_SIZE}以下で指定してください",
+                "validation",
+            )
+        stamp = await read_user_doc_stamp(user_id)
+        if not stamp:
             raise ServiceException("ユーザーが見つかりません", "not_found")
+        user_updated_at, flashcard_id_list = stamp
+
+        start = 0 if after is None else _resume_index(after, flashcard_id_list)
+        end = len(flashcard_id_list) if limit is None else start + limit
+        flashcard_ids = flashcard_id_list[start:end]
+        next_cursor = (
+            _encode_cursor(end - 1, flashcard_ids[-1])
+            if end < len(flashcard_id_list)
+            else None
+        )
+
+        flashcard_stamps = await read_flashcard_doc_stamps(flashcard_ids)
+        etag = make_etag(
+            user_id,
+            user_updated_at,
+            limit,
+            after,
+            ",".join(sorted(fields)) if fields is not None else "*",
+            *[f"{fid}:{flashcard_stamps.get(fid)}" for fid in flashcard_ids],
+        )
+        return FlashcardPage(
+            user_id=user_id,
+            flashcard_ids=flashcard_ids,
+            fields=fields,
+            next_cursor=next_cursor,
+            etag=etag,
+        )
+    except ServiceException:
+        raise
+    except Exception as e:
+        raise ServiceException(
+            f"フラッシュカード一覧のページの取得中に予期せぬエラーが発生しました: {str(e)}", "general"
+        )
+
+
+async def get_flashcard_list(
+    page: FlashcardPage,
+) -> list[Union[FlashcardResponse, dict]]:
+    """Flashcardを取得する関数
+    コレクションごとにまとめて読み込み、指定されたフィールドに必要なコレクション・フィールドのみを取得する
+
+    Args:
+        page (FlashcardPage): resolve_flashcard_pageで求めたページ
+
+    Returns:
+        list[Union[FlashcardResponse, dict]]: 取得したFlashcardのリスト
+            （fieldsを指定した場合はflashcardIdと指定したフィールドのみを持つdict）
+
+    Raises:
+        ServiceException: フラッシュカード取得に失敗した場合
+    """
+    try:
         # 登録単語が0の場合はフロント側で処理（エラーではない）
-        if len(user_instance.flashcard_id_list) == 0:
+        if not page.flashcard_ids:
             return []
-        flashcards = await read_flashcard_docs(user_instance.flashcard_id_list)
+        fields = FLASHCARD_LIST_FIELDS if page.fields is None else page.fields
+        include_media = "media" in fields or "thumbnail" in fields
+
+        flashcard_docs = await read_docs_by_ids(
+            "flashcards",
+            page.flashcard_ids,
+            # フィールドを指定しない場合も、存在確認のため最小限のフィールドを読み込む
+            sorted({_FLASHCARD_FIELD_PATHS[name] for name in fields}) or ["version"],
+        )
+        flashcards = [
+            (fid, flashcard_docs[fid]) for fid in page.flashcard_ids if fid in flashcard_docs
+        ]
         if not flashcards:
             raise ServiceException("このユーザーのフラッシュカードが見つかりません", "not_found")
+
+        words = {}
+        if "word" in fields:
+            words = await read_docs_by_ids(
+                "words",
+                [flashcard["wordId"] for _, flashcard in flashcards],
+                ["word", "coreMeaning", "explanation"],
+            )
+        meanings = {}
+        if "meanings" in fields:
+            meanings = await read_docs_by_ids(
+                "meanings",
+                [
+                    meaning_id
+                    for _, flashcard in flashcards
+                    for meaning_id in flashcard.get("usingMeaningIdList") or []
+                ],
+                ["pos", "translation", "pronunciation", "exampleEng", "exampleJpn"],
+            )
+        medias = {}
+        if include_media:
+            medias = await read_docs_by_ids(
+                "medias",
+                [flashcard["currentMediaId"] for _, flashcard in flashcards],
+                ["meaningId", "mediaUrls", "mediaVariants"]
+                if "media" in fields
+                else ["mediaUrls", "mediaVariants"],
+            )
+
+        decode_meaning = get_decoder(MeaningResponse)
+        decode_media = get_decoder(MediaResponse)
         flashcard_responses = []
-        for flashcard in flashcards:
-            word = await read_word_doc(flashcard.word_id)
-            if not word:
-                raise ServiceException(f"単語ID {flashcard.word_id} が見つかりません", "not_found")
-            word_response = word.to_dict()
-            word_response["wordId"] = flashcard.word_id
-            meanings = await read_meaning_docs(flashcard.using_meaning_id_list)
-            media = await read_media_doc(flashcard.current_media_id)
-            if not media:
-                raise ServiceException(f"メディアID {flashcard.current_media_id} が見つかりません", "not_found")
-            flashcard = FlashcardResponse(
-                flashcard_id=flashcard.flashcard_id,
-                word=WordResponse.from_dict(word_response),
-                meanings=meanings,
-                media=media,
-                memo=flashcard.memo,
-                version=flashcard.version,
-                check_flag=flashcard.check_flag,
+        for flashcard_id, flashcard in flashcards:
+            item = {"flashcardId": flashcard_id}
+            if "word" in fields:
+                word = words.get(flashcard["wordId"])
+                if not word:
+                    raise ServiceException(f"単語ID {flashcard['wordId']} が見つかりません", "not_found")
+                item["word"] = WordResponse(
+                    word_id=flashcard["wordId"],
+                    word=word.get("word"),
+                    core_meaning=word.get("coreMeaning"),
+                    explanation=word.get("explanation"),
+                )
+            if "meanings" in fields:
+                item["meanings"] = [
+                    decode_meaning({**meanings[meaning_id], "meaningId": meaning_id})
+                    for meaning_id in flashcard.get("usingMeaningIdList") or []
+                    if meaning_id in meanings
+                ]
+            if include_media:
+                media = medias.get(flashcard["currentMediaId"])
+                if not media:
+                    raise ServiceException(f"メディアID {flashcard['currentMediaId']} が見つかりません", "not_found")
+                if "media" in fields:
+                    item["media"] = decode_media(
+                        {**media, "mediaId": flashcard["currentMediaId"]}
+                    )
+                if "thumbnail" in fields:
+                    item["thumbnailUrl"] = pick_thumbnail_url(media)
+            for name in ("memo", "version", "checkFlag"):
+                if name in fields:
+                    item[name] = flashcard.get(name)
+
+            if page.fields is not None:
+                flashcard_responses.append(item)
+                continue
+            flashcard_responses.append(
+                FlashcardResponse(
+                    flashcard_id=flashcard_id,
+                    word=item["word"],
+                    meanings=item["meanings"],
+                    media=item["media"],
+                    memo=item["memo"],
+                    version=item["version"],
+                    check_flag=item["checkFlag"] or False,
+                )
             )
-            flashcard_responses.append(flashcard)
         return flashcard_responses
     except ServiceException:
         raise
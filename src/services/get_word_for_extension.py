@@ -5,13 +5,20 @@ from src.services.firebase.unit.firestore_flashcard import (
 )
 from src.services.firebase.unit.firestore_meaning import read_meaning_docs
 from src.services.firebase.unit.firestore_media import read_media_doc
-from src.services.firebase.unit.firestore_word import get_word_id_by_word, read_word_doc
+from src.services.firebase.unit.firestore_word import (
+    read_word_doc,
+    read_word_id_by_word,
+)
+from src.services.word_index import resolve_word
 
 
 async def get_word_for_extension(
     word: str,
 ) -> WordForExtensionResponse:
     """拡張機能用の単語情報を取得する関数
+    大文字・記号・変化形（例: "Running", "ran"）は登録済みの原形の単語に解決する
+    解決できない単語（"ice cream"などの正規化できない表記、他のインスタンスで追加された直後の単語）は
+    Firestoreで完全一致する単語を探す
 
     Args:
         word (str): 検索する単語
@@ -23,7 +30,8 @@ async def get_word_for_extension(
         ServiceException: 単語が見つからない場合、または処理に失敗した場合
     """
     try:
-        word_id = await get_word_id_by_word(word)
+        resolved = await resolve_word(word)
+        word_id = resolved[1] if resolved else await read_word_id_by_word(word)
         if not word_id:
             raise ServiceException("指定された単語が見つかりません", "not_found")
 
@@ -33,8 +41,6 @@ async def get_word_for_extension(
         word = await read_word_doc(word_id)
         if not word:
             raise ServiceException("指定された単語が見つかりません", "not_found")
-        word_response = word.to_dict()
-        word_response["wordId"] = flashcard.word_id
         meanings = await read_meaning_docs(flashcard.using_meaning_id_list)
         media = await read_media_doc(flashcard.current_media_id)
         if not media:
@@ -42,7 +48,12 @@ async def get_word_for_extension(
         word_for_extension_response = WordForExtensionResponse(
             message="setup word for extension successfully",
             flashcard_id=flashcard.flashcard_id,
-            word=WordResponse.from_dict(word_response),
+            word=WordResponse(
+                word_id=flashcard.word_id,
+                word=word.word,
+                core_meaning=word.core_meaning,
+                explanation=word.explanation,
+            ),
             meanings=meanings,
             media=media,
         )
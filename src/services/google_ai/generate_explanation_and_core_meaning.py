@@ -1,4 +1,5 @@
 import json
+import logging
 from datetime import datetime
 from pathlib import Path
 
@@ -6,6 +7,8 @@ from src.models.types import ExplanationByGemini
 from src.services.firebase.schemas.word_schema import WordSchema
 from src.services.google_ai.unit.request_gemini import request_gemini_json
 
+logger = logging.getLogger(__name__)
+
 
 def datetime_handler(obj):
     if isinstance(obj, datetime):
@@ -30,7 +33,7 @@ def generate_explanation_and_core_meaning(_word: str, _content: str) -> WordSche
         )
         return result
     except Exception as e:
-        print(e)
+        logger.error("解説文・コアミーニングの生成エラー", extra={"error": str(e)})
         raise ValueError("解説の生成に失敗しました") from e
 
 
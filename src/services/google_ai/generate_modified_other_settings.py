@@ -1,10 +1,13 @@
 import json
+import logging
 from datetime import datetime
 from pathlib import Path
 
 from src.models.types import ModifiedOtherSettingsByGemini
 from src.services.google_ai.unit.request_gemini import request_gemini_json
 
+logger = logging.getLogger(__name__)
+
 
 def datetime_handler(obj):
     if isinstance(obj, datetime):
@@ -52,7 +55,7 @@ def generate_modified_other_settings(
         )
         return result
     except Exception as e:
-        print(e)
+        logger.error("その他の設定の生成エラー", extra={"error": str(e)})
         raise ValueError("画像生成用プロンプトの生成に失敗しました") from e
 
 
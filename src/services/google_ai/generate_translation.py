@@ -1,4 +1,5 @@
 import json
+import logging
 from datetime import datetime
 from pathlib import Path
 
@@ -6,6 +7,8 @@ from src.models.types import PartOfSpeech, TranslationByGemini
 from src.services.firebase.schemas.meaning_schema import MeaningSchema
 from src.services.google_ai.unit.request_gemini import request_gemini_json
 
+logger = logging.getLogger(__name__)
+
 
 def datetime_handler(obj):
     if isinstance(obj, datetime):
@@ -42,8 +45,9 @@ def generate_translation(_content: str) -> list[MeaningSchema]:
         result.sort(key=lambda x: x.rank)
         return result
     except Exception as e:
-        print(f"翻訳生成エラー: {e}")
-        print(f"エラータイプ: {type(e).__name__}")
+        logger.error(
+            "翻訳生成エラー", extra={"error": str(e), "errorType": type(e).__name__}
+        )
         raise ValueError("翻訳の生成に失敗しました") from e
 
 
@@ -1,11 +1,16 @@
+import logging
 from typing import Tuple
 
 from pydantic import BaseModel
 
+from src.config.metrics import instrumented, record_tokens
 from src.config.settings import GOOGLE_GEMINI_MODEL, genai_client
 from src.models.types import TokenInfo
 
+logger = logging.getLogger(__name__)
 
+
+@instrumented("gemini")
 def request_gemini_json(
     _contents: str, _schema: BaseModel
 ) -> Tuple[BaseModel, TokenInfo]:
@@ -23,13 +28,21 @@ def request_gemini_json(
             candidates_token_count=response.usage_metadata.candidates_token_count,
             total_token_count=response.usage_metadata.total_token_count,
         )
+        record_tokens(
+            GOOGLE_GEMINI_MODEL,
+            token_info.prompt_token_count,
+            token_info.candidates_token_count,
+        )
         return response.parsed, token_info
     except Exception as e:
-        print(f"Gemini API リクエストエラー: {e}")
-        print(f"エラータイプ: {type(e).__name__}")
+        logger.error(
+            "Gemini API リクエストエラー",
+            extra={"error": str(e), "errorType": type(e).__name__},
+        )
         return None, None
 
 
+@instrumented("gemini")
 def request_gemini_text(_contents: str) -> None:
     """
     args:
@@ -39,9 +52,9 @@ def request_gemini_text(_contents: str) -> None:
         response = genai_client.models.generate_content(
             model=GOOGLE_GEMINI_MODEL, contents=_contents
         )
-        print(response.text)
+        logger.info("Gemini API response", extra={"text": response.text})
     except Exception as e:
-        print(f"エラーが発生しました: {e}")
+        logger.error("Gemini API リクエストエラー", extra={"error": str(e)})
         return None
 
 
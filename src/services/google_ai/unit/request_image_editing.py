@@ -1,27 +1,40 @@
+import logging
 from io import BytesIO
 
 from google.genai import types
 from PIL import Image
 
+from src.config.metrics import instrumented, record_bytes
 from src.config.settings import GOOGLE_GEMINI_IMAGE_EDITING_MODEL, genai_client
 
+logger = logging.getLogger(__name__)
 
+
+@instrumented("gemini")
 def request_gemini_image_to_image(
     _prompt: str,
-    _image: Image.Image,
+    _image_bytes: bytes,
+    _mime_type: str,
 ) -> Image.Image:
     """
     args:
         _prompt (str): 画像生成用プロンプト
+        _image_bytes (bytes): 入力画像のバイトデータ（PNGまたはJPEG）
+        _mime_type (str): 入力画像のMIMEタイプ
     returns:
         Image.Image: 生成された画像
     raises:
         Exception: APIリクエスト中にエラーが発生した場合
     """
     try:
+        # 取得・検証・変換済みのバイトデータをそのまま渡す（画像のデコード・再エンコードは行わない）
+        image_part = types.Part.from_bytes(data=_image_bytes, mime_type=_mime_type)
+        record_bytes(
+            "gemini", "request_gemini_image_to_image", "sent", len(_image_bytes)
+        )
         response = genai_client.models.generate_content(
             model=GOOGLE_GEMINI_IMAGE_EDITING_MODEL,
-            contents=[_prompt, _image],
+            contents=[_prompt, image_part],
             config=types.GenerateContentConfig(response_modalities=["TEXT", "IMAGE"]),
         )
 
@@ -38,19 +51,32 @@ def request_gemini_image_to_image(
             if hasattr(candidate, "content") and hasattr(candidate.content, "parts"):
                 has_text_description = False
                 for i, part in enumerate(candidate.content.parts):
-                    print(
-                        f"Part {i}: inline_data = {part.inline_data is not None}, text = {part.text is not None}"
+                    logger.debug(
+                        "image editing response part",
+                        extra={
+                            "index": i,
+                            "hasInlineData": part.inline_data is not None,
+                            "hasText": part.text is not None,
+                        },
                     )
                     if part.text is not None:
                         has_text_description = True
                     elif part.inline_data is not None:
+                        record_bytes(
+                            "gemini",
+                            "request_gemini_image_to_image",
+                            "received",
+                            len(part.inline_data.data),
+                        )
                         try:
                             image = Image.open(BytesIO(part.inline_data.data))
                             # テキスト説明がある場合のみ、その後の画像を生成画像として扱う
                             if has_text_description:
                                 images.append(image)
                         except Exception as img_error:
-                            print(f"  画像の読み込みエラー: {img_error}")
+                            logger.warning(
+                                "画像の読み込みエラー", extra={"error": str(img_error)}
+                            )
 
         if not images:
             raise Exception(
@@ -60,7 +86,7 @@ def request_gemini_image_to_image(
         # 最後の画像（最新の生成画像）を返す
         return images[-1]
     except Exception as e:
-        print(f"エラーの詳細: {str(e)}")
+        logger.error("画像生成中にエラーが発生しました", extra={"error": str(e)})
         raise Exception(f"画像生成中にエラーが発生しました: {str(e)}")
 
 
@@ -71,7 +97,9 @@ if __name__ == "__main__":
         original_image = Image.open("src/services/google_ai/unit/image.png")
         print(f"元画像サイズ: {original_image.size}")
 
-        edited_image = request_gemini_image_to_image(prompt, original_image)
+        with open("src/services/google_ai/unit/image.png", "rb") as f:
+            image_bytes = f.read()
+        edited_image = request_gemini_image_to_image(prompt, image_bytes, "image/png")
 
         # 結果画像を保存（デバッグ用）
         edited_image.save("src/services/google_ai/unit/result_image.png")
@@ -1,12 +1,17 @@
+import logging
 from io import BytesIO
 from typing import Literal
 
 from google.genai import types
 from PIL import Image
 
+from src.config.metrics import instrumented, record_bytes
 from src.config.settings import GOOGLE_IMAGEN_MODEL, genai_client
 
+logger = logging.getLogger(__name__)
 
+
+@instrumented("imagen")
 def request_imagen_text_to_image(
     _prompt: str,
     _number_of_images: int,
@@ -23,8 +28,13 @@ def request_imagen_text_to_image(
         Exception: APIリクエスト中にエラーが発生した場合
     """
     try:
-        print(
-            f"APIリクエスト開始: プロンプト={_prompt}, 画像数={_number_of_images}, アスペクト比={_aspect_ratio}"
+        logger.info(
+            "image generation started",
+            extra={
+                "prompt": _prompt,
+                "numberOfImages": _number_of_images,
+                "aspectRatio": _aspect_ratio,
+            },
         )
 
         response = genai_client.models.generate_images(
@@ -53,11 +63,15 @@ def request_imagen_text_to_image(
 
         images = []
         for generated_image in response.generated_images:
-            image = Image.open(BytesIO(generated_image.image.image_bytes))
+            image_bytes = generated_image.image.image_bytes
+            record_bytes(
+                "imagen", "request_imagen_text_to_image", "received", len(image_bytes)
+            )
+            image = Image.open(BytesIO(image_bytes))
             images.append(image)
         return images
     except Exception as e:
-        print(f"エラーの詳細: {str(e)}")
+        logger.error("画像生成中にエラーが発生しました", extra={"error": str(e)})
         raise Exception(
             f"画像生成中にエラーが発生しました: {str(e)}\nプロンプト: {_prompt}"
         )
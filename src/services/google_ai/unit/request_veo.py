@@ -1,14 +1,16 @@
+import logging
 import time
-from io import BytesIO
 from typing import Literal
 
-import requests
 from google.genai import types
-from PIL import Image
 
+from src.config.metrics import instrumented, record_bytes
 from src.config.settings import GOOGLE_VEO_MODEL, genai_client
 
+logger = logging.getLogger(__name__)
 
+
+@instrumented("veo")
 def request_text_to_video(
     _prompt: str,
     _person_generation: Literal["DONT_ALLOW", "ALLOW_ALL"],
@@ -43,23 +45,26 @@ def request_text_to_video(
         video_objects = []
         for n, generated_video in enumerate(operation.response.generated_videos):
             video_objects.append(generated_video.video)
-        print("video_objects：", video_objects)
+        logger.info("video generated", extra={"videoCount": len(video_objects)})
         return video_objects[0]
 
     except Exception as e:
-        print(f"エラーの詳細: {str(e)}")
+        logger.error("動画生成中にエラーが発生しました", extra={"error": str(e)})
         raise Exception(f"動画生成中にエラーが発生しました: {str(e)}")
 
 
+@instrumented("veo")
 def request_image_to_video(
     _prompt: str,
-    _image_url: str,
+    _image_bytes: bytes,
+    _mime_type: str,
     _person_generation: Literal["DONT_ALLOW", "ALLOW_ALL"],
 ) -> types.Video:
     """
     args:
         _prompt (str): 画像生成用プロンプト
-        image_url (str): 画像のURL
+        _image_bytes (bytes): 入力画像のバイトデータ（PNGまたはJPEG）
+        _mime_type (str): 入力画像のMIMEタイプ
         _person_generation (Literal): 人物生成の許可設定
     returns:
         types.Video: 生成された動画オブジェクト
@@ -67,57 +72,10 @@ def request_image_to_video(
         Exception: APIリクエスト中にエラーが発生した場合
     """
     try:
-        # URLから画像を取得してImage.Imageオブジェクトに変換
-        print(f"画像URLにアクセス中: {_image_url}")
-        response = requests.get(_image_url)
-        response.raise_for_status()
-
-        print("HTTPレスポンス情報:")
-        print(f"  ステータスコード: {response.status_code}")
-        print(f"  コンテンツサイズ: {len(response.content)} bytes")
-        print(f"  コンテンツタイプ: {response.headers.get('content-type', 'unknown')}")
-
-        if len(response.content) == 0:
-            raise Exception("取得した画像データが空です")
-
-        # 画像をロード
-        image_bytes = BytesIO(response.content)
-        image = Image.open(image_bytes)
-
-        print("画像情報:")
-        print(f"  サイズ: {image.size}")
-        print(f"  モード: {image.mode}")
-        print(f"  フォーマット: {image.format}")
-
-        # 画像が有効かテスト
-        try:
-            image.verify()
-            # verify後は画像が使えなくなるので再ロード
-            image_bytes.seek(0)
-            image = Image.open(image_bytes)
-            print("画像の検証: 成功")
-        except Exception as verify_error:
-            print(f"画像の検証エラー: {verify_error}")
-            raise Exception(f"無効な画像ファイルです: {verify_error}")
-
-        # RGBモードに変換（APIが要求する可能性があるため）
-        if image.mode != "RGB":
-            print(f"画像を{image.mode}からRGBに変換中...")
-            image = image.convert("RGB")
-            print("RGB変換完了")
-
-        # Google AI APIに適した形式で画像を準備
-        # 画像をバイト形式で再保存（APIが期待する形式）
-        img_byte_arr = BytesIO()
-        image.save(img_byte_arr, format="PNG")
-        img_byte_arr.seek(0)
-
-        # types.Imageオブジェクトを作成
-        image_part = types.Image(
-            image_bytes=img_byte_arr.getvalue(), mime_type="image/png"
-        )
-        print("API用画像オブジェクト作成完了")
-        print(f"画像バイトサイズ: {len(img_byte_arr.getvalue())} bytes")
+        # types.Imageオブジェクトを作成（取得・検証・変換は入力メディアローダーで実施済み）
+        image_part = types.Image(image_bytes=_image_bytes, mime_type=_mime_type)
+        logger.debug("input image prepared", extra={"size": len(_image_bytes)})
+        record_bytes("veo", "request_image_to_video", "sent", len(_image_bytes))
 
         operation = genai_client.models.generate_videos(
             model=GOOGLE_VEO_MODEL,
@@ -131,18 +89,22 @@ def request_image_to_video(
             ),
         )
 
-        print(f"Operation作成完了: {operation}")
-        print(f"Operation done状態: {operation.done}")
-        print(f"Operation name: {getattr(operation, 'name', 'なし')}")
+        logger.info(
+            "video generation started",
+            extra={"operation": getattr(operation, "name", None)},
+        )
 
         # 動画生成の進行状況をポーリング
         while not operation.done:
             time.sleep(20)
             operation = genai_client.operations.get(operation)
-            print(f"更新されたOperation done状態: {operation.done}")
-
-        print("動画生成完了!")
-        print(f"Operation response: {operation.response}")
+            logger.debug(
+                "video generation polled",
+                extra={
+                    "operation": getattr(operation, "name", None),
+                    "done": operation.done,
+                },
+            )
 
         # responseがNoneでないことを確認
         if operation.response is None:
@@ -156,7 +118,10 @@ def request_image_to_video(
 
         # 安全性フィルタリングのチェック
         if generated_videos is None:
-            print("operation.response", operation.response)
+            logger.debug(
+                "video generation returned no videos",
+                extra={"response": operation.response},
+            )
 
             # RAI (Responsible AI) フィルタリングの確認
             rai_filtered_count = getattr(
@@ -168,10 +133,10 @@ def request_image_to_video(
 
             if rai_filtered_count > 0:
                 reasons_text = ", ".join(rai_filtered_reasons)
-                print(
-                    f"安全性フィルタリング: {rai_filtered_count}個の動画がブロックされました"
+                logger.warning(
+                    "安全性フィルタリングにより動画がブロックされました",
+                    extra={"filteredCount": rai_filtered_count, "reasons": reasons_text},
                 )
-                print(f"理由: {reasons_text}")
 
                 # より詳細なエラーメッセージを提供
                 if "people/face generation" in reasons_text.lower():
@@ -188,27 +153,28 @@ def request_image_to_video(
             else:
                 raise Exception("generated_videosがNoneです（理由不明）")
 
-        print(
-            f"Generated videos count: {len(generated_videos) if generated_videos else 0}"
-        )
-
         # 動画をダウンロードして保存
         video_objects = []
         for n, generated_video in enumerate(generated_videos):
-            print(f"Video {n}: {generated_video}")
             if hasattr(generated_video, "video") and generated_video.video is not None:
                 video_objects.append(generated_video.video)
             else:
-                print(f"Warning: Video {n} has no video attribute or is None")
+                logger.warning("generated video is empty", extra={"index": n})
 
         if not video_objects:
             raise Exception("有効な動画オブジェクトが見つかりませんでした")
 
-        print("video_objects：", video_objects)
+        logger.info(
+            "video generated",
+            extra={
+                "videoCount": len(video_objects),
+                "generatedCount": len(generated_videos),
+            },
+        )
         return video_objects[0]
 
     except Exception as e:
-        print(f"エラーの詳細: {str(e)}")
+        logger.error("動画生成中にエラーが発生しました", extra={"error": str(e)})
         raise Exception(f"動画生成中にエラーが発生しました: {str(e)}")
 
 
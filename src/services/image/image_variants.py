@@ -0,0 +1,54 @@
+import io
+from typing import Optional
+
+from PIL import Image
+
+# 派生画像の名前と長辺の最大ピクセル数（Noneは元のサイズのまま）
+IMAGE_VARIANT_SIZES: dict[str, Optional[int]] = {
+    "full": None,
+    "medium": 512,
+    "thumbnail": 192,
+}
+
+# 派生画像のエンコード設定
+IMAGE_VARIANT_FORMAT = "WEBP"
+IMAGE_VARIANT_CONTENT_TYPE = "image/webp"
+IMAGE_VARIANT_EXTENSION = "webp"
+IMAGE_VARIANT_QUALITY = 80
+
+
+def encode_image_variants(image: Image.Image, original_format: str) -> dict[str, bytes]:
+    """
+    元画像と派生画像をエンコードする関数
+    プロセスプール上で実行されることを想定し、設定値以外のモジュールには依存しない
+    （pickleされた画像はformat属性を失うため、元の形式は引数で受け取る）
+
+    Args:
+        image (Image.Image): 元画像
+        original_format (str): 元画像の保存形式（例: "PNG"）
+
+    Returns:
+        dict[str, bytes]: "original"（元の形式）とIMAGE_VARIANT_SIZESの各名前をキーとしたエンコード済みデータ
+    """
+    encoded = {}
+
+    original_buffer = io.BytesIO()
+    image.save(original_buffer, format=original_format)
+    encoded["original"] = original_buffer.getvalue()
+
+    base_image = image if image.mode in ("RGB", "RGBA") else image.convert("RGBA")
+    for variant_name, max_size in IMAGE_VARIANT_SIZES.items():
+        variant_image = base_image
+        if max_size is not None and max(base_image.size) > max_size:
+            variant_image = base_image.copy()
+            variant_image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        variant_image.save(
+            buffer,
+            format=IMAGE_VARIANT_FORMAT,
+            quality=IMAGE_VARIANT_QUALITY,
+            method=4,
+        )
+        encoded[variant_name] = buffer.getvalue()
+
+    return encoded
@@ -0,0 +1,49 @@
+import io
+from typing import Tuple
+
+from PIL import Image
+
+# 画像生成APIにそのまま渡せる形式とMIMEタイプ
+ACCEPTABLE_IMAGE_FORMATS = {"PNG": "image/png", "JPEG": "image/jpeg"}
+ACCEPTABLE_IMAGE_MODES = ("RGB", "L")
+
+
+def decode_input_image(data: bytes) -> Tuple[bytes, str]:
+    """
+    入力画像を検証し、APIに渡せる形式のバイトデータを用意する関数
+    すでにPNG/JPEGかつRGB（またはグレースケール）の場合は再エンコードせず元のデータを使う
+    プロセスプール上で実行されることを想定し、設定値以外のモジュールには依存しない
+
+    Args:
+        data (bytes): 取得した画像のバイトデータ
+
+    Returns:
+        Tuple[bytes, str]: APIに渡すバイトデータとMIMEタイプ
+
+    Raises:
+        ValueError: 画像として読み込めない場合
+    """
+    if len(data) == 0:
+        raise ValueError("取得した画像データが空です")
+
+    try:
+        # verify後の画像は使えなくなるため、検証と読み込みで別々に開く
+        Image.open(io.BytesIO(data)).verify()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"無効な画像ファイルです: {e}")
+
+    image_format = image.format
+    if (
+        image_format in ACCEPTABLE_IMAGE_FORMATS
+        and image.mode in ACCEPTABLE_IMAGE_MODES
+    ):
+        return data, ACCEPTABLE_IMAGE_FORMATS[image_format]
+
+    # RGBモードに変換してPNGで再エンコード（APIが要求する形式）
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue(), "image/png"
@@ -0,0 +1,132 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+
+from src.config.executors import run_in_media_process, run_in_storage_io
+from src.config.settings import bucket
+from src.models.exceptions import ServiceException
+from src.services.firebase.unit.cloud_storage_image import extract_blob_name
+from src.services.image.input_image import decode_input_image
+
+# 入力メディアの取得に関する制限
+INPUT_MEDIA_MAX_BYTES = 20 * 1024 * 1024
+INPUT_MEDIA_TIMEOUT_SECONDS = 15
+INPUT_MEDIA_MAX_CONNECTIONS = 16
+
+# URLごとに保持する入力メディアの合計バイト数の上限
+INPUT_MEDIA_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class InputMedia:
+    data: bytes
+    mime_type: str
+
+
+_session: Optional[aiohttp.ClientSession] = None
+_cache: "OrderedDict[str, InputMedia]" = OrderedDict()
+_cache_bytes = 0
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=INPUT_MEDIA_MAX_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=INPUT_MEDIA_TIMEOUT_SECONDS),
+        )
+    return _session
+
+
+async def close_input_media_session() -> None:
+    """
+    入力メディア取得用のHTTPセッションを閉じる関数（アプリ終了時に呼び出す）
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _download_own_blob(blob_name: str) -> bytes:
+    # 上限+1バイトまでを取得し、超過していれば上限超えと判定する
+    return bucket.blob(blob_name).download_as_bytes(
+        start=0, end=INPUT_MEDIA_MAX_BYTES, timeout=INPUT_MEDIA_TIMEOUT_SECONDS
+    )
+
+
+async def _fetch_over_http(url: str) -> bytes:
+    session = _get_session()
+    async with session.get(url) as response:
+        response.raise_for_status()
+        if (response.content_length or 0) > INPUT_MEDIA_MAX_BYTES:
+            raise ServiceException("入力メディアのサイズが上限を超えています", "validation")
+        chunks = []
+        total = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            total += len(chunk)
+            if total > INPUT_MEDIA_MAX_BYTES:
+                raise ServiceException(
+                    "入力メディアのサイズが上限を超えています", "validation"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+async def load_input_media(url: str) -> InputMedia:
+    """
+    image-to-image・image-to-video用の入力画像を取得する関数
+    自分たちのバケットのURLはStorage APIから直接取得し、それ以外は共有HTTPセッションで取得する
+    検証済みのバイトデータは、合計INPUT_MEDIA_CACHE_MAX_BYTESまでURLごとにLRUでキャッシュされる
+
+    Args:
+        url (str): 入力画像のURL
+
+    Returns:
+        InputMedia: APIに渡すバイトデータとMIMEタイプ
+
+    Raises:
+        ServiceException: 取得・デコードに失敗した場合、またはサイズ・時間の上限を超えた場合
+    """
+    global _cache_bytes
+    cached = _cache.get(url)
+    if cached is not None:
+        _cache.move_to_end(url)
+        return cached
+
+    try:
+        blob_name = extract_blob_name(url)
+        if blob_name is not None:
+            data = await run_in_storage_io(_download_own_blob, blob_name)
+            if len(data) > INPUT_MEDIA_MAX_BYTES:
+                raise ServiceException(
+                    "入力メディアのサイズが上限を超えています", "validation"
+                )
+        else:
+            data = await _fetch_over_http(url)
+
+        api_data, mime_type = await run_in_media_process(
+            decode_input_image, data
+        )
+    except ServiceException:
+        raise  # 再発生
+    except asyncio.TimeoutError:
+        raise ServiceException("入力メディアの取得がタイムアウトしました", "external_api")
+    except ValueError as e:
+        raise ServiceException(str(e), "validation")
+    except Exception as e:
+        raise ServiceException(
+            f"入力メディアの取得中にエラーが発生しました: {str(e)}", "external_api"
+        )
+
+    input_media = InputMedia(data=api_data, mime_type=mime_type)
+    if len(api_data) <= INPUT_MEDIA_CACHE_MAX_BYTES and url not in _cache:
+        _cache[url] = input_media
+        _cache_bytes += len(api_data)
+        while _cache_bytes > INPUT_MEDIA_CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted.data)
+    return input_media
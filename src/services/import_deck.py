@@ -0,0 +1,514 @@
+import asyncio
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import BinaryIO, Optional
+
+from google.cloud.firestore import ArrayUnion
+
+from src.config.executors import run_in_storage_io
+from src.config.settings import db
+from src.models.enums import PartOfSpeech
+from src.models.exceptions import ServiceException
+from src.models.spaced_repetition_constants import INITIAL_EASE_FACTOR, MIN_EASE_FACTOR
+from src.models.types import DeckImportResponse
+from src.services.deck_archive import DECK_INDEX_NAME, decode_deck_index
+from src.services.firebase.schemas.flashcard_schema import FlashcardSchema
+from src.services.firebase.schemas.meaning_schema import MeaningSchema
+from src.services.firebase.schemas.media_schema import MediaSchema
+from src.services.firebase.schemas.word_schema import WordSchema
+from src.services.firebase.unit.cloud_storage_image import (
+    collect_content_hashes,
+    create_media_url_from_file,
+    public_url_of_blob,
+)
+from src.services.firebase.unit.firestore_bulk import (
+    WriteOperation,
+    commit_writes_in_batches,
+    read_docs_by_ids,
+)
+from src.services.firebase.unit.firestore_media_blob import (
+    read_media_blob_docs,
+    update_media_blob_docs_on_lease,
+)
+from src.services.firebase.unit.firestore_user import read_user_doc_stamp
+from src.services.word_forms import normalize_word
+from src.services.word_index import register_word, resolve_word
+
+# インポートできるアーカイブの制限
+MAX_DECK_INDEX_BYTES = 32 * 1024 * 1024
+MAX_DECK_MEDIA_FILE_BYTES = 200 * 1024 * 1024
+MAX_IMPORT_FLASHCARDS = 5000
+
+# アーカイブからファイルを取り出す際に一度に読み込むバイト数
+ARCHIVE_COPY_CHUNK_SIZE = 1024 * 1024
+
+# メディアのアップロードの同時実行数
+IMPORT_UPLOAD_CONCURRENCY = 8
+
+# エクスポート時に内容のハッシュ値をファイル名としたメディアファイル
+_CONTENT_ADDRESSED_FILE_PATTERN = re.compile(r"/([0-9a-f]{64})\.[0-9a-z]+$")
+
+
+def _row(rows: list[dict], index: object, table_name: str) -> dict:
+    if not isinstance(index, int) or not 0 <= index < len(rows):
+        raise ServiceException(
+            f"アーカイブの索引が不正です（{table_name}の参照: {index}）", "validation"
+        )
+    return rows[index]
+
+
+def _review_fields(row: dict, now: datetime) -> dict:
+    # 復習のスケジュール（未指定の場合は未学習として、すぐに復習待ちに入れる）
+    interval_days = row.get("intervalDays") or 0
+    ease_factor = row.get("easeFactor") or INITIAL_EASE_FACTOR
+    repetitions = row.get("repetitions") or 0
+    for name, value in (("intervalDays", interval_days), ("repetitions", repetitions)):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ServiceException(f"アーカイブの索引が不正です（{name}: {value}）", "validation")
+    if (
+        not isinstance(ease_factor, (int, float))
+        or isinstance(ease_factor, bool)
+        or not ease_factor >= MIN_EASE_FACTOR
+    ):
+        raise ServiceException(
+            f"アーカイブの索引が不正です（easeFactor: {ease_factor}）", "validation"
+        )
+    due_at = row.get("dueAt")
+    try:
+        due_at = datetime.fromisoformat(due_at) if due_at else now
+    except (TypeError, ValueError):
+        raise ServiceException(f"アーカイブの索引が不正です（dueAt: {due_at}）", "validation")
+    return {
+        "interval_days": interval_days,
+        "ease_factor": float(ease_factor),
+        "repetitions": repetitions,
+        "due_at": due_at,
+    }
+
+
+def _doc_ids(rows: list[dict], key: str) -> list[str]:
+    # 存在確認に使うドキュメントID（パスとして解釈される値は除く）
+    return [
+        row[key]
+        for row in rows
+        if isinstance(row.get(key), str) and row[key] and "/" not in row[key]
+    ]
+
+
+def _read_index(archive: zipfile.ZipFile) -> dict[str, list[dict]]:
+    try:
+        info = archive.getinfo(DECK_INDEX_NAME)
+        if info.file_size > MAX_DECK_INDEX_BYTES:
+            raise ServiceException("アーカイブの索引が大きすぎます", "validation")
+        return decode_deck_index(archive.read(info))
+    except ServiceException:
+        raise  # 再発生
+    except (KeyError, ValueError, TypeError) as e:
+        raise ServiceException(f"アーカイブの索引が不正です: {str(e)}", "validation")
+
+
+def _open_archive(
+    archive_file: BinaryIO,
+) -> tuple[zipfile.ZipFile, dict[str, list[dict]]]:
+    # 中央ディレクトリと索引の読み込み・デコードを行う（ワーカースレッドで実行する）
+    try:
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        raise ServiceException("zip形式のアーカイブを指定してください", "validation")
+    try:
+        return archive, _read_index(archive)
+    except BaseException:
+        archive.close()
+        raise
+
+
+def _extract_files(
+    archive: zipfile.ZipFile, paths: list[str], directory: str
+) -> dict[str, str]:
+    # アーカイブ内のパス -> 取り出したファイルのパス（アーカイブに含まれないファイルは含めない）
+    extracted = {}
+    for index, path in enumerate(paths):
+        try:
+            info = archive.getinfo(path)
+        except KeyError:
+            continue
+        if info.file_size > MAX_DECK_MEDIA_FILE_BYTES:
+            raise ServiceException(
+                f"メディアファイルが大きすぎます: {path}", "validation"
+            )
+        file_path = os.path.join(directory, f"{index}{os.path.splitext(path)[1]}")
+        with archive.open(info) as source, open(file_path, "wb") as destination:
+            shutil.copyfileobj(source, destination, ARCHIVE_COPY_CHUNK_SIZE)
+        extracted[path] = file_path
+    return extracted
+
+
+async def _resolve_file_urls(
+    archive: zipfile.ZipFile, file_rows: list[dict], file_indexes: set[int]
+) -> tuple[list[Optional[str]], int]:
+    # 作成するメディアが参照するファイルのURLと、アップロードしたファイルの数を求める
+    urls: list[Optional[str]] = [row.get("url") for row in file_rows]
+    content_hashes = {}
+    for index in file_indexes:
+        row = file_rows[index]
+        match = _CONTENT_ADDRESSED_FILE_PATTERN.search(row.get("path") or "")
+        if match:
+            content_hashes[index] = match.group(1)
+    # 保存済みの内容はアップロードせず、保存先のURLを使う
+    # 参照を追加するまでに削除されないよう、再利用する索引の更新日時を更新する
+    media_blobs = await read_media_blob_docs(list(content_hashes.values()))
+    leased_hashes = set(await update_media_blob_docs_on_lease(list(media_blobs)))
+    pending = []
+    for index in sorted(file_indexes):
+        row = file_rows[index]
+        content_hash = content_hashes.get(index)
+        media_blob = media_blobs.get(content_hash)
+        if media_blob and content_hash in leased_hashes:
+            urls[index] = public_url_of_blob(media_blob.path)
+        elif row.get("path"):
+            pending.append(index)
+    if not pending:
+        return urls, 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        extracted = await run_in_storage_io(
+            _extract_files,
+            archive,
+            [file_rows[index]["path"] for index in pending],
+            directory,
+        )
+        semaphore = asyncio.Semaphore(IMPORT_UPLOAD_CONCURRENCY)
+
+        async def upload(index: int) -> None:
+            path = file_rows[index]["path"]
+            file_path = extracted.get(path)
+            if file_path is None:
+                return  # アーカイブに含まれないファイルは元のURLを使う
+            extension = os.path.splitext(path)[1].lstrip(".") or "bin"
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            async with semaphore:
+                urls[index] = await create_media_url_from_file(
+                    file_path, extension, content_type
+                )
+
+        await asyncio.gather(*[upload(index) for index in pending])
+        return urls, len(extracted)
+
+
+async def import_deck(user_id: str, archive_file: BinaryIO) -> DeckImportResponse:
+    """
+    エクスポートしたデッキのアーカイブをユーザーのフラッシュカードとして取り込む関数
+    単語は同じIDまたは同じ表記のドキュメントが存在すれば再利用する
+    意味は同じ単語の、メディアはユーザー自身のフラッシュカードの同じIDのドキュメントのみ再利用する
+    メディアファイルは内容のハッシュ値で保存済みかを判定し、保存されていないもののみアップロードする
+    ドキュメントの作成はWriteBatchでまとめて書き込み、ユーザーへの追加は最後に行う
+
+    Args:
+        user_id (str): ユーザーID
+        archive_file (BinaryIO): アーカイブ（シーク可能なファイル）
+
+    Returns:
+        DeckImportResponse: 作成したフラッシュカードのIDと作成件数
+
+    Raises:
+        ServiceException: ユーザーが存在しない場合、またはアーカイブが不正な場合
+    """
+    try:
+        if not await read_user_doc_stamp(user_id):
+            raise ServiceException("指定されたユーザーは存在しません", "not_found")
+        # 大きなアーカイブの読み込みでイベントループを止めないよう、ワーカースレッドで行う
+        archive, tables = await run_in_storage_io(_open_archive, archive_file)
+        with archive:
+            flashcard_rows = tables["flashcards"]
+            word_rows = tables["words"]
+            meaning_rows = tables["meanings"]
+            media_rows = tables["medias"]
+            file_rows = tables["files"]
+            if not flashcard_rows:
+                raise ServiceException("フラッシュカードが含まれていません", "validation")
+            if len(flashcard_rows) > MAX_IMPORT_FLASHCARDS:
+                raise ServiceException(
+                    f"一度にインポートできるフラッシュカードは{MAX_IMPORT_FLASHCARDS}件までです",
+                    "validation",
+                )
+
+            now = datetime.now()
+            writes: list[WriteOperation] = []
+
+            # 単語: 同じID・同じ表記の単語がなければ作成する
+            existing_words = await read_docs_by_ids(
+                "words", _doc_ids(word_rows, "wordId"), ["word"]
+            )
+            word_ids: list[str] = []
+            new_words: dict[int, WordSchema] = {}
+            for index, row in enumerate(word_rows):
+                if row.get("wordId") in existing_words:
+                    word_ids.append(row["wordId"])
+                    continue
+                if not isinstance(row.get("word"), str) or not row["word"]:
+                    raise ServiceException(
+                        "アーカイブの索引が不正です（単語がありません）", "validation"
+                    )
+                resolved = await resolve_word(row["word"])
+                if resolved and resolved[0] == normalize_word(row["word"]):
+                    word_ids.append(resolved[1])
+                    continue
+                word_ids.append(db.collection("words").document().id)
+                new_words[index] = WordSchema(
+                    word=row["word"],
+                    meaning_id_list=[],
+                    core_meaning=row.get("coreMeaning"),
+                    explanation=row.get("explanation") or "",
+                    created_at=now,
+                    updated_at=now,
+                    frequency=row.get("frequency"),
+                )
+
+            # 意味: 同じIDで同じ単語の意味がなければ作成し、単語のmeaningIdListに追加する
+            for row in meaning_rows:
+                _row(word_rows, row.get("word"), "words")
+            existing_meanings = await read_docs_by_ids(
+                "meanings", _doc_ids(meaning_rows, "meaningId"), ["wordId"]
+            )
+            # wordIdを持たない意味は、単語のmeaningIdListで所属を確認する
+            word_meaning_ids = {
+                word_id: set(word.get("meaningIdList") or [])
+                for word_id, word in (
+                    await read_docs_by_ids(
+                        "words",
+                        [word_ids[row["word"]] for row in meaning_rows],
+                        ["meaningIdList"],
+                    )
+                ).items()
+            }
+            meaning_ids: list[str] = []
+            created_meaning_count = 0
+            added_meaning_ids: dict[str, list[str]] = {}
+            for row in meaning_rows:
+                word_index = row["word"]
+                word_id = word_ids[word_index]
+                existing_meaning = existing_meanings.get(row.get("meaningId"))
+                if existing_meaning is not None and (
+                    existing_meaning.get("wordId") == word_id
+                    or row["meaningId"] in word_meaning_ids.get(word_id, ())
+                ):
+                    meaning_ids.append(row["meaningId"])
+                    continue
+                try:
+                    pos = PartOfSpeech(row.get("pos"))
+                except ValueError:
+                    raise ServiceException(
+                        f"アーカイブの索引が不正です（品詞: {row.get('pos')}）", "validation"
+                    )
+                meaning_ref = db.collection("meanings").document()
+                meaning_ids.append(meaning_ref.id)
+                created_meaning_count += 1
+                meaning = MeaningSchema(
+                    pos=pos,
+                    translation=row.get("translation") or "",
+                    pronunciation=row.get("pronunciation") or "",
+                    example_eng=row.get("exampleEng") or "",
+                    example_jpn=row.get("exampleJpn") or "",
+                    rank=row.get("rank") or 0,
+                    created_at=now,
+                    updated_at=now,
+                    word_id=word_id,
+                )
+                writes.append(("set", meaning_ref, meaning.to_dict()))
+                if word_index in new_words:
+                    new_words[word_index].meaning_id_list.append(meaning_ref.id)
+                else:
+                    added_meaning_ids.setdefault(word_id, []).append(meaning_ref.id)
+            for index, word in new_words.items():
+                writes.append(
+                    ("set", db.collection("words").document(word_ids[index]), word.to_dict())
+                )
+            for word_id, added in added_meaning_ids.items():
+                writes.append(
+                    (
+                        "update",
+                        db.collection("words").document(word_id),
+                        {"meaningIdList": ArrayUnion(added), "updatedAt": now},
+                    )
+                )
+
+            # フラッシュカードのIDは先に決め、作成するメディアから参照する
+            flashcard_ids = [
+                db.collection("flashcards").document().id for _ in flashcard_rows
+            ]
+            media_flashcard_ids: dict[int, str] = {}
+            # ファイルのアップロード前に検証する
+            review_fields = [_review_fields(row, now) for row in flashcard_rows]
+            for flashcard_id, row in zip(flashcard_ids, flashcard_rows):
+                _row(word_rows, row.get("word"), "words")
+                _row(media_rows, row.get("media"), "medias")
+                for meaning_index in row.get("meanings") or []:
+                    _row(meaning_rows, meaning_index, "meanings")
+                media_flashcard_ids.setdefault(row["media"], flashcard_id)
+
+            # メディア: ユーザーのフラッシュカードの同じIDのメディアがなければ、
+            # ファイルを保存して作成する（他のユーザーのメディアは共有しない）
+            existing_medias = await read_docs_by_ids(
+                "medias", _doc_ids(media_rows, "mediaId"), ["flashcardId"]
+            )
+            media_owners = await read_docs_by_ids(
+                "flashcards",
+                [
+                    media["flashcardId"]
+                    for media in existing_medias.values()
+                    if media.get("flashcardId")
+                ],
+                ["createdBy"],
+            )
+            owned_media_ids = {
+                media_id
+                for media_id, media in existing_medias.items()
+                if media_owners.get(media.get("flashcardId"), {}).get("createdBy")
+                == user_id
+            }
+            new_media_indexes = [
+                index
+                for index in media_flashcard_ids
+                if media_rows[index].get("mediaId") not in owned_media_ids
+            ]
+            file_indexes: set[int] = set()
+            for index in new_media_indexes:
+                media = media_rows[index]
+                if media.get("meaning") is not None:
+                    _row(meaning_rows, media["meaning"], "meanings")
+                for file_index in media.get("files") or []:
+                    _row(file_rows, file_index, "files")
+                    file_indexes.add(file_index)
+                for variants in media.get("variants") or []:
+                    if not isinstance(variants, dict):
+                        raise ServiceException(
+                            "アーカイブの索引が不正です（派生ファイル）", "validation"
+                        )
+                    for file_index in variants.values():
+                        _row(file_rows, file_index, "files")
+                        file_indexes.add(file_index)
+            file_urls, uploaded_file_count = await _resolve_file_urls(
+                archive, file_rows, file_indexes
+            )
+
+            media_ids = [row.get("mediaId") for row in media_rows]
+            new_media_hashes: dict[str, list[str]] = {}
+            for index in new_media_indexes:
+                row = media_rows[index]
+                media_ref = db.collection("medias").document()
+                media_ids[index] = media_ref.id
+                # アーカイブに含まれず、元のURLもないファイルは除く
+                media_urls = [
+                    file_urls[file_index]
+                    for file_index in row.get("files") or []
+                    if file_urls[file_index]
+                ]
+                media_variants = [
+                    {
+                        name: file_urls[file_index]
+                        for name, file_index in variants.items()
+                        if file_urls[file_index]
+                    }
+                    for variants in row.get("variants") or []
+                ] or None
+                media = MediaSchema(
+                    flashcard_id=media_flashcard_ids[index],
+                    meaning_id=(
+                        meaning_ids[row["meaning"]]
+                        if row.get("meaning") is not None
+                        else None
+                    ),
+                    media_urls=media_urls,
+                    generation_type=row.get("generationType") or "import",
+                    template_id=None,
+                    user_prompt=row.get("userPrompt") or "",
+                    generated_prompt=row.get("generatedPrompt") or "",
+                    input_media_urls=None,
+                    prompt_token_count=0,
+                    candidates_token_count=0,
+                    total_token_count=0,
+                    created_by=user_id,
+                    created_at=now,
+                    updated_at=now,
+                    media_variants=media_variants,
+                )
+                writes.append(("set", media_ref, media.to_dict()))
+                new_media_hashes[media_ref.id] = collect_content_hashes(
+                    media_urls, media_variants
+                )
+
+            # メディアファイルの索引に、作成したメディアからの参照を追加する
+            media_blobs = await read_media_blob_docs(
+                [h for hashes in new_media_hashes.values() for h in hashes]
+            )
+            referencing_media_ids: dict[str, list[str]] = {}
+            for media_id, content_hashes in new_media_hashes.items():
+                for content_hash in content_hashes:
+                    if content_hash in media_blobs:
+                        referencing_media_ids.setdefault(content_hash, []).append(media_id)
+            for content_hash, referencing in referencing_media_ids.items():
+                writes.append(
+                    (
+                        "update",
+                        db.collection("media_blobs").document(content_hash),
+                        {"mediaIdList": ArrayUnion(referencing), "updatedAt": now},
+                    )
+                )
+
+            for flashcard_id, row, review in zip(
+                flashcard_ids, flashcard_rows, review_fields
+            ):
+                flashcard = FlashcardSchema(
+                    word_id=word_ids[row["word"]],
+                    using_meaning_id_list=[
+                        meaning_ids[meaning_index]
+                        for meaning_index in row.get("meanings") or []
+                    ],
+                    memo=row.get("memo") or "",
+                    media_id_list=[media_ids[row["media"]]],
+                    current_media_id=media_ids[row["media"]],
+                    comparison_id=None,
+                    created_by=user_id,
+                    version=0,
+                    check_flag=bool(row.get("checkFlag")),
+                    created_at=now,
+                    updated_at=now,
+                    **review,
+                )
+                writes.append(
+                    (
+                        "set",
+                        db.collection("flashcards").document(flashcard_id),
+                        flashcard.to_dict(),
+                    )
+                )
+            # すべてのドキュメントを作成した後にユーザーへ追加する（途中で失敗しても参照先のない状態にならない）
+            writes.append(
+                (
+                    "update",
+                    db.collection("users").document(user_id),
+                    {"flashcardIdList": ArrayUnion(flashcard_ids), "updatedAt": now},
+                )
+            )
+            await commit_writes_in_batches(writes)
+
+        for index, word in new_words.items():
+            register_word(word.word, word_ids[index], word.frequency)
+        return DeckImportResponse(
+            flashcard_ids=flashcard_ids,
+            created_word_count=len(new_words),
+            created_meaning_count=created_meaning_count,
+            created_media_count=len(new_media_indexes),
+            uploaded_file_count=uploaded_file_count,
+        )
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"デッキのインポート中にエラーが発生しました: {str(e)}", "general"
+        )
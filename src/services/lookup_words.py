@@ -0,0 +1,95 @@
+from src.models.exceptions import ServiceException
+from src.models.types import WordLookupSummary
+from src.services.firebase.unit.firestore_bulk import read_docs_by_ids
+from src.services.firebase.unit.firestore_flashcard import (
+    read_default_flashcard_docs_by_word_ids,
+)
+from src.services.firebase.unit.firestore_media import pick_thumbnail_url
+from src.services.word_forms import normalize_word
+from src.services.word_index import resolve_word
+
+# 1回のリクエストで受け付けるトークン数の上限（正規化・重複排除前）
+MAX_LOOKUP_TOKENS = 2000
+
+# 1回のリクエストで検索する単語数の上限（正規化・重複排除後）
+MAX_LOOKUP_WORDS = 500
+
+
+async def lookup_words(tokens: list) -> tuple[dict[str, WordLookupSummary], list[str]]:
+    """
+    複数の単語をまとめて検索し、デフォルトフラッシュカードの概要を取得する関数
+    変化形を含む単語はメモリ上の対応表で登録済みの単語に解決し、
+    フラッシュカードはin演算子のクエリ、メディアはドキュメントIDでまとめて読み込む
+
+    Args:
+        tokens (list): ページから抽出したトークンのリスト
+
+    Returns:
+        tuple[dict[str, WordLookupSummary], list[str]]: 正規化した単語ごとの概要と、見つからなかった単語
+
+    Raises:
+        ServiceException: トークンが指定されていない、または上限を超える場合
+    """
+    try:
+        if not isinstance(tokens, list) or not tokens:
+            raise ServiceException("wordsが指定されていません", "validation")
+        if len(tokens) > MAX_LOOKUP_TOKENS:
+            raise ServiceException(
+                f"wordsは{MAX_LOOKUP_TOKENS}件以下で指定してください", "validation"
+            )
+        words = list(
+            dict.fromkeys(
+                word
+                for word in (
+                    normalize_word(token) for token in tokens if isinstance(token, str)
+                )
+                if word
+            )
+        )
+        if len(words) > MAX_LOOKUP_WORDS:
+            raise ServiceException(
+                f"単語の種類は{MAX_LOOKUP_WORDS}件以下で指定してください", "validation"
+            )
+        if not words:
+            return {}, []
+
+        word_ids = {}
+        for word in words:
+            resolved = await resolve_word(word)
+            if resolved:
+                word_ids[word] = resolved
+        flashcards = await read_default_flashcard_docs_by_word_ids(
+            [word_id for _, word_id in word_ids.values()], ["currentMediaId"]
+        )
+        core_meanings = await read_docs_by_ids(
+            "words", list(flashcards), ["coreMeaning"]
+        )
+        medias = await read_docs_by_ids(
+            "medias",
+            [flashcard["currentMediaId"] for _, flashcard in flashcards.values()],
+            ["mediaUrls", "mediaVariants"],
+        )
+
+        summaries = {}
+        for word in words:
+            if word not in word_ids:
+                continue
+            lemma, word_id = word_ids[word]
+            if word_id not in flashcards:
+                continue
+            flashcard_id, flashcard = flashcards[word_id]
+            media = medias.get(flashcard["currentMediaId"])
+            summaries[word] = WordLookupSummary(
+                flashcard_id=flashcard_id,
+                word_id=word_id,
+                word=lemma,
+                core_meaning=core_meanings.get(word_id, {}).get("coreMeaning"),
+                thumbnail_url=pick_thumbnail_url(media) if media else None,
+            )
+        return summaries, [word for word in words if word not in summaries]
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"単語の一括検索中にエラーが発生しました: {str(e)}", "general"
+        )
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from src.services.firebase.unit.cloud_storage_image import (
+    collect_content_hashes,
+    delete_media_blob,
+    extract_blob_name,
+    extract_content_hash,
+)
+from src.services.firebase.unit.firestore_media_blob import (
+    delete_media_blob_docs_if_unreferenced,
+    read_media_blob_docs,
+    update_media_blob_docs_remove_media_ids,
+)
+
+
+@dataclass
+class MediaFileRelease:
+    """削除するメディアに紐づくファイルの削除計画"""
+
+    media_ids: list[str]
+    # 他のメディアからも参照されているため、参照元の削除のみ行うファイルのハッシュ値
+    retained_hashes: list[str] = field(default_factory=list)
+    # 参照元がなくなるため削除するファイル（ハッシュ値 -> オブジェクト名）
+    deletable_blobs: dict[str, str] = field(default_factory=dict)
+    # 内容アドレス形式以前のファイル（メディアごとに固有のパスを持つ）
+    legacy_blob_paths: list[str] = field(default_factory=list)
+
+    @property
+    def blob_paths(self) -> list[str]:
+        return sorted(set(self.deletable_blobs.values()) | set(self.legacy_blob_paths))
+
+
+async def plan_media_file_release(
+    media_urls_by_id: dict[str, list[str]],
+) -> MediaFileRelease:
+    """
+    メディアの削除に伴って削除できるファイルを求める関数
+    内容アドレス形式のファイルは、索引上の参照元がすべて削除対象の場合のみ削除する
+
+    Args:
+        media_urls_by_id (dict[str, list[str]]): 削除するメディアIDとそのファイルURL
+
+    Returns:
+        MediaFileRelease: ファイルの削除計画
+    """
+    media_ids = set(media_urls_by_id)
+    urls = [url for media_urls in media_urls_by_id.values() for url in media_urls]
+
+    release = MediaFileRelease(media_ids=sorted(media_ids))
+    media_blobs = await read_media_blob_docs(collect_content_hashes(urls))
+    for content_hash, media_blob in media_blobs.items():
+        if set(media_blob.media_id_list) <= media_ids:
+            release.deletable_blobs[content_hash] = media_blob.path
+        else:
+            release.retained_hashes.append(content_hash)
+
+    for url in urls:
+        blob_name = extract_blob_name(url)
+        if blob_name and extract_content_hash(url) is None:
+            release.legacy_blob_paths.append(blob_name)
+    return release
+
+
+async def apply_media_file_release(
+    release: MediaFileRelease,
+    delete_blobs: Callable[[list[str]], Awaitable[int]],
+) -> int:
+    """
+    ファイルの削除計画を実行する関数（メディアドキュメント自体は削除しない）
+    索引を先に削除し、途中で失敗しても存在しないファイルが重複排除に使われないようにする
+    索引はトランザクション内で参照元を読み直して削除し、計画の作成後に参照が追加された、
+    または重複排除で再利用されたファイルは削除せず、削除するメディアからの参照のみ外す
+
+    Args:
+        release (MediaFileRelease): ファイルの削除計画
+        delete_blobs (Callable[[list[str]], Awaitable[int]]): オブジェクトを削除する関数
+
+    Returns:
+        int: 削除したオブジェクト数
+    """
+    deleted_hashes = await delete_media_blob_docs_if_unreferenced(
+        list(release.deletable_blobs), release.media_ids
+    )
+    for content_hash in set(release.deletable_blobs) - set(deleted_hashes):
+        del release.deletable_blobs[content_hash]
+        release.retained_hashes.append(content_hash)
+    await update_media_blob_docs_remove_media_ids(
+        release.retained_hashes, release.media_ids
+    )
+    return await delete_blobs(release.blob_paths)
+
+
+async def delete_blobs_concurrently(paths: list[str], max_concurrency: int) -> int:
+    """Cloud Storageのオブジェクトを同時実行数の上限を守りながら削除する"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _delete(path: str) -> bool:
+        async with semaphore:
+            return await delete_media_blob(path)
+
+    results = await asyncio.gather(*[_delete(path) for path in paths])
+    return sum(1 for result in results if result)
+
+
+async def delete_blobs_throttled(paths: list[str], max_deletes_per_second: int) -> int:
+    """Cloud Storageのオブジェクトを1秒あたりの上限件数を守りながら削除する"""
+    deleted = 0
+    for start in range(0, len(paths), max_deletes_per_second):
+        started_at = time.monotonic()
+        deleted += await delete_blobs_concurrently(
+            paths[start : start + max_deletes_per_second], max_deletes_per_second
+        )
+        elapsed = time.monotonic() - started_at
+        if elapsed < 1.0 and start + max_deletes_per_second < len(paths):
+            await asyncio.sleep(1.0 - elapsed)
+    return deleted
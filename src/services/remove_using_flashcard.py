@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from google.cloud.firestore import ArrayRemove
+
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+from src.services.firebase.unit.firestore_bulk import commit_writes_in_batches
+from src.services.firebase.unit.firestore_tombstone import build_tombstone_write
+from src.services.firebase.unit.firestore_user import read_user_doc_stamp
+
+
+async def remove_using_flashcard(user_id: str, flashcard_id: str) -> None:
+    """
+    ユーザーからフラッシュカードを削除する関数
+    ユーザーのflashcardIdListからの削除・フラッシュカードの削除・削除の記録を1つのバッチで書き込み、
+    同期中のクライアントに削除が伝わるようにする
+    フラッシュカードのメディアは参照されなくなるため、メディアのガベージコレクションで削除される
+
+    Args:
+        user_id (str): ユーザーID
+        flashcard_id (str): 削除するフラッシュカードID
+
+    Raises:
+        ServiceException: ユーザーまたはフラッシュカードが存在しない場合
+    """
+    try:
+        stamp = await read_user_doc_stamp(user_id)
+        if not stamp:
+            raise ServiceException("指定されたユーザーは存在しません", "not_found")
+        _, flashcard_ids = stamp
+        if flashcard_id not in flashcard_ids:
+            raise ServiceException(
+                "指定されたフラッシュカードはこのユーザーに登録されていません",
+                "not_found",
+            )
+
+        now = datetime.now()
+        await commit_writes_in_batches(
+            [
+                (
+                    "update",
+                    db.collection("users").document(user_id),
+                    {"flashcardIdList": ArrayRemove([flashcard_id]), "updatedAt": now},
+                ),
+                ("delete", db.collection("flashcards").document(flashcard_id), None),
+                build_tombstone_write(user_id, flashcard_id, now),
+            ]
+        )
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"フラッシュカードの削除中にエラーが発生しました: {str(e)}", "general"
+        )
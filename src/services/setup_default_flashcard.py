@@ -1,14 +1,25 @@
+import asyncio
+import logging
+from typing import Optional
+
+from src.config.tracing import start_span, traced
 from src.models.exceptions import ServiceException
 from src.models.types import WordsAPIResponse
 from src.services.firebase.create_word_and_meaning import create_word_and_meaning
 from src.services.firebase.schemas.flashcard_schema import FlashcardSchema
 from src.services.firebase.schemas.media_schema import MediaSchema
-from src.services.firebase.unit.cloud_storage_image import create_image_url_from_image
+from src.services.firebase.unit.cloud_storage_image import (
+    collect_content_hashes,
+    create_image_urls_with_variants,
+)
 from src.services.firebase.unit.firestore_flashcard import create_flashcard_doc
 from src.services.firebase.unit.firestore_media import (
     create_media_doc,
     update_media_doc,
 )
+from src.services.firebase.unit.firestore_media_blob import (
+    update_media_blob_docs_add_media_id,
+)
 from src.services.firebase.unit.firestore_word import read_word_id_by_word
 from src.services.google_ai.generate_explanation_and_core_meaning import (
     generate_explanation_and_core_meaning,
@@ -16,9 +27,22 @@ from src.services.google_ai.generate_explanation_and_core_meaning import (
 from src.services.google_ai.generate_prompt_for_imagen import generate_prompt_for_imagen
 from src.services.google_ai.generate_translation import generate_translation
 from src.services.google_ai.unit.request_imagen import request_imagen_text_to_image
+from src.services.word_forms import is_regular_inflection, normalize_word
+from src.services.word_index import register_word, resolve_word
 from src.services.words_api.request_words_api import request_words_api
 
+logger = logging.getLogger(__name__)
+
+
+def _words_api_frequency(words_api_response: dict) -> Optional[float]:
+    # WordsAPIのfrequencyは数値、またはZipf値を含むオブジェクトで返される
+    frequency = words_api_response.get("frequency")
+    if isinstance(frequency, dict):
+        frequency = frequency.get("zipf")
+    return float(frequency) if isinstance(frequency, (int, float)) else None
 
+
+@traced()
 async def setup_default_flashcard(
     word: str,
 ) -> str:
@@ -35,19 +59,35 @@ async def setup_default_flashcard(
         ServiceException: フラッシュカードのセットアップに失敗した場合
     """
     try:
-        is_exist = await read_word_id_by_word(word)
-        if is_exist:
-            raise ServiceException(f"単語 '{word}' は既に存在します", "conflict")
+        with start_span("setup_default_flashcard.check_existing"):
+            # 表記の揺れ（大文字・記号）と規則変化（"cats"・"running"など）は既存の単語とする
+            #   不規則変化は別の見出し語として登録できる（例: "saw"・"found"は"see"・"find"とは別）
+            resolved = await resolve_word(word)
+            normalized = normalize_word(word)
+            if resolved and resolved[0] == normalized:
+                raise ServiceException(f"単語 '{word}' は既に存在します", "conflict")
+            if resolved and is_regular_inflection(normalized, resolved[0]):
+                raise ServiceException(
+                    f"単語 '{word}' は既存の単語 '{resolved[0]}' の変化形です", "conflict"
+                )
+            # 他のインスタンスで追加された直後の単語は一覧に未反映の場合があるため、Firestoreでも確認する
+            is_exist = await read_word_id_by_word(word)
+            if is_exist:
+                raise ServiceException(f"単語 '{word}' は既に存在します", "conflict")
 
         # WordsAPIから単語情報を取得
         try:
-            words_api_response: WordsAPIResponse = await request_words_api(word)
+            with start_span("setup_default_flashcard.fetch_words_api"):
+                words_api_response: WordsAPIResponse = await request_words_api(word)
         except Exception:
             raise ServiceException(
                 f"意味の取得に失敗しました。入力された英単語には対応できません。単語: '{word}'",
                 "external_api",
             )
-        print(f"WordsAPI response for word '{word}': {words_api_response}")
+        logger.debug(
+            "WordsAPI response received",
+            extra={"word": word, "response": words_api_response},
+        )
 
         # MeaningSchema用のコンテンツを作成
         content = f"""
@@ -75,10 +115,13 @@ async def setup_default_flashcard(
         {words_api_response.get("pronunciation", {})}
         """
         # 単語の翻訳を生成
-        meanings_instance = generate_translation(content)
+        with start_span("setup_default_flashcard.generate_translation"):
+            meanings_instance = generate_translation(content)
         if meanings_instance is None:
             raise ValueError("MeaningsSchema is None")
-        print(f"Generated meanings for word '{word}': {meanings_instance}")
+        logger.debug(
+            "meanings generated", extra={"word": word, "meanings": meanings_instance}
+        )
         content = f"""
         英単語「{word}」について、解説文とコアミーニングを生成してください。
         explanationには、以下に示すような解説文を生成してください。
@@ -100,15 +143,22 @@ async def setup_default_flashcard(
         {[{meaning.pos, meaning.translation} for meaning in meanings_instance]}
         """
         # contentを生成
-        word_instance = generate_explanation_and_core_meaning(word, content)
+        with start_span("setup_default_flashcard.generate_explanation"):
+            word_instance = generate_explanation_and_core_meaning(word, content)
         if word_instance is None:
             raise ValueError("WordSchema is None")
-        print(f"Generated word instance for '{word}': {word_instance}")
+        logger.debug(
+            "word explanation generated",
+            extra={"word": word, "wordInstance": word_instance},
+        )
         # WordとMeaningをFirestoreに保存
 
-        word_id, meaning_id_list = await create_word_and_meaning(
-            word_instance, meanings_instance
-        )
+        word_instance.frequency = _words_api_frequency(words_api_response)
+        with start_span("setup_default_flashcard.save_word"):
+            word_id, meaning_id_list = await create_word_and_meaning(
+                word_instance, meanings_instance
+            )
+            register_word(word_instance.word, word_id, word_instance.frequency)
         # 画像生成用プロンプトを生成
         # 代表となる単語の意味情報を取得
         main_meaning = meanings_instance[0] if meanings_instance else None
@@ -125,26 +175,27 @@ async def setup_default_flashcard(
         以下の例文を表現した画像
         {main_meaning.example_eng}
         """
-        generated_prompt = generate_prompt_for_imagen(content)
+        with start_span("setup_default_flashcard.generate_prompt"):
+            generated_prompt = generate_prompt_for_imagen(content)
         if generated_prompt is None:
             raise ValueError("Generated prompt is None")
         # プロンプトを生成済み
 
         ##TODO: 画像生成処理を追加する
-        generated_images = request_imagen_text_to_image(
-            generated_prompt.generated_prompt,
-            _number_of_images=1,
-            _aspect_ratio="1:1",  # アスペクト比を1:1に設定
-            _person_generation="ALLOW_ALL",  # 人物生成を許可しない
-        )
+        with start_span("setup_default_flashcard.generate_image"):
+            generated_images = request_imagen_text_to_image(
+                generated_prompt.generated_prompt,
+                _number_of_images=1,
+                _aspect_ratio="1:1",  # アスペクト比を1:1に設定
+                _person_generation="ALLOW_ALL",  # 人物生成を許可しない
+            )
 
-        image_url_list = []
-        for image in generated_images:
-            image_url = await create_image_url_from_image(
-                image,
-                f"_default/{word}/{main_meaning.pos}/{main_meaning.translation}.png",
+        with start_span("setup_default_flashcard.upload_media"):
+            upload_results = await asyncio.gather(
+                *[create_image_urls_with_variants(image) for image in generated_images]
             )
-            image_url_list.append(image_url)
+        image_url_list = [image_url for image_url, _ in upload_results]
+        media_variants = [variants for _, variants in upload_results]
 
         ## TODO: Mediaの保存処理を追加する
         if not generated_images:
@@ -164,45 +215,52 @@ async def setup_default_flashcard(
             created_by="default",  # 作成者はシステム
             created_at=word_instance.created_at,
             updated_at=word_instance.updated_at,
+            media_variants=media_variants,
         )
 
-        media_id = await create_media_doc(media_instance)
-
-        # Flashcardのセットアップ
-        flashcard_instance = FlashcardSchema(
-            word_id=word_id,
-            using_meaning_id_list=meaning_id_list[:5],
-            memo="",
-            media_id_list=[media_id],  # 後で更新される
-            current_media_id=media_id,
-            comparison_id="",  # 後で更新される
-            created_by="default",
-            version=0,
-            check_flag=False,
-            created_at=word_instance.created_at,
-            updated_at=word_instance.updated_at,
-        )
-        flashcard_id = await create_flashcard_doc(flashcard_instance)
+        with start_span("setup_default_flashcard.save_documents"):
+            media_id = await create_media_doc(media_instance)
+            await update_media_blob_docs_add_media_id(
+                content_hashes=collect_content_hashes(image_url_list, media_variants),
+                media_id=media_id,
+            )
 
-        # Mediaの更新
-        media_instance = MediaSchema(
-            flashcard_id=flashcard_id,
-            meaning_id=meaning_id_list[0],  # 最初の意味を使用
-            media_urls=image_url_list,
-            generation_type="imagen",
-            template_id=None,  # TODO: テンプレートIDを設定する
-            user_prompt="",
-            generated_prompt=generated_prompt.generated_prompt,
-            input_media_urls=None,  # 入力メディアURLはNone
-            prompt_token_count=generated_prompt.prompt_token_count,
-            candidates_token_count=generated_prompt.candidates_token_count,
-            total_token_count=generated_prompt.total_token_count,
-            created_by="default",  # 作成者はシステム
-            created_at=word_instance.created_at,
-            updated_at=word_instance.updated_at,
-        )
+            # Flashcardのセットアップ
+            flashcard_instance = FlashcardSchema(
+                word_id=word_id,
+                using_meaning_id_list=meaning_id_list[:5],
+                memo="",
+                media_id_list=[media_id],  # 後で更新される
+                current_media_id=media_id,
+                comparison_id="",  # 後で更新される
+                created_by="default",
+                version=0,
+                check_flag=False,
+                created_at=word_instance.created_at,
+                updated_at=word_instance.updated_at,
+            )
+            flashcard_id = await create_flashcard_doc(flashcard_instance)
+
+            # Mediaの更新
+            media_instance = MediaSchema(
+                flashcard_id=flashcard_id,
+                meaning_id=meaning_id_list[0],  # 最初の意味を使用
+                media_urls=image_url_list,
+                generation_type="imagen",
+                template_id=None,  # TODO: テンプレートIDを設定する
+                user_prompt="",
+                generated_prompt=generated_prompt.generated_prompt,
+                input_media_urls=None,  # 入力メディアURLはNone
+                prompt_token_count=generated_prompt.prompt_token_count,
+                candidates_token_count=generated_prompt.candidates_token_count,
+                total_token_count=generated_prompt.total_token_count,
+                created_by="default",  # 作成者はシステム
+                created_at=word_instance.created_at,
+                updated_at=word_instance.updated_at,
+                media_variants=media_variants,
+            )
 
-        await update_media_doc(media_id=media_id, media_instance=media_instance)
+            await update_media_doc(media_id=media_id, media_instance=media_instance)
 
         return flashcard_id
 
@@ -216,8 +274,6 @@ async def setup_default_flashcard(
 
 
 if __name__ == "__main__":
-    import asyncio
-
     async def main():
         # 学習用の単語（30単語）
         # test_word_list = [
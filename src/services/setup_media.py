@@ -1,17 +1,20 @@
+import asyncio
+import os
+import tempfile
 from datetime import datetime
-from io import BytesIO
-
-import requests
-from PIL import Image
 
+from src.config.executors import run_in_storage_io
+from src.config.settings import VIDEO_FPS_STRATEGY
+from src.config.tracing import start_span, traced
 from src.models.enums import part_of_speech_to_japanese
 from src.models.exceptions import ServiceException
 from src.models.types import CreateMediaRequest, SetupMediaResponse
 from src.services.firebase.schemas.comparison_schema import ComparisonSchema
 from src.services.firebase.schemas.media_schema import MediaSchema
 from src.services.firebase.unit.cloud_storage_image import (
-    create_image_url_from_image,
-    create_video_url_from_video,
+    collect_content_hashes,
+    create_image_urls_with_variants,
+    create_video_urls_with_previews,
 )
 from src.services.firebase.unit.firestore_comparison import create_comparison_doc
 from src.services.firebase.unit.firestore_flashcard import (
@@ -21,6 +24,9 @@ from src.services.firebase.unit.firestore_media import (
     create_media_doc,
     update_media_doc_on_media_urls,
 )
+from src.services.firebase.unit.firestore_media_blob import (
+    update_media_blob_docs_add_media_id,
+)
 from src.services.google_ai.generate_modified_other_settings import (
     generate_modified_other_settings,
 )
@@ -33,9 +39,12 @@ from src.services.google_ai.unit.request_veo import (
     request_image_to_video,
     request_text_to_video,
 )
-from src.services.video.reduce_fps import reduce_fps_to_10
+from src.services.image.input_media_loader import load_input_media
+from src.services.video.reduce_fps import reduce_fps_to_10_in_process
+from src.services.video.video_file import write_video_to_file
 
 
+@traced()
 async def setup_media(
     create_media_request: CreateMediaRequest,
 ) -> SetupMediaResponse:
@@ -54,12 +63,15 @@ async def setup_media(
     Raises:
         ServiceException: メディア作成に失敗した場合
     """
+    # 動画はこのディレクトリ上のファイルとして処理・アップロードする
+    work_dir = tempfile.TemporaryDirectory(prefix="setup_media_")
     try:
         now = datetime.now()
         # 「その他」の設定部分をプロンプトの形に成形（ない場合も対応済）
-        modified_other_settings_result = generate_modified_other_settings(
-            other_settings=create_media_request.other_settings
-        )
+        with start_span("setup_media.rewrite_other_settings"):
+            modified_other_settings_result = generate_modified_other_settings(
+                other_settings=create_media_request.other_settings
+            )
 
         modified_other_settings = (
             modified_other_settings_result.generated_other_settings
@@ -79,7 +91,8 @@ async def setup_media(
             .replace("{explanation}", create_media_request.explanation)
             .replace("{modified_other_settings}", modified_other_settings)
         )  # 画像生成用のプロンプトを生成
-        result = generate_prompt_for_imagen(_content=replaced_prompt)
+        with start_span("setup_media.generate_prompt"):
+            result = generate_prompt_for_imagen(_content=replaced_prompt)
         (
             generated_prompt,
             prompt_token_count_p,
@@ -96,67 +109,93 @@ async def setup_media(
             raise ServiceException("プロンプトの生成に失敗しました", "external_api")
 
         generated_medias = []
-        if create_media_request.generation_type == "text-to-image":
-            generated_medias = request_imagen_text_to_image(
-                _prompt=generated_prompt,
-                _number_of_images=1,
-                _aspect_ratio="1:1",  # アスペクト比を1:1に設定
-                _person_generation="ALLOW_ALL"
-                if create_media_request.allow_generating_person
-                else "DONT_ALLOW",  # 人物生成を許可しない
-            )
-            if not generated_medias:
-                raise ValueError("No images generated")
-        elif create_media_request.generation_type == "image-to-image":
-            # 入力画像を取得
-            if not create_media_request.input_media_urls:
-                raise ValueError("image-to-image requires input_media_urls")
-
-            response = requests.get(create_media_request.input_media_urls[0])
-            input_image = Image.open(BytesIO(response.content))
-
-            # 画像編集を実行
-            generated_image = request_gemini_image_to_image(
-                _prompt=generated_prompt,
-                _image=input_image,
-            )
-            generated_medias = [generated_image]
-            if not generated_medias:
-                raise ValueError("No images generated")
-        elif (
-            create_media_request.generation_type == "text-to-video"
-            or create_media_request.generation_type == "image-to-video"
+        with start_span(
+            "setup_media.generate_media",
+            {"generation.type": create_media_request.generation_type},
         ):
-            generated_video = (
-                request_text_to_video(
+            if create_media_request.generation_type == "text-to-image":
+                generated_medias = request_imagen_text_to_image(
                     _prompt=generated_prompt,
+                    _number_of_images=1,
+                    _aspect_ratio="1:1",  # アスペクト比を1:1に設定
                     _person_generation="ALLOW_ALL"
                     if create_media_request.allow_generating_person
-                    else "DONT_ALLOW",
+                    else "DONT_ALLOW",  # 人物生成を許可しない
                 )
-                if create_media_request.generation_type == "text-to-video"
-                else request_image_to_video(
+                if not generated_medias:
+                    raise ValueError("No images generated")
+            elif create_media_request.generation_type == "image-to-image":
+                # 入力画像を取得
+                if not create_media_request.input_media_urls:
+                    raise ValueError("image-to-image requires input_media_urls")
+
+                with start_span("setup_media.load_input_media"):
+                    input_media = await load_input_media(
+                        create_media_request.input_media_urls[0]
+                    )
+
+                # 画像編集を実行
+                generated_image = request_gemini_image_to_image(
                     _prompt=generated_prompt,
-                    _image_url=create_media_request.input_media_urls[0],
-                    _person_generation="ALLOW_ALL"
-                    if create_media_request.allow_generating_person
-                    else "DONT_ALLOW",
+                    _image_bytes=input_media.data,
+                    _mime_type=input_media.mime_type,
+                )
+                generated_medias = [generated_image]
+                if not generated_medias:
+                    raise ValueError("No images generated")
+            elif (
+                create_media_request.generation_type == "text-to-video"
+                or create_media_request.generation_type == "image-to-video"
+            ):
+                if create_media_request.generation_type == "image-to-video":
+                    if not create_media_request.input_media_urls:
+                        raise ValueError("image-to-video requires input_media_urls")
+                    with start_span("setup_media.load_input_media"):
+                        input_media = await load_input_media(
+                            create_media_request.input_media_urls[0]
+                        )
+                generated_video = (
+                    request_text_to_video(
+                        _prompt=generated_prompt,
+                        _person_generation="ALLOW_ALL"
+                        if create_media_request.allow_generating_person
+                        else "DONT_ALLOW",
+                    )
+                    if create_media_request.generation_type == "text-to-video"
+                    else request_image_to_video(
+                        _prompt=generated_prompt,
+                        _image_bytes=input_media.data,
+                        _mime_type=input_media.mime_type,
+                        _person_generation="ALLOW_ALL"
+                        if create_media_request.allow_generating_person
+                        else "DONT_ALLOW",
+                    )
+                )
+                if not generated_video:
+                    raise ValueError("No videos generated")
+                # 生成された動画を作業ディレクトリに書き出し、以降はファイル単位で扱う
+                original_video_path = os.path.join(work_dir.name, "original.mp4")
+                with start_span("setup_media.write_video"):
+                    await run_in_storage_io(
+                        write_video_to_file, generated_video, original_video_path
+                    )
+                # 生成された動画のフレームレートを10fpsに変更
+                processed_video_path = os.path.join(work_dir.name, "processed.mp4")
+                try:
+                    with start_span("setup_media.reduce_fps"):
+                        await reduce_fps_to_10_in_process(
+                            original_video_path,
+                            processed_video_path,
+                            VIDEO_FPS_STRATEGY,
+                        )
+                    generated_medias = [processed_video_path]
+                except Exception:
+                    # エラー時は元の動画を使用
+                    generated_medias = [original_video_path]
+            else:
+                raise NotImplementedError(
+                    f"生成タイプ '{create_media_request.generation_type}' はサポートされていません。"
                 )
-            )
-            if not generated_video:
-                raise ValueError(
-                    "No videos generated"
-                )  # 生成された動画のフレームレートを10fpsに変更
-            try:
-                processed_video_bytes = reduce_fps_to_10(generated_video)
-                generated_medias = [processed_video_bytes]
-            except Exception:
-                # エラー時は元の動画を使用
-                generated_medias = [generated_video]
-        else:
-            raise NotImplementedError(
-                f"生成タイプ '{create_media_request.generation_type}' はサポートされていません。"
-            )
 
         media_id = await create_media_doc(
             media_instance=MediaSchema(
@@ -177,42 +216,54 @@ async def setup_media(
                 updated_at=now,
             )
         )  # 生成されたメディアをFirestorageに保存して、URLを取得
-        media_url_list = []
-        for media in generated_medias:
-            if (
-                create_media_request.generation_type == "text-to-video"
-                or create_media_request.generation_type == "image-to-video"
-            ):
-                # 動画の場合
-                media_url = await create_video_url_from_video(
-                    media,
-                    f"{create_media_request.word}/{create_media_request.flashcard_id}/{media_id}.mp4",
-                )
-            else:
-                # 画像の場合
-                media_url = await create_image_url_from_image(
-                    media,
-                    f"{create_media_request.word}/{create_media_request.flashcard_id}/{media_id}.png",
-                )
-            media_url_list.append(media_url)
-        await update_media_doc_on_media_urls(
-            media_id=media_id, media_urls=media_url_list
+        is_video = (
+            create_media_request.generation_type == "text-to-video"
+            or create_media_request.generation_type == "image-to-video"
         )
-        comparison_id = await create_comparison_doc(
-            comparison_instance=ComparisonSchema(
+        # メディアは内容のハッシュ値をパスとして保存される（同一内容は再アップロードしない）
+        upload_tasks = [
+            create_video_urls_with_previews(media)
+            if is_video
+            else create_image_urls_with_variants(media)
+            for media in generated_medias
+        ]
+        # 同一生成内の複数メディアは並行してアップロード
+        with start_span("setup_media.upload_media"):
+            upload_results = await asyncio.gather(*upload_tasks)
+        # 画像のサムネイルや動画のポスター画像など、派生ファイルのURLも保持する
+        media_url_list = [media_url for media_url, _ in upload_results]
+        media_variants = [variants for _, variants in upload_results]
+        with start_span("setup_media.save_documents"):
+            await update_media_doc_on_media_urls(
+                media_id=media_id,
+                media_urls=media_url_list,
+                media_variants=media_variants,
+            )
+            await update_media_blob_docs_add_media_id(
+                content_hashes=collect_content_hashes(
+                    media_url_list, media_variants
+                ),
+                media_id=media_id,
+            )
+            comparison_id = await create_comparison_doc(
+                comparison_instance=ComparisonSchema(
+                    flashcard_id=create_media_request.flashcard_id,
+                    old_media_id=create_media_request.old_media_id,
+                    new_media_id=media_id,
+                    is_selected_new="",
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+            await update_flashcard_doc_on_comparison_id(
                 flashcard_id=create_media_request.flashcard_id,
-                old_media_id=create_media_request.old_media_id,
-                new_media_id=media_id,
-                is_selected_new="",
-                created_at=now,
-                updated_at=now,
+                comparison_id=comparison_id,
             )
-        )
-        await update_flashcard_doc_on_comparison_id(
-            flashcard_id=create_media_request.flashcard_id, comparison_id=comparison_id
-        )
         return SetupMediaResponse(
-            comparison_id=comparison_id, media_id=media_id, media_urls=media_url_list
+            comparison_id=comparison_id,
+            media_id=media_id,
+            media_urls=media_url_list,
+            media_variants=media_variants,
         )
     except ServiceException:
         raise  # 再発生
@@ -220,3 +271,5 @@ async def setup_media(
         raise ServiceException(
             f"メディア作成中にエラーが発生しました: {str(e)}", "general"
         )
+    finally:
+        work_dir.cleanup()
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.models.spaced_repetition_constants import (
+    FIRST_INTERVAL_DAYS,
+    INITIAL_EASE_FACTOR,
+    LAPSE_RETRY_MINUTES,
+    MAX_GRADE,
+    MIN_EASE_FACTOR,
+    MIN_GRADE,
+    PASSING_GRADE,
+    SECOND_INTERVAL_DAYS,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class ReviewState:
+    interval_days: int = 0
+    ease_factor: float = INITIAL_EASE_FACTOR
+    # 連続して正解した回数
+    repetitions: int = 0
+    due_at: Optional[datetime] = None
+
+
+def schedule_review(state: ReviewState, grade: int, now: datetime) -> ReviewState:
+    """
+    SM-2アルゴリズムで、解答後の復習間隔・容易度・次の復習日時を求める関数
+
+    Args:
+        state (ReviewState): 解答前の状態
+        grade (int): 解答の評価（0: 全く思い出せない 〜 5: 完璧に思い出せた）
+        now (datetime): 解答日時
+
+    Returns:
+        ReviewState: 解答後の状態
+
+    Raises:
+        ValueError: 評価が範囲外の場合
+    """
+    if not MIN_GRADE <= grade <= MAX_GRADE:
+        raise ValueError(f"gradeは{MIN_GRADE}以上{MAX_GRADE}以下で指定してください")
+    miss = MAX_GRADE - grade
+    ease_factor = max(
+        MIN_EASE_FACTOR, state.ease_factor + 0.1 - miss * (0.08 + miss * 0.02)
+    )
+    if grade < PASSING_GRADE:
+        # 不正解の場合は最初から覚え直す
+        return ReviewState(
+            interval_days=0,
+            ease_factor=ease_factor,
+            repetitions=0,
+            due_at=now + timedelta(minutes=LAPSE_RETRY_MINUTES),
+        )
+    if state.repetitions == 0:
+        interval_days = FIRST_INTERVAL_DAYS
+    elif state.repetitions == 1:
+        interval_days = SECOND_INTERVAL_DAYS
+    else:
+        interval_days = max(1, round(state.interval_days * state.ease_factor))
+    return ReviewState(
+        interval_days=interval_days,
+        ease_factor=ease_factor,
+        repetitions=state.repetitions + 1,
+        due_at=now + timedelta(days=interval_days),
+    )
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from src.models.exceptions import ServiceException
+from src.models.spaced_repetition_constants import (
+    INITIAL_EASE_FACTOR,
+    MAX_GRADE,
+    MIN_GRADE,
+)
+from src.models.types import StudyCardResponse
+from src.services.firebase.schemas.flashcard_schema import FlashcardSchema
+from src.services.firebase.unit.firestore_flashcard import (
+    read_due_flashcard_docs,
+    update_flashcard_doc_in_transaction,
+)
+from src.services.spaced_repetition import ReviewState, schedule_review
+
+# 1回で取得できる復習待ちのフラッシュカードの上限
+MAX_STUDY_CARDS = 100
+
+
+def to_study_card_response(flashcard: FlashcardSchema) -> StudyCardResponse:
+    return StudyCardResponse(
+        flashcard_id=flashcard.flashcard_id,
+        word_id=flashcard.word_id,
+        using_meaning_id_list=flashcard.using_meaning_id_list,
+        current_media_id=flashcard.current_media_id,
+        check_flag=flashcard.check_flag,
+        interval_days=flashcard.interval_days,
+        ease_factor=flashcard.ease_factor,
+        repetitions=flashcard.repetitions,
+        due_at=flashcard.due_at.isoformat() if flashcard.due_at else None,
+    )
+
+
+async def get_next_study_cards(user_id: str, n: int) -> list[StudyCardResponse]:
+    """
+    復習日時を過ぎたフラッシュカードを、復習日時の古い順にn件取得する関数
+    createdBy・dueAtのインデックスを使った1回の範囲クエリで取得するため、デッキ全体は読み込まない
+
+    Args:
+        user_id (str): ユーザーID
+        n (int): 取得する件数
+
+    Returns:
+        list[StudyCardResponse]: 復習待ちのフラッシュカード
+
+    Raises:
+        ServiceException: 件数が範囲外の場合、または取得に失敗した場合
+    """
+    try:
+        if not 1 <= n <= MAX_STUDY_CARDS:
+            raise ServiceException(
+                f"nは1以上{MAX_STUDY_CARDS}以下で指定してください", "validation"
+            )
+        flashcards = await read_due_flashcard_docs(user_id, datetime.now(), n)
+        return [to_study_card_response(flashcard) for flashcard in flashcards]
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"復習待ちのフラッシュカードの取得中にエラーが発生しました: {str(e)}",
+            "general",
+        )
+
+
+async def review_flashcard(flashcard_id: str, grade: int) -> ReviewState:
+    """
+    解答の評価から次の復習日時を求め、フラッシュカードの復習スケジュールを更新する関数
+    トランザクション内で現在の状態を読み込んで更新するため、同時に解答されても評価が失われない
+
+    Args:
+        flashcard_id (str): フラッシュカードID
+        grade (int): 解答の評価（0〜5）
+
+    Returns:
+        ReviewState: 更新後の復習スケジュール
+
+    Raises:
+        ServiceException: 評価が範囲外の場合、またはフラッシュカードが存在しない場合
+    """
+    try:
+        if not isinstance(grade, int) or not MIN_GRADE <= grade <= MAX_GRADE:
+            raise ServiceException(
+                f"gradeは{MIN_GRADE}以上{MAX_GRADE}以下の整数で指定してください",
+                "validation",
+            )
+        now = datetime.now()
+
+        def build_update(flashcard: dict) -> dict:
+            state = schedule_review(
+                ReviewState(
+                    interval_days=flashcard.get("intervalDays") or 0,
+                    ease_factor=flashcard.get("easeFactor") or INITIAL_EASE_FACTOR,
+                    repetitions=flashcard.get("repetitions") or 0,
+                ),
+                grade,
+                now,
+            )
+            return {
+                "intervalDays": state.interval_days,
+                "easeFactor": state.ease_factor,
+                "repetitions": state.repetitions,
+                "dueAt": state.due_at,
+                "lastReviewedAt": now,
+                "updatedAt": now,
+            }
+
+        update = await update_flashcard_doc_in_transaction(flashcard_id, build_update)
+        return ReviewState(
+            interval_days=update["intervalDays"],
+            ease_factor=update["easeFactor"],
+            repetitions=update["repetitions"],
+            due_at=update["dueAt"],
+        )
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"復習結果の更新中にエラーが発生しました: {str(e)}", "general"
+        )
+
@@ -0,0 +1,228 @@
+import asyncio
+import base64
+import binascii
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
+from src.models.types import (
+    MediaResponse,
+    MeaningResponse,
+    StudySessionCardResponse,
+    StudySessionResponse,
+    WordResponse,
+)
+from src.services.firebase.unit.firestore_bulk import read_docs_by_ids
+from src.services.firebase.unit.firestore_flashcard import read_due_flashcard_docs
+from src.services.firebase.unit.firestore_media import pick_thumbnail_url
+from src.services.study_scheduler import MAX_STUDY_CARDS, to_study_card_response
+
+# 先読みしたページを保持する秒数と件数
+#   復習の結果は先読みしたページに反映されないため、学習中に次のページを取得するまでの時間のみ保持する
+STUDY_SESSION_PREFETCH_TTL_SECONDS = 120
+STUDY_SESSION_PREFETCH_MAX_ENTRIES = 256
+
+# (ユーザーID, 件数, カーソル) -> (期限, 先読みのタスク)
+_prefetched: "OrderedDict[tuple[str, int, str], tuple[float, asyncio.Task]]" = (
+    OrderedDict()
+)
+
+
+def encode_session_cursor(due_at: datetime, flashcard_id: str) -> str:
+    """
+    ページの最後のフラッシュカードの位置を、次のページのカーソルに変換する関数
+
+    Args:
+        due_at (datetime): 最後のフラッシュカードの復習日時
+        flashcard_id (str): 最後のフラッシュカードのID
+
+    Returns:
+        str: カーソル
+    """
+    payload = {"t": due_at.isoformat(), "id": flashcard_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_session_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    カーソルをフラッシュカードの位置に変換する関数
+
+    Args:
+        cursor (str): encode_session_cursorで作成したカーソル
+
+    Returns:
+        tuple[datetime, str]: (復習日時, フラッシュカードID)
+
+    Raises:
+        ServiceException: カーソルが不正な場合
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise ServiceException("カーソルが無効です", "validation")
+
+
+async def _build_study_session(
+    user_id: str, n: int, after: Optional[str]
+) -> StudySessionResponse:
+    after_due_at, after_flashcard_id = (
+        decode_session_cursor(after) if after else (None, None)
+    )
+    flashcards = await read_due_flashcard_docs(
+        user_id,
+        datetime.now(),
+        n,
+        after_due_at=after_due_at,
+        after_flashcard_id=after_flashcard_id,
+    )
+    if not flashcards:
+        return StudySessionResponse(cards=[])
+
+    # 単語・意味・メディアはコレクションごとにまとめて読み込む
+    words, meanings, medias = await asyncio.gather(
+        read_docs_by_ids(
+            "words",
+            [flashcard.word_id for flashcard in flashcards],
+            ["word", "coreMeaning", "explanation"],
+        ),
+        read_docs_by_ids(
+            "meanings",
+            [
+                meaning_id
+                for flashcard in flashcards
+                for meaning_id in flashcard.using_meaning_id_list
+            ],
+            ["pos", "translation", "pronunciation", "exampleEng", "exampleJpn"],
+        ),
+        read_docs_by_ids(
+            "medias",
+            [flashcard.current_media_id for flashcard in flashcards],
+            ["meaningId", "mediaUrls", "mediaVariants"],
+        ),
+    )
+
+    decode_meaning = get_decoder(MeaningResponse)
+    decode_media = get_decoder(MediaResponse)
+    cards = []
+    for flashcard in flashcards:
+        word = words.get(flashcard.word_id)
+        media = medias.get(flashcard.current_media_id)
+        if not word or not media:
+            continue  # 単語・メディアが削除されたフラッシュカードは出題しない
+        cards.append(
+            StudySessionCardResponse(
+                card=to_study_card_response(flashcard),
+                word=WordResponse(
+                    word_id=flashcard.word_id,
+                    word=word.get("word"),
+                    core_meaning=word.get("coreMeaning"),
+                    explanation=word.get("explanation"),
+                ),
+                meanings=[
+                    decode_meaning({**meanings[meaning_id], "meaningId": meaning_id})
+                    for meaning_id in flashcard.using_meaning_id_list
+                    if meaning_id in meanings
+                ],
+                media=decode_media({**media, "mediaId": flashcard.current_media_id}),
+                thumbnail_url=pick_thumbnail_url(media),
+            )
+        )
+    last = flashcards[-1]
+    next_cursor = (
+        encode_session_cursor(last.due_at, last.flashcard_id)
+        if len(flashcards) == n and last.due_at is not None
+        else None
+    )
+    return StudySessionResponse(cards=cards, next_cursor=next_cursor)
+
+
+async def _prefetch_study_session(
+    user_id: str, n: int, after: str
+) -> Optional[StudySessionResponse]:
+    try:
+        return await _build_study_session(user_id, n, after)
+    except Exception:
+        return None  # 先読みに失敗した場合は、次のページの取得時に改めて読み込む
+
+
+def _start_prefetch(user_id: str, n: int, after: str) -> None:
+    now = time.monotonic()
+    for key, (expires_at, task) in list(_prefetched.items()):
+        if expires_at <= now:
+            task.cancel()
+            del _prefetched[key]
+    key = (user_id, n, after)
+    if key in _prefetched:
+        return
+    task = asyncio.create_task(_prefetch_study_session(user_id, n, after))
+    _prefetched[key] = (now + STUDY_SESSION_PREFETCH_TTL_SECONDS, task)
+    while len(_prefetched) > STUDY_SESSION_PREFETCH_MAX_ENTRIES:
+        _, (_, oldest) = _prefetched.popitem(last=False)
+        oldest.cancel()
+
+
+async def _take_prefetched(
+    user_id: str, n: int, after: str
+) -> Optional[StudySessionResponse]:
+    entry = _prefetched.pop((user_id, n, after), None)
+    if entry is None:
+        return None
+    expires_at, task = entry
+    if expires_at <= time.monotonic():
+        task.cancel()
+        return None
+    # 先読みが完了していない場合は完了を待つ（同じページを二重に読み込まない）
+    return await task
+
+
+async def get_study_session(
+    user_id: str, n: int, after: Optional[str] = None, prefetch: bool = True
+) -> StudySessionResponse:
+    """
+    復習待ちのフラッシュカードn件について、単語・意味・メディアをまとめた学習用のデータを取得する関数
+    prefetchを指定した場合は次のページをバックグラウンドで読み込み、次のページの取得はメモリから返す
+
+    Args:
+        user_id (str): ユーザーID
+        n (int): 1ページの件数
+        after (Optional[str]): 前のページのnextCursor（Noneの場合は最初のページ）
+        prefetch (bool): 次のページを先読みするかどうか
+
+    Returns:
+        StudySessionResponse: 学習用のデータと次のページのカーソル
+
+    Raises:
+        ServiceException: 件数・カーソルが不正な場合、または取得に失敗した場合
+    """
+    try:
+        if not 1 <= n <= MAX_STUDY_CARDS:
+            raise ServiceException(
+                f"nは1以上{MAX_STUDY_CARDS}以下で指定してください", "validation"
+            )
+        session = await _take_prefetched(user_id, n, after) if after else None
+        if session is None:
+            session = await _build_study_session(user_id, n, after)
+        if prefetch and session.next_cursor is not None:
+            _start_prefetch(user_id, n, session.next_cursor)
+        return session
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"学習用のデータの取得中にエラーが発生しました: {str(e)}", "general"
+        )
+
+
+def close_study_session_prefetch() -> None:
+    """
+    実行中の先読みを中止し、先読みしたページを破棄する関数（アプリ終了時に呼び出す）
+    """
+    for _, task in _prefetched.values():
+        task.cancel()
+    _prefetched.clear()
@@ -0,0 +1,226 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from src.models.exceptions import ServiceException
+from src.models.serializer import get_decoder
+from src.models.types import (
+    MediaResponse,
+    MeaningResponse,
+    SyncFlashcardResponse,
+    SyncResponse,
+    WordResponse,
+)
+from src.services.firebase.unit.firestore_bulk import read_docs_by_ids
+from src.services.firebase.unit.firestore_flashcard import (
+    read_flashcard_docs_updated_since,
+)
+from src.services.firebase.unit.firestore_tombstone import (
+    TOMBSTONE_RETENTION_DAYS,
+    read_tombstone_flashcard_ids,
+)
+from src.services.firebase.unit.firestore_user import read_user_doc_stamp
+
+# 1回の同期で返すフラッシュカードの上限（超える場合はhas_moreで続きを取得させる）
+SYNC_PAGE_SIZE = 500
+
+# 直近の書き込みはこの秒数が経過してから同期の対象にする
+#   更新日時は書き込み前にサーバーで決まるため、同期の直後に過去の日時で書き込まれる変更を取りこぼさない
+SYNC_SETTLE_SECONDS = 10
+
+SYNC_TOKEN_VERSION = 1
+
+
+@dataclass(slots=True, frozen=True)
+class SyncCursor:
+    # 前回の同期で返したフラッシュカードの位置（updated_atまで同期済み）
+    updated_at: datetime
+    # 続きがある場合のみ、同じ更新日時のうち返し終えたフラッシュカードのID
+    flashcard_id: Optional[str]
+    # 削除の記録をこの日時まで返し済み
+    removed_until: datetime
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    # Firestoreから読み込んだ日時はUTCのタイムゾーン付きのため、書き込み時と同じ形式に揃える
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_sync_token(cursor: SyncCursor) -> str:
+    """
+    同期の位置を、クライアントがそのまま保持する文字列に変換する関数
+
+    Args:
+        cursor (SyncCursor): 同期の位置
+
+    Returns:
+        str: 同期トークン
+    """
+    payload = {
+        "v": SYNC_TOKEN_VERSION,
+        "t": cursor.updated_at.isoformat(),
+        "id": cursor.flashcard_id,
+        "d": cursor.removed_until.isoformat(),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token: str) -> SyncCursor:
+    """
+    同期トークンを同期の位置に変換する関数
+
+    Args:
+        token (str): encode_sync_tokenで作成した同期トークン
+
+    Returns:
+        SyncCursor: 同期の位置
+
+    Raises:
+        ServiceException: トークンが不正な場合
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload.get("v") != SYNC_TOKEN_VERSION:
+            raise ValueError("unsupported version")
+        return SyncCursor(
+            updated_at=_to_naive_utc(datetime.fromisoformat(payload["t"])),
+            flashcard_id=payload.get("id"),
+            removed_until=_to_naive_utc(datetime.fromisoformat(payload["d"])),
+        )
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise ServiceException("同期トークンが無効です", "validation")
+
+
+async def sync_flashcards(user_id: str, since: Optional[str] = None) -> SyncResponse:
+    """
+    前回の同期以降に変更・削除されたフラッシュカードを取得する関数
+    フラッシュカードはcreatedBy・updatedAtのインデックスを使った1回のクエリで取得し、
+    変更がない場合は単語・意味・メディアを読み込まない
+    メディアの生成・切り替えや意味の選択はフラッシュカードの更新日時を更新するため、
+    変更されたフラッシュカードが参照する単語・意味・メディアをまとめて返す
+
+    Args:
+        user_id (str): ユーザーID
+        since (Optional[str]): 前回の同期で返した同期トークン（Noneの場合は全件）
+
+    Returns:
+        SyncResponse: 変更内容と次回の同期トークン
+
+    Raises:
+        ServiceException: ユーザーが存在しない場合、またはトークンが不正な場合
+    """
+    try:
+        if not await read_user_doc_stamp(user_id):
+            raise ServiceException("指定されたユーザーは存在しません", "not_found")
+
+        now = datetime.now()
+        until = now - timedelta(seconds=SYNC_SETTLE_SECONDS)
+        cursor = decode_sync_token(since) if since else None
+        if cursor and cursor.removed_until < now - timedelta(
+            days=TOMBSTONE_RETENTION_DAYS
+        ):
+            cursor = None  # 削除の記録が失効しているため、全件同期からやり直す
+        reset = cursor is None
+
+        flashcards = await read_flashcard_docs_updated_since(
+            user_id,
+            until,
+            after_updated_at=cursor.updated_at if cursor else None,
+            after_flashcard_id=cursor.flashcard_id if cursor else None,
+            limit=SYNC_PAGE_SIZE,
+        )
+        removed_flashcard_ids = (
+            await read_tombstone_flashcard_ids(user_id, cursor.removed_until, until)
+            if cursor
+            else []
+        )
+
+        has_more = len(flashcards) == SYNC_PAGE_SIZE
+        if has_more:
+            next_cursor = SyncCursor(
+                updated_at=_to_naive_utc(flashcards[-1].updated_at),
+                flashcard_id=flashcards[-1].flashcard_id,
+                removed_until=until,
+            )
+        else:
+            next_cursor = SyncCursor(
+                updated_at=until, flashcard_id=None, removed_until=until
+            )
+
+        words, meanings, medias = {}, {}, {}
+        if flashcards:
+            words = await read_docs_by_ids(
+                "words",
+                [flashcard.word_id for flashcard in flashcards],
+                ["word", "coreMeaning", "explanation"],
+            )
+            meanings = await read_docs_by_ids(
+                "meanings",
+                [
+                    meaning_id
+                    for flashcard in flashcards
+                    for meaning_id in flashcard.using_meaning_id_list
+                ],
+                ["pos", "translation", "pronunciation", "exampleEng", "exampleJpn"],
+            )
+            medias = await read_docs_by_ids(
+                "medias",
+                [flashcard.current_media_id for flashcard in flashcards],
+                ["meaningId", "mediaUrls", "mediaVariants"],
+            )
+
+        decode_meaning = get_decoder(MeaningResponse)
+        decode_media = get_decoder(MediaResponse)
+        return SyncResponse(
+            flashcards=[
+                SyncFlashcardResponse(
+                    flashcard_id=flashcard.flashcard_id,
+                    word_id=flashcard.word_id,
+                    using_meaning_id_list=flashcard.using_meaning_id_list,
+                    current_media_id=flashcard.current_media_id,
+                    memo=flashcard.memo,
+                    version=flashcard.version,
+                    check_flag=flashcard.check_flag,
+                    updated_at=(
+                        flashcard.updated_at.isoformat()
+                        if flashcard.updated_at
+                        else None
+                    ),
+                )
+                for flashcard in flashcards
+            ],
+            words=[
+                WordResponse(
+                    word_id=word_id,
+                    word=word.get("word"),
+                    core_meaning=word.get("coreMeaning"),
+                    explanation=word.get("explanation"),
+                )
+                for word_id, word in words.items()
+            ],
+            meanings=[
+                decode_meaning({**meaning, "meaningId": meaning_id})
+                for meaning_id, meaning in meanings.items()
+            ],
+            medias=[
+                decode_media({**media, "mediaId": media_id})
+                for media_id, media in medias.items()
+            ],
+            removed_flashcard_ids=removed_flashcard_ids,
+            sync_token=encode_sync_token(next_cursor),
+            has_more=has_more,
+            reset=reset,
+        )
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"フラッシュカードの同期中に予期せぬエラーが発生しました: {str(e)}", "general"
+        )
@@ -0,0 +1,128 @@
+from datetime import datetime
+
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+from src.models.types import BatchUpdateFlashcardResult
+from src.services.firebase.unit.firestore_bulk import (
+    FIRESTORE_BATCH_LIMIT,
+    commit_writes_in_batches,
+    read_docs_by_ids,
+)
+
+# 1回のリクエストで指定できる操作の上限
+MAX_BATCH_OPERATIONS = 1000
+
+# 操作の種類と、更新するフィールドの値の検証
+#   操作はリクエストの{"op": "memo", "flashcardId": "...", "memo": "..."}のように、opと同名のキーで値を指定する
+_OPERATION_VALIDATORS = {
+    "checkFlag": lambda value: isinstance(value, bool),
+    "memo": lambda value: isinstance(value, str),
+    "usingMeaningIdList": lambda value: isinstance(value, list)
+    and all(isinstance(meaning_id, str) and meaning_id for meaning_id in value),
+}
+
+
+def _validate_operation(operation: object) -> tuple[str, str, object]:
+    """操作を検証し、(フラッシュカードID, フィールド名, 値)を返す"""
+    if not isinstance(operation, dict):
+        raise ValueError("操作はオブジェクトで指定してください")
+    op = operation.get("op")
+    if op not in _OPERATION_VALIDATORS:
+        raise ValueError(f"サポートされていない操作です: {op}")
+    flashcard_id = operation.get("flashcardId")
+    if not isinstance(flashcard_id, str) or not flashcard_id:
+        raise ValueError("flashcardIdが指定されていません")
+    if op not in operation or not _OPERATION_VALIDATORS[op](operation[op]):
+        raise ValueError(f"{op}の値が不正です")
+    return flashcard_id, op, operation[op]
+
+
+async def update_flashcards_in_batch(
+    operations: list,
+) -> list[BatchUpdateFlashcardResult]:
+    """
+    複数のフラッシュカードへの更新操作をまとめて反映する関数
+    すべての操作を先に検証し、存在するフラッシュカードへの更新のみをWriteBatchでまとめて書き込む
+    同じフラッシュカードへの操作は1件の書き込みにまとめる（同じフィールドは後の操作が優先）
+
+    Args:
+        operations (list): {"op": "checkFlag" | "memo" | "usingMeaningIdList", "flashcardId": str, <op>: 値} のリスト
+
+    Returns:
+        list[BatchUpdateFlashcardResult]: 操作ごとの結果（operationsと同じ順）
+
+    Raises:
+        ServiceException: 操作が指定されていない、または上限を超える場合
+    """
+    try:
+        if not isinstance(operations, list) or not operations:
+            raise ServiceException("operationsが指定されていません", "validation")
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            raise ServiceException(
+                f"operationsは{MAX_BATCH_OPERATIONS}件以下で指定してください",
+                "validation",
+            )
+
+        results: list[BatchUpdateFlashcardResult] = [None] * len(operations)
+        updates: dict[str, dict] = {}
+        indexes_by_flashcard_id: dict[str, list[int]] = {}
+        for index, operation in enumerate(operations):
+            try:
+                flashcard_id, field, value = _validate_operation(operation)
+            except ValueError as ve:
+                flashcard_id = (
+                    operation.get("flashcardId") if isinstance(operation, dict) else None
+                )
+                results[index] = BatchUpdateFlashcardResult(
+                    index=index,
+                    flashcard_id=flashcard_id if isinstance(flashcard_id, str) else None,
+                    status="invalid",
+                    error=str(ve),
+                )
+                continue
+            updates.setdefault(flashcard_id, {})[field] = value
+            indexes_by_flashcard_id.setdefault(flashcard_id, []).append(index)
+
+        # 存在しないドキュメントへのupdateはバッチ全体を失敗させるため、先に除外する
+        existing = await read_docs_by_ids("flashcards", list(updates), ["version"])
+        for flashcard_id in [fid for fid in updates if fid not in existing]:
+            del updates[flashcard_id]
+            for index in indexes_by_flashcard_id[flashcard_id]:
+                results[index] = BatchUpdateFlashcardResult(
+                    index=index,
+                    flashcard_id=flashcard_id,
+                    status="not_found",
+                    error="指定されたフラッシュカードが見つかりません",
+                )
+
+        now = datetime.now()
+        flashcard_ids = list(updates)
+        for start in range(0, len(flashcard_ids), FIRESTORE_BATCH_LIMIT):
+            chunk = flashcard_ids[start : start + FIRESTORE_BATCH_LIMIT]
+            status, error = "updated", None
+            try:
+                await commit_writes_in_batches(
+                    [
+                        (
+                            "update",
+                            db.collection("flashcards").document(flashcard_id),
+                            {**updates[flashcard_id], "updatedAt": now},
+                        )
+                        for flashcard_id in chunk
+                    ]
+                )
+            except ServiceException as se:
+                # 失敗したバッチの操作のみ失敗とし、他のバッチの結果は返す
+                status, error = "failed", se.message
+            for flashcard_id in chunk:
+                for index in indexes_by_flashcard_id[flashcard_id]:
+                    results[index] = BatchUpdateFlashcardResult(
+                        index=index, flashcard_id=flashcard_id, status=status, error=error
+                    )
+        return results
+    except ServiceException:
+        raise  # 再発生
+    except Exception as e:
+        raise ServiceException(
+            f"フラッシュカードの一括更新中にエラーが発生しました: {str(e)}", "general"
+        )
@@ -1,126 +1,238 @@
 import os
-import tempfile
+import shutil
+import subprocess
+from typing import Literal
 
 import cv2
-from google.genai import types
 
-from src.config.settings import genai_client
+from src.config.executors import run_in_media_process
 
+# フレームレート変更の方式
+#   opencv: OpenCVで全フレームをデコードし、間引いたフレームを再エンコードする
+#   ffmpeg: ffmpegのfpsフィルタでネイティブかつマルチスレッドに変換する
+FpsStrategy = Literal["opencv", "ffmpeg"]
 
-def reduce_fps_to_10(input_video: types.Video) -> bytes:
+TARGET_FPS = 10.0
+
+# ffmpegの処理がこの秒数を超えた場合は失敗とみなす
+FFMPEG_TIMEOUT_SECONDS = 120
+
+
+def _validate_output(output_path: str) -> int:
+    # 出力ファイルの存在確認
+    if not os.path.exists(output_path):
+        raise ValueError(f"出力ファイルが作成されませんでした: {output_path}")
+
+    output_file_size = os.path.getsize(output_path)
+
+    if output_file_size == 0:
+        raise ValueError("出力ファイルのサイズが0バイトです")
+
+    return output_file_size
+
+
+def reduce_fps_with_opencv(
+    input_path: str, output_path: str, target_fps: float = TARGET_FPS
+) -> int:
     """
-    入力動画のフレームレートを10fpsに変更する関数
+    OpenCVでフレームを間引いてフレームレートを変更する関数
+    フレーム単位で読み書きするため、動画全体をメモリに保持しない
 
     Args:
-        input_video (types.Video): Google Generative AIのVideo型オブジェクト
+        input_path (str): 入力動画のファイルパス
+        output_path (str): 出力先のファイルパス
+        target_fps (float): 変更後のフレームレート
 
     Returns:
-        bytes: フレームレートが10fpsに変更された動画のバイトデータ
-
-    Raises:
-        Exception: 動画処理中にエラーが発生した場合
+        int: 出力ファイルのバイト数
     """
+    cap = cv2.VideoCapture(input_path)
+    out = None
     try:
-        # 一時ファイルを作成して入力動画を保存
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_input:
-            temp_input_path = temp_input.name
-
-        # 動画データを取得（URIの場合はダウンロード、video_bytesがある場合はそれを使用）
-        if input_video.video_bytes:
-            video_data = input_video.video_bytes
-        elif input_video.uri:
-            # genai_clientを使用して認証されたダウンロードを実行
-            video_data = genai_client.files.download(file=input_video)
-        else:
-            raise ValueError(
-                "動画データまたはURIが見つかりません"
-            )  # 動画データを一時ファイルに書き込み
-        with open(temp_input_path, "wb") as f:
-            f.write(video_data)
-
-        # 出力用の一時ファイルを作成
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_output:
-            temp_output_path = temp_output.name
-
-        # OpenCVで動画を読み込み
-        cap = cv2.VideoCapture(temp_input_path)
-
         if not cap.isOpened():
-            raise ValueError(
-                f"OpenCVで動画ファイルを開けませんでした: {temp_input_path}"
-            )
+            raise ValueError(f"OpenCVで動画ファイルを開けませんでした: {input_path}")
 
         # 元動画の情報を取得
         original_fps = cap.get(cv2.CAP_PROP_FPS)
         frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
         if original_fps <= 0 or frame_width <= 0 or frame_height <= 0:
             raise ValueError(
                 f"無効な動画パラメータ: FPS={original_fps}, Size={frame_width}x{frame_height}"
-            )  # 10fpsに変更するためのフレーム間隔を計算
-        target_fps = 10.0
+            )
+        # 指定fpsに変更するためのフレーム間隔を計算
         frame_interval = max(1, int(original_fps / target_fps))
         # 動画書き込み用のVideoWriterを設定（H.264コーデック）
-        fourcc = cv2.VideoWriter_fourcc(*"avc1")  # H.264コーデック
+        fourcc = cv2.VideoWriter_fourcc(*"avc1")
         out = cv2.VideoWriter(
-            temp_output_path, fourcc, target_fps, (frame_width, frame_height)
+            output_path, fourcc, target_fps, (frame_width, frame_height)
         )
 
         if not out.isOpened():
             raise ValueError("VideoWriterの初期化に失敗しました")
 
         frame_count = 0
-        written_frames = 0
         while True:
+            # 書き出さないフレームはgrabのみで読み飛ばし、デコード結果の取得を省く
+            if frame_count % frame_interval != 0:
+                if not cap.grab():
+                    break
+                frame_count += 1
+                continue
+
             ret, frame = cap.read()
             if not ret:
                 break
+            out.write(frame)
+            frame_count += 1
+    finally:
+        cap.release()
+        if out is not None:
+            out.release()
 
-            # 指定した間隔でフレームを抽出
-            if frame_count % frame_interval == 0:
-                out.write(frame)
-                written_frames += 1
-                # if written_frames % 10 == 0:
-                #     print(f"[DEBUG] 処理中... 書き込みフレーム数: {written_frames}")
+    return _validate_output(output_path)
 
-            frame_count += 1
 
-        # リソースを解放
-        cap.release()
-        out.release()
+def reduce_fps_with_ffmpeg(
+    input_path: str, output_path: str, target_fps: float = TARGET_FPS
+) -> int:
+    """
+    ffmpegのfpsフィルタでフレームレートを変更する関数
+    デコード・エンコードはffmpeg内でマルチスレッドに実行される
 
-        # 出力ファイルの存在確認
-        if not os.path.exists(temp_output_path):
-            raise ValueError(f"出力ファイルが作成されませんでした: {temp_output_path}")
+    Args:
+        input_path (str): 入力動画のファイルパス
+        output_path (str): 出力先のファイルパス
+        target_fps (float): 変更後のフレームレート
 
-        output_file_size = os.path.getsize(temp_output_path)
+    Returns:
+        int: 出力ファイルのバイト数
+    """
+    if shutil.which("ffmpeg") is None:
+        raise ValueError("ffmpegがインストールされていません")
+
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        input_path,
+        "-vf",
+        f"fps={target_fps}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-pix_fmt",
+        "yuv420p",
+        "-movflags",
+        "+faststart",
+        "-an",
+        output_path,
+    ]
+    result = subprocess.run(
+        command, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS
+    )
+    if result.returncode != 0:
+        raise ValueError(
+            f"ffmpegの実行に失敗しました: {result.stderr.decode(errors='ignore')}"
+        )
 
-        if output_file_size == 0:
-            raise ValueError("出力ファイルのサイズが0バイトです")
+    return _validate_output(output_path)
 
-        # 処理済み動画をバイトデータとして読み込み
-        with open(temp_output_path, "rb") as f:
-            output_video_bytes = f.read()
 
-        # ファイルサイズの検証
-        if len(output_video_bytes) != output_file_size:
-            raise ValueError(
-                f"ファイル読み込みサイズが不一致: 期待値={output_file_size}, 実際={len(output_video_bytes)}"
-            )
+def reduce_fps_to_10(
+    input_path: str, output_path: str, strategy: FpsStrategy = "opencv"
+) -> int:
+    """
+    入力動画のフレームレートを10fpsに変更する関数
 
-        # 一時ファイルを削除
-        os.unlink(temp_input_path)
-        os.unlink(temp_output_path)
+    Args:
+        input_path (str): 入力動画のファイルパス
+        output_path (str): 10fpsに変更した動画の出力先ファイルパス
+        strategy (FpsStrategy): 変換方式
 
-        return output_video_bytes
+    Returns:
+        int: 出力ファイルのバイト数
 
+    Raises:
+        Exception: 動画処理中にエラーが発生した場合
+    """
+    try:
+        if strategy == "opencv":
+            return reduce_fps_with_opencv(input_path, output_path)
+        if strategy == "ffmpeg":
+            return reduce_fps_with_ffmpeg(input_path, output_path)
+        raise ValueError(f"サポートされていない変換方式です: {strategy}")
     except Exception as e:
-        # エラーが発生した場合、一時ファイルを削除
-        if "temp_input_path" in locals() and os.path.exists(temp_input_path):
-            os.unlink(temp_input_path)
-        if "temp_output_path" in locals() and os.path.exists(temp_output_path):
-            os.unlink(temp_output_path)
-
         raise Exception(f"フレームレート変更中にエラーが発生しました: {str(e)}")
+
+
+async def reduce_fps_to_10_in_process(
+    input_path: str, output_path: str, strategy: FpsStrategy = "opencv"
+) -> int:
+    """
+    フレームレート変更をプロセスプールで実行する関数
+    イベントループをブロックしない
+
+    Args:
+        input_path (str): 入力動画のファイルパス
+        output_path (str): 10fpsに変更した動画の出力先ファイルパス
+        strategy (FpsStrategy): 変換方式
+
+    Returns:
+        int: 出力ファイルのバイト数
+    """
+    return await run_in_media_process(
+        reduce_fps_to_10, input_path, output_path, strategy
+    )
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    import numpy as np
+
+    # サンプル動画（Veoの出力に近い 24fps / 5秒）を生成して各方式を比較する
+    sample_clips = {
+        "720p_5s": (1280, 720, 24.0, 5),
+        "480p_8s": (854, 480, 24.0, 8),
+    }
+    strategies: list[FpsStrategy] = ["opencv", "ffmpeg"]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for clip_name, (width, height, fps, seconds) in sample_clips.items():
+            clip_path = os.path.join(work_dir, f"{clip_name}.mp4")
+            writer = cv2.VideoWriter(
+                clip_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
+            )
+            for i in range(int(fps * seconds)):
+                frame = np.zeros((height, width, 3), dtype=np.uint8)
+                cv2.circle(
+                    frame,
+                    (i * 7 % width, height // 2),
+                    height // 6,
+                    (0, 128 + i % 128, 255),
+                    -1,
+                )
+                writer.write(frame)
+            writer.release()
+            input_size = os.path.getsize(clip_path)
+
+            for strategy in strategies:
+                output_path = os.path.join(work_dir, f"{clip_name}_{strategy}.mp4")
+                start = time.perf_counter()
+                try:
+                    output_size = reduce_fps_to_10(clip_path, output_path, strategy)
+                except Exception as e:
+                    print(f"{clip_name:>8} {strategy:>7}: 失敗 ({e})")
+                    continue
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{clip_name:>8} {strategy:>7}: {elapsed * 1000:8.1f} ms  "
+                    f"{input_size:>9} bytes -> {output_size:>9} bytes"
+                )
@@ -0,0 +1,45 @@
+import os
+
+from google.cloud.storage import Blob
+from google.genai import types
+
+from src.config.settings import bucket, genai_client
+
+# Cloud Storageからダウンロードする際のチャンクサイズ（256KBの倍数である必要がある）
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def write_video_to_file(video: types.Video, file_path: str) -> int:
+    """
+    生成された動画をローカルファイルに書き出す関数（同期処理）
+    gs:// のURIはCloud Storageからチャンク単位でストリーミングし、メモリに全体を保持しない
+
+    Args:
+        video (types.Video): Google Generative AIのVideo型オブジェクト
+        file_path (str): 書き出し先のファイルパス
+
+    Returns:
+        int: 書き出したファイルのバイト数
+
+    Raises:
+        ValueError: 動画データまたはURIが見つからない場合
+    """
+    if video.video_bytes:
+        with open(file_path, "wb") as f:
+            f.write(video.video_bytes)
+    elif video.uri and video.uri.startswith("gs://"):
+        # Cloud Storage上の出力はチャンク単位でダウンロード
+        blob = Blob.from_string(video.uri, client=bucket.client)
+        blob.chunk_size = DOWNLOAD_CHUNK_SIZE
+        blob.download_to_filename(file_path)
+    elif video.uri:
+        # genai_clientを使用して認証されたダウンロードを実行
+        video_data = genai_client.files.download(file=video)
+        with open(file_path, "wb") as f:
+            f.write(video_data)
+        del video_data
+    else:
+        raise ValueError("動画データまたはURIが見つかりません")
+
+    return os.path.getsize(file_path)
+
@@ -0,0 +1,91 @@
+import os
+
+import cv2
+from PIL import Image
+
+# ポスター画像の設定（動画の冒頭は暗転していることがあるため少し後のフレームを使う）
+POSTER_POSITION_SECONDS = 0.5
+POSTER_QUALITY = 80
+
+# プレビュー（アニメーションWebP）の設定
+PREVIEW_FRAME_COUNT = 8
+PREVIEW_FRAME_DURATION_MS = 250
+PREVIEW_MAX_WIDTH = 320
+PREVIEW_QUALITY = 50
+
+
+def _to_pil_image(frame) -> Image.Image:
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def extract_video_previews(video_path: str, poster_path: str, preview_path: str) -> None:
+    """
+    動画からポスター画像（JPEG）と軽量プレビュー（アニメーションWebP）を生成する関数
+    プロセスプール上で実行されることを想定し、設定値以外のモジュールには依存しない
+
+    Args:
+        video_path (str): 入力動画のファイルパス
+        poster_path (str): ポスター画像の出力先ファイルパス
+        preview_path (str): プレビューの出力先ファイルパス
+
+    Raises:
+        ValueError: 動画を読み込めなかった場合
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"OpenCVで動画ファイルを開けませんでした: {video_path}")
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 1.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total_frames <= 0:
+            raise ValueError("動画のフレーム数を取得できませんでした")
+
+        poster_index = min(int(fps * POSTER_POSITION_SECONDS), total_frames - 1)
+        step = max(1, total_frames // PREVIEW_FRAME_COUNT)
+        preview_indices = set(range(0, total_frames, step)[:PREVIEW_FRAME_COUNT])
+
+        poster_frame = None
+        preview_frames = []
+        last_index = max(preview_indices | {poster_index})
+        frame_index = 0
+        # 必要なフレームだけをデコードし、それ以外はgrabで読み飛ばす
+        while frame_index <= last_index:
+            if frame_index != poster_index and frame_index not in preview_indices:
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_index == poster_index:
+                poster_frame = _to_pil_image(frame)
+            if frame_index in preview_indices:
+                preview_frame = _to_pil_image(frame)
+                if preview_frame.width > PREVIEW_MAX_WIDTH:
+                    preview_frame.thumbnail(
+                        (PREVIEW_MAX_WIDTH, PREVIEW_MAX_WIDTH),
+                        Image.Resampling.LANCZOS,
+                    )
+                preview_frames.append(preview_frame)
+            frame_index += 1
+    finally:
+        cap.release()
+
+    if poster_frame is None or not preview_frames:
+        raise ValueError("ポスター画像・プレビュー用のフレームを取得できませんでした")
+
+    poster_frame.save(poster_path, format="JPEG", quality=POSTER_QUALITY, optimize=True)
+    preview_frames[0].save(
+        preview_path,
+        format="WEBP",
+        save_all=True,
+        append_images=preview_frames[1:],
+        duration=PREVIEW_FRAME_DURATION_MS,
+        loop=0,
+        quality=PREVIEW_QUALITY,
+    )
+
+    if not os.path.exists(poster_path) or not os.path.exists(preview_path):
+        raise ValueError("ポスター画像・プレビューが作成されませんでした")
@@ -0,0 +1,318 @@
+import bisect
+import heapq
+import re
+import unicodedata
+from typing import Iterable, Iterator, Optional
+
+# 単語として扱うトークン（英字で始まり、英字・アポストロフィ・ハイフンのみを含む）
+_WORD_PATTERN = re.compile(r"[a-z][a-z'\-]*")
+
+# トークンの前後から取り除く記号（引用符・括弧・句読点）
+_STRIP_CHARACTERS = "\"'`“”‘’()[]{}<>.,;:!?…-–—"
+
+_VOWELS = frozenset("aeiou")
+
+# 規則変化では作れない変化形（原形 -> 変化形）
+IRREGULAR_FORMS: dict[str, tuple[str, ...]] = {
+    # 動詞
+    "be": ("am", "is", "are", "was", "were", "been", "being"),
+    "have": ("has", "had", "having"),
+    "do": ("does", "did", "done", "doing"),
+    "go": ("goes", "went", "gone", "going"),
+    "arise": ("arose", "arisen"),
+    "awake": ("awoke", "awoken"),
+    "bear": ("bore", "born", "borne"),
+    "beat": ("beaten",),
+    "become": ("became",),
+    "begin": ("began", "begun"),
+    "bend": ("bent",),
+    "bet": (),
+    "bind": ("bound",),
+    "bite": ("bit", "bitten"),
+    "bleed": ("bled",),
+    "blow": ("blew", "blown"),
+    "break": ("broke", "broken"),
+    "breed": ("bred",),
+    "bring": ("brought",),
+    "build": ("built",),
+    "burn": ("burnt",),
+    "buy": ("bought",),
+    "catch": ("caught",),
+    "choose": ("chose", "chosen"),
+    "cling": ("clung",),
+    "come": ("came",),
+    "creep": ("crept",),
+    "deal": ("dealt",),
+    "dig": ("dug",),
+    "draw": ("drew", "drawn"),
+    "dream": ("dreamt",),
+    "drink": ("drank", "drunk"),
+    "drive": ("drove", "driven"),
+    "eat": ("ate", "eaten"),
+    "fall": ("fell", "fallen"),
+    "feed": ("fed",),
+    "feel": ("felt",),
+    "fight": ("fought",),
+    "find": ("found",),
+    "flee": ("fled",),
+    "fly": ("flew", "flown"),
+    "forbid": ("forbade", "forbidden"),
+    "forget": ("forgot", "forgotten"),
+    "forgive": ("forgave", "forgiven"),
+    "freeze": ("froze", "frozen"),
+    "get": ("got", "gotten"),
+    "give": ("gave", "given"),
+    "grind": ("ground",),
+    "grow": ("grew", "grown"),
+    "hang": ("hung",),
+    "hear": ("heard",),
+    "hide": ("hid", "hidden"),
+    "hold": ("held",),
+    "keep": ("kept",),
+    "kneel": ("knelt",),
+    "know": ("knew", "known"),
+    "lay": ("laid",),
+    "lead": ("led",),
+    "lean": ("leant",),
+    "leap": ("leapt",),
+    "learn": ("learnt",),
+    "leave": ("left",),
+    "lend": ("lent",),
+    "lie": ("lay", "lain", "lying"),
+    "light": ("lit",),
+    "lose": ("lost",),
+    "make": ("made",),
+    "mean": ("meant",),
+    "meet": ("met",),
+    "pay": ("paid",),
+    "prove": ("proven",),
+    "ride": ("rode", "ridden"),
+    "ring": ("rang", "rung"),
+    "rise": ("rose", "risen"),
+    "run": ("ran",),
+    "say": ("said",),
+    "see": ("saw", "seen"),
+    "seek": ("sought",),
+    "sell": ("sold",),
+    "send": ("sent",),
+    "sew": ("sewn",),
+    "shake": ("shook", "shaken"),
+    "shine": ("shone",),
+    "shoot": ("shot",),
+    "show": ("shown",),
+    "shrink": ("shrank", "shrunk"),
+    "sing": ("sang", "sung"),
+    "sink": ("sank", "sunk"),
+    "sit": ("sat",),
+    "sleep": ("slept",),
+    "slide": ("slid",),
+    "speak": ("spoke", "spoken"),
+    "speed": ("sped",),
+    "spend": ("spent",),
+    "spin": ("spun",),
+    "spring": ("sprang", "sprung"),
+    "stand": ("stood",),
+    "steal": ("stole", "stolen"),
+    "stick": ("stuck",),
+    "sting": ("stung",),
+    "stink": ("stank", "stunk"),
+    "strike": ("struck", "stricken"),
+    "swear": ("swore", "sworn"),
+    "sweep": ("swept",),
+    "swim": ("swam", "swum"),
+    "swing": ("swung",),
+    "take": ("took", "taken"),
+    "teach": ("taught",),
+    "tear": ("tore", "torn"),
+    "tell": ("told",),
+    "think": ("thought",),
+    "throw": ("threw", "thrown"),
+    "understand": ("understood",),
+    "wake": ("woke", "woken"),
+    "wear": ("wore", "worn"),
+    "weep": ("wept",),
+    "win": ("won",),
+    "wind": ("wound",),
+    "write": ("wrote", "written"),
+    # 名詞
+    "child": ("children",),
+    "foot": ("feet",),
+    "goose": ("geese",),
+    "knife": ("knives",),
+    "leaf": ("leaves",),
+    "life": ("lives",),
+    "man": ("men",),
+    "mouse": ("mice",),
+    "ox": ("oxen",),
+    "person": ("people",),
+    "tooth": ("teeth",),
+    "wife": ("wives",),
+    "wolf": ("wolves",),
+    "woman": ("women",),
+    # 形容詞・副詞
+    "bad": ("worse", "worst"),
+    "far": ("farther", "farthest", "further", "furthest"),
+    "good": ("better", "best"),
+    "little": ("less", "least"),
+    "many": ("more", "most"),
+    "much": ("more", "most"),
+    "well": ("better", "best"),
+}
+
+# 規則変化の語尾（複数形・三単現・進行形・過去形）
+REGULAR_SUFFIXES = ("s", "ing", "ed")
+
+# 規則変化と同じ綴りだが、原形とは別の見出し語として扱う単語
+INDEPENDENT_HEADWORDS = frozenset(
+    {
+        "bed",
+        "best",
+        "building",
+        "ceiling",
+        "clothes",
+        "during",
+        "evening",
+        "feeling",
+        "glasses",
+        "goods",
+        "interesting",
+        "meeting",
+        "morning",
+        "news",
+        "painting",
+        "red",
+        "savings",
+        "wedding",
+    }
+)
+
+
+def normalize_word(token: str) -> Optional[str]:
+    """
+    ページから抽出したトークンを単語の表記に正規化する関数
+
+    Args:
+        token (str): トークン（例: "“Cats,"）
+
+    Returns:
+        Optional[str]: 正規化した単語（例: "cats"）、単語でない場合はNone
+    """
+    word = unicodedata.normalize("NFKC", token).strip().strip(_STRIP_CHARACTERS)
+    word = word.replace("’", "'").lower()
+    return word if _WORD_PATTERN.fullmatch(word) else None
+
+
+def _doubles_final_consonant(lemma: str) -> bool:
+    # 子音+母音+子音で終わる短い単語（run -> running, big -> bigger）は末尾の子音を重ねる
+    return (
+        len(lemma) >= 3
+        and lemma[-1] not in _VOWELS
+        and lemma[-1] not in "wxy"
+        and lemma[-2] in _VOWELS
+        and lemma[-3] not in _VOWELS
+    )
+
+
+def inflections(lemma: str) -> Iterator[str]:
+    """
+    原形から規則変化・不規則変化の変化形を生成する関数
+    品詞を区別せず、名詞の複数形・動詞の三単現・過去形・進行形・形容詞の比較級・最上級をすべて生成する
+
+    Args:
+        lemma (str): 正規化済みの原形
+
+    Yields:
+        str: 変化形（存在しない語形を含む場合がある）
+    """
+    yield from IRREGULAR_FORMS.get(lemma, ())
+    if "'" in lemma or "-" in lemma or len(lemma) < 2:
+        return
+    last = lemma[-1]
+    if lemma.endswith(("s", "x", "z", "ch", "sh", "o")):
+        yield lemma + "es"
+    elif last == "y" and lemma[-2] not in _VOWELS:
+        yield lemma[:-1] + "ies"
+    else:
+        yield lemma + "s"
+    if lemma.endswith(("f", "fe")):
+        yield lemma.rstrip("e")[:-1] + "ves"
+
+    if last == "e":
+        stem = lemma[:-1]
+        yield from (lemma + "d", lemma + "r", lemma + "st")
+        yield stem[:-1] + "ying" if lemma.endswith("ie") else stem + "ing"
+        if lemma.endswith("ee"):
+            yield lemma + "ing"
+        return
+    if last == "y" and lemma[-2] not in _VOWELS:
+        stem = lemma[:-1] + "i"
+        yield from (stem + "ed", stem + "er", stem + "est", lemma + "ing")
+        return
+    stems = [lemma]
+    if _doubles_final_consonant(lemma):
+        stems.append(lemma + last)
+    for stem in stems:
+        yield from (stem + "ed", stem + "ing", stem + "er", stem + "est")
+
+
+def is_regular_inflection(word: str, lemma: str) -> bool:
+    """
+    単語が原形の規則変化（-s・-es・-ing・-ed）かどうかを判定する関数
+    不規則変化（"saw" -> "see"など）と、別の見出し語として扱う単語は規則変化とみなさない
+
+    Args:
+        word (str): 正規化済みの単語
+        lemma (str): 正規化済みの原形
+
+    Returns:
+        bool: 規則変化の場合はTrue
+    """
+    if word == lemma or word in INDEPENDENT_HEADWORDS:
+        return False
+    if not word.endswith(REGULAR_SUFFIXES) or word in IRREGULAR_FORMS.get(lemma, ()):
+        return False
+    return word in inflections(lemma)
+
+
+def build_lemma_table(lemmas: Iterable[str]) -> dict[str, str]:
+    """
+    原形の一覧から、変化形 -> 原形の対応表を作成する関数
+    原形そのものは常に自身に対応し、複数の原形から同じ変化形が生成される場合は先の原形を優先する
+
+    Args:
+        lemmas (Iterable[str]): 正規化済みの原形（登録済みの単語）
+
+    Returns:
+        dict[str, str]: 変化形（原形を含む） -> 原形
+    """
+    lemma_list = list(dict.fromkeys(lemmas))
+    table = {lemma: lemma for lemma in lemma_list}
+    for lemma in lemma_list:
+        for form in inflections(lemma):
+            table.setdefault(form, lemma)
+    return table
+
+
+def top_completions(
+    sorted_words: list[str], frequencies: dict[str, float], prefix: str, k: int
+) -> list[str]:
+    """
+    ソート済みの単語の一覧から、前方一致する単語を頻度の高い順にk件取得する関数
+    二分探索で前方一致する範囲を求めるため、範囲外の単語は参照しない
+
+    Args:
+        sorted_words (list[str]): ソート済みの正規化した単語
+        frequencies (dict[str, float]): 単語ごとの頻度（ないものは0とみなす）
+        prefix (str): 正規化した前方一致の文字列
+        k (int): 取得する件数
+
+    Returns:
+        list[str]: 頻度の高い順（同じ頻度は辞書順）の単語
+    """
+    start = bisect.bisect_left(sorted_words, prefix)
+    end = bisect.bisect_left(sorted_words, prefix + "\uffff", lo=start)
+    return heapq.nsmallest(
+        k,
+        sorted_words[start:end],
+        key=lambda word: (-frequencies.get(word, 0.0), word),
+    )
@@ -0,0 +1,239 @@
+import asyncio
+import bisect
+import threading
+from typing import Optional
+
+from src.config.settings import db
+from src.models.exceptions import ServiceException
+from src.services.word_forms import (
+    build_lemma_table,
+    inflections,
+    normalize_word,
+    top_completions,
+)
+
+# 初回のスナップショット（全単語）を待つ秒数
+WORD_INDEX_LOAD_TIMEOUT_SECONDS = 30
+
+# 前方一致検索で返す単語数の上限
+MAX_WORD_SEARCH_LIMIT = 50
+
+# 上位の候補をキャッシュする前方一致の最大文字数（短い前方一致ほど一致する範囲が広いため）
+COMPLETION_CACHE_MAX_PREFIX_LENGTH = 2
+
+# 単語の一覧はFirestoreのスナップショットリスナーで更新され、更新はリスナーのスレッドから行われる
+_lock = threading.Lock()
+_loaded = threading.Event()
+_watch = None
+# 初回の読み込みを待つ呼び出し元 (イベントループ, Future)（リスナーのスレッドから完了させる）
+_load_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+# ドキュメントID -> 正規化した単語
+_words_by_id: dict[str, str] = {}
+# 正規化した単語 -> 単語ID
+_word_ids: dict[str, str] = {}
+# 変化形（原形を含む） -> 原形
+_lemmas: dict[str, str] = {}
+# 正規化した単語のソート済みの一覧と頻度
+_sorted_words: list[str] = []
+_frequencies: dict[str, float] = {}
+# (前方一致, 件数) -> 候補
+_completion_cache: dict[tuple[str, int], list[str]] = {}
+
+
+def _frequency_of(word_doc: dict) -> float:
+    frequency = word_doc.get("frequency")
+    return float(frequency) if isinstance(frequency, (int, float)) else 0.0
+
+
+def _add_word(doc_id: str, word: str, frequency: float) -> None:
+    _words_by_id[doc_id] = word
+    _frequencies[word] = max(frequency, _frequencies.get(word, 0.0))
+    if word in _word_ids:
+        return  # 同じ表記の単語が複数ある場合は最初の1件のみを使う
+    _word_ids[word] = doc_id
+    bisect.insort(_sorted_words, word)
+    _lemmas[word] = word
+    for form in inflections(word):
+        _lemmas.setdefault(form, word)
+
+
+def _remove_word(doc_id: str) -> None:
+    global _lemmas
+    word = _words_by_id.pop(doc_id, None)
+    if word is None or _word_ids.get(word) != doc_id:
+        return
+    del _word_ids[word]
+    _frequencies.pop(word, None)
+    index = bisect.bisect_left(_sorted_words, word)
+    if index < len(_sorted_words) and _sorted_words[index] == word:
+        del _sorted_words[index]
+    # 削除した単語の変化形が他の単語に対応する場合があるため、対応表は作り直す（削除は稀）
+    _lemmas = build_lemma_table(_sorted_words)
+
+
+def _rebuild(doc_snapshots) -> None:
+    global _lemmas, _sorted_words
+    _words_by_id.clear()
+    _word_ids.clear()
+    _frequencies.clear()
+    for doc in doc_snapshots:
+        word_doc = doc.to_dict() or {}
+        word = normalize_word(word_doc.get("word") or "")
+        if not word:
+            continue
+        _words_by_id[doc.id] = word
+        _word_ids.setdefault(word, doc.id)
+        _frequencies[word] = max(_frequency_of(word_doc), _frequencies.get(word, 0.0))
+    _sorted_words = sorted(_word_ids)
+    _lemmas = build_lemma_table(_sorted_words)
+
+
+def _notify_loaded(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _on_snapshot(doc_snapshots, changes, read_time) -> None:
+    with _lock:
+        if not _loaded.is_set():
+            # 初回は全単語がまとめて届くため、1件ずつ挿入せずに一覧を作成する
+            _rebuild(doc_snapshots)
+            changes = []
+        for change in changes:
+            doc = change.document
+            if change.type.name == "REMOVED":
+                _remove_word(doc.id)
+                continue
+            word_doc = doc.to_dict() or {}
+            word = normalize_word(word_doc.get("word") or "")
+            if _words_by_id.get(doc.id) == word:
+                # 表記が変わらない更新（意味IDの追加など）は頻度のみ反映する
+                #   同じ表記の単語が複数ある場合は、追加時と同じく最も高い頻度を使う
+                _frequencies[word] = max(
+                    _frequency_of(word_doc), _frequencies.get(word, 0.0)
+                )
+                continue
+            _remove_word(doc.id)
+            if word:
+                _add_word(doc.id, word, _frequency_of(word_doc))
+        _completion_cache.clear()
+        _loaded.set()
+        waiters = _load_waiters[:]
+        _load_waiters.clear()
+    for loop, future in waiters:
+        try:
+            loop.call_soon_threadsafe(_notify_loaded, future)
+        except RuntimeError:
+            pass  # 待っていたイベントループが終了している場合
+
+
+async def ensure_word_index() -> None:
+    """
+    単語の一覧のスナップショットリスナーを開始し、初回の読み込みを待つ関数
+    開始後は単語の追加・更新・削除がリスナーで反映されるため、読み込み直しは不要
+    読み込みはイベントループ上で待つため、待っている間もスレッドプールを使わない
+
+    Raises:
+        ServiceException: 単語の読み込みに失敗した場合
+    """
+    global _watch
+    if _loaded.is_set():
+        return
+    loop = asyncio.get_running_loop()
+    waiter = (loop, loop.create_future())
+    with _lock:
+        if _loaded.is_set():
+            return
+        _load_waiters.append(waiter)
+        if _watch is None:
+            _watch = db.collection("words").on_snapshot(_on_snapshot)
+    try:
+        await asyncio.wait_for(waiter[1], WORD_INDEX_LOAD_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise ServiceException("単語の一覧の読み込みがタイムアウトしました", "external_api")
+    finally:
+        with _lock:
+            if waiter in _load_waiters:
+                _load_waiters.remove(waiter)
+
+
+def close_word_index() -> None:
+    """
+    単語の一覧のスナップショットリスナーを停止する関数（アプリ終了時に呼び出す）
+    """
+    global _watch
+    with _lock:
+        if _watch is not None:
+            _watch.unsubscribe()
+        _watch = None
+
+
+async def resolve_word(token: str) -> Optional[tuple[str, str]]:
+    """
+    単語の表記（大文字・記号・変化形を含む）を登録済みの単語に解決する関数
+    変化形 -> 原形の対応表はメモリ上に作成済みのため、解決はdictの参照のみで行う
+
+    Args:
+        token (str): 単語の表記（例: "Running", "cats", "ran"）
+
+    Returns:
+        Optional[tuple[str, str]]: (原形, 単語ID)、登録済みの単語に解決できない場合はNone
+
+    Raises:
+        ServiceException: 単語の読み込みに失敗した場合
+    """
+    word = normalize_word(token)
+    if not word:
+        return None
+    await ensure_word_index()
+    with _lock:
+        lemma = _lemmas.get(word)
+        if lemma is None:
+            return None
+        return lemma, _word_ids[lemma]
+
+
+def register_word(word: str, word_id: str, frequency: Optional[float] = None) -> None:
+    """
+    作成した単語を、スナップショットの反映を待たずに解決できるようにする関数
+
+    Args:
+        word (str): 作成した単語
+        word_id (str): 作成した単語のID
+        frequency (Optional[float]): 単語の頻度
+    """
+    lemma = normalize_word(word)
+    if not lemma or not _loaded.is_set():
+        return  # 未読み込みの場合は初回の読み込みで反映される
+    with _lock:
+        if word_id not in _words_by_id:
+            _add_word(word_id, lemma, frequency or 0.0)
+            _completion_cache.clear()
+
+
+async def search_words(prefix: str, limit: int) -> list[tuple[str, str]]:
+    """
+    前方一致する単語を頻度の高い順に取得する関数
+
+    Args:
+        prefix (str): 前方一致の文字列（大文字・記号は正規化される）
+        limit (int): 取得する件数
+
+    Returns:
+        list[tuple[str, str]]: (単語, 単語ID) のリスト
+
+    Raises:
+        ServiceException: 単語の読み込みに失敗した場合
+    """
+    normalized = normalize_word(prefix)
+    if not normalized:
+        return []
+    await ensure_word_index()
+    with _lock:
+        cacheable = len(normalized) <= COMPLETION_CACHE_MAX_PREFIX_LENGTH
+        words = _completion_cache.get((normalized, limit)) if cacheable else None
+        if words is None:
+            words = top_completions(_sorted_words, _frequencies, normalized, limit)
+            if cacheable:
+                _completion_cache[(normalized, limit)] = words
+        return [(word, _word_ids[word]) for word in words]
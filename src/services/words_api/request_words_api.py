@@ -4,6 +4,7 @@ from pathlib import Path
 
 import aiohttp
 
+from src.config.metrics import instrumented
 from src.config.settings import WORDS_API_KEY
 from src.models.types import WordsAPIResponse
 
@@ -14,6 +15,7 @@ def datetime_handler(obj):
     raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
+@instrumented("words_api")
 async def request_words_api(word: str) -> WordsAPIResponse:
     """
     Words APIを使用して単語の情報を取得する
@@ -0,0 +1,70 @@
+import io
+import zipfile
+
+import pytest
+
+from src.services.deck_archive import (
+    DECK_INDEX_NAME,
+    decode_deck_index,
+    encode_deck_index,
+    from_columns,
+    iter_zip_stream,
+    to_columns,
+)
+
+
+# 正常系：行のリストを列ごとのリストに変換し、元に戻せる場合
+def test_columns_round_trip():
+    rows = [{"wordId": "w1", "word": "cat"}, {"wordId": "w2"}]
+    table = to_columns(rows, ["wordId", "word"])
+    assert table == {"wordId": ["w1", "w2"], "word": ["cat", None]}
+    assert from_columns(table) == [
+        {"wordId": "w1", "word": "cat"},
+        {"wordId": "w2", "word": None},
+    ]
+
+
+# 異常系：列の長さが揃っていない場合
+def test_from_columns_rejects_ragged_table():
+    with pytest.raises(ValueError):
+        from_columns({"wordId": ["w1", "w2"], "word": ["cat"]})
+
+
+# 正常系：索引のJSONを表ごとの行のリストに変換できる場合
+def test_deck_index_round_trip():
+    data = encode_deck_index(
+        {"words": to_columns([{"wordId": "w1", "word": "cat"}], ["wordId", "word"])},
+        "2025-01-01T00:00:00",
+    )
+    tables = decode_deck_index(data)
+    assert tables["words"] == [{"wordId": "w1", "word": "cat"}]
+    assert tables["flashcards"] == []
+
+
+# 異常系：デッキのアーカイブでない索引の場合
+def test_decode_deck_index_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        decode_deck_index(b'{"format":"other","version":1}')
+
+
+# 正常系：チャンク単位で書き込んだzipを読み込め、読み込めないファイルは含まれない場合
+def test_iter_zip_stream():
+    def missing_file():
+        raise FileNotFoundError("media/missing.png")
+        yield b""
+
+    chunks = list(
+        iter_zip_stream(
+            [
+                (DECK_INDEX_NAME, [b'{"a":', b"1}"], True),
+                ("media/missing.png", missing_file(), False),
+                ("media/abc.png", (b"x" * 1000 for _ in range(3)), False),
+            ]
+        )
+    )
+    assert len(chunks) > 2
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.namelist() == [DECK_INDEX_NAME, "media/abc.png"]
+        assert archive.read(DECK_INDEX_NAME) == b'{"a":1}'
+        assert archive.read("media/abc.png") == b"x" * 3000
+        assert archive.testzip() is None
@@ -0,0 +1,37 @@
+import json
+import logging
+
+from src.config.logger import JsonFormatter, request_id_var, truncate
+
+
+def _record(message: str, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+# 正常系：上限を超える値のみ切り詰められる場合
+def test_truncate():
+    assert truncate("abc", 5) == "abc"
+    assert truncate("a" * 10, 5) == "aaaaa...(truncated, 10 chars)"
+    assert truncate({"word": "cat"}, 100) == "{'word': 'cat'}"
+    assert truncate(3) == 3
+    assert truncate(None) is None
+
+
+# 正常系：追加フィールドとリクエストIDを含む1行のJSONに変換できる場合
+def test_json_formatter():
+    record = _record("saved", word="cat", payload="x" * 2000, request_id="req-1")
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "saved"
+    assert entry["requestId"] == "req-1"
+    assert entry["word"] == "cat"
+    assert entry["payload"].endswith("(truncated, 2000 chars)")
+    assert "args" not in entry
+
+
+# 正常系：リクエストIDの既定値がNoneの場合
+def test_request_id_default():
+    assert request_id_var.get() is None
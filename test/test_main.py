@@ -50,6 +50,15 @@ def test_get_user_invalid_id():
     assert response.json() == {"detail": "指定されたユーザーは存在しません"}
 
 
+# 正常系：ETagが一致する場合は304を返す
+def test_get_user_not_modified():
+    response = client.get("/user/sampleId")
+    etag = response.headers["ETag"]
+    response = client.get("/user/sampleId", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
 # 正常系：既存のユーザー情報を更新する場合
 def test_user_update():
     response = client.put(
@@ -85,8 +94,20 @@ def test_get_user2():
 # 正常系：指定したユーザーIDでユーザーを削除する場合
 def test_delete_user():
     response = client.delete("/user/sampleId")
+    assert response.status_code == 202
+    assert response.json() == {
+        "message": "User delete accepted",
+        "jobId": "delete_user_sampleId",
+    }
+
+
+# 正常系：ユーザー削除ジョブの進捗を取得できる場合
+def test_get_delete_user_job():
+    response = client.get("/job/delete_user_sampleId")
     assert response.status_code == 200
-    assert response.json() == {"message": "User delete successful"}
+    job = response.json()["job"]
+    assert job["status"] == "succeeded"
+    assert job["targetId"] == "sampleId"
 
 
 # 異常系：削除済みのユーザーIDでユーザーを削除できない場合
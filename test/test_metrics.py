@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from src.config.metrics import (
+    EXTERNAL_CALL_DURATION,
+    HTTP_REQUEST_DURATION,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    instrumented,
+    render_metrics,
+)
+
+
+def _sample_lines(text: str, prefix: str) -> list[str]:
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+# 正常系：ラベルごとの値と、エスケープしたラベルを出力できる場合
+def test_counter_render():
+    counter = Counter("test_counter_total", "テスト用", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('b"\n')
+    text = counter.render()
+    assert "# TYPE test_counter_total counter" in text
+    assert 'test_counter_total{kind="a"} 3' in text
+    assert 'test_counter_total{kind="b\\"\\n"} 1' in text
+
+
+# 正常系：バケットごとの累積件数・合計・件数を出力できる場合
+def test_histogram_render():
+    histogram = Histogram("test_duration_seconds", "テスト用", ("route",), (0.1, 1))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.1, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(3, "/a")
+    lines = _sample_lines(histogram.render(), "test_duration_seconds")
+    assert lines == [
+        'test_duration_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_duration_seconds_bucket{route="/a",le="1"} 3',
+        'test_duration_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_duration_seconds_sum{route="/a"} 3.65',
+        'test_duration_seconds_count{route="/a"} 4',
+    ]
+
+
+# 正常系：同期関数・コルーチン関数・非同期ジェネレーターの結果を記録できる場合
+def test_instrumented():
+    @instrumented("test")
+    def sync_call() -> int:
+        return 1
+
+    @instrumented("test")
+    async def failing_call() -> None:
+        raise ValueError("failed")
+
+    @instrumented("test")
+    async def stream_call():
+        yield 1
+        yield 2
+
+    async def consume() -> list[int]:
+        return [item async for item in stream_call()]
+
+    assert sync_call() == 1
+    with pytest.raises(ValueError):
+        asyncio.run(failing_call())
+    assert asyncio.run(consume()) == [1, 2]
+
+    text = EXTERNAL_CALL_DURATION.render()
+    for operation, outcome in (
+        ("sync_call", "ok"),
+        ("failing_call", "error"),
+        ("stream_call", "ok"),
+    ):
+        labels = f'target="test",operation="{operation}",outcome="{outcome}"'
+        assert f"external_call_duration_seconds_count{{{labels}}} 1" in text
+
+
+# 正常系：パスパラメータを含むパスではなく、ルートのテンプレートで記録する場合
+def test_metrics_middleware():
+    class Route:
+        path = "/test/{userId}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/test/user-1"}
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+    text = HTTP_REQUEST_DURATION.render()
+    labels = 'method="GET",route="/test/{userId}",status="404"'
+    assert f"http_request_duration_seconds_count{{{labels}}} 1" in text
+    assert "# TYPE http_request_duration_seconds histogram" in render_metrics()
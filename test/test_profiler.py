@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from collections import Counter
+
+from src.config import profiler
+from src.config.profiler import (
+    ProfilerMiddleware,
+    SamplingProfiler,
+    collapse_stack,
+    format_collapsed_stacks,
+    profile_id_var,
+    read_profile,
+)
+
+
+def _busy_loop(stopped: threading.Event) -> None:
+    while not stopped.is_set():
+        sum(range(1000))
+
+
+# 正常系：フレームを呼び出し元から順のラベルに変換できる場合
+def test_collapse_stack():
+    import sys
+
+    stack = collapse_stack(sys._getframe())
+    assert stack[-1].startswith("test_collapse_stack (")
+    assert all(";" not in label for label in stack)
+
+
+# 正常系：件数の多い順にcollapsed stacks形式で出力できる場合
+def test_format_collapsed_stacks():
+    stacks = Counter({"event-loop;a;b": 1, "event-loop;a": 3})
+    assert format_collapsed_stacks(stacks) == "event-loop;a 3\nevent-loop;a;b 1\n"
+
+
+# 正常系：対象スレッドの実行中の関数を集計できる場合
+def test_sampling_profiler():
+    stopped = threading.Event()
+    thread = threading.Thread(target=_busy_loop, args=(stopped,))
+    thread.start()
+    try:
+        sampler = SamplingProfiler(thread.ident)
+        for _ in range(5):
+            sampler.sample()
+    finally:
+        stopped.set()
+        thread.join()
+    assert sampler.sample_count == 5
+    assert sum(sampler.stacks.values()) == 5
+    assert all(
+        stack.startswith("event-loop;") and "_busy_loop" in stack
+        for stack in sampler.stacks
+    )
+
+
+# 正常系：管理者のヘッダー指定でプロファイルを保存し、IDを返す場合
+def test_profiler_middleware(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    sent = []
+
+    profile_ids = []
+
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.02)
+        profile_ids.append(profile_id_var.get())
+        headers = [(b"x-request-id", b"abc")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/test",
+        "headers": [(b"x-profile", b"1"), (b"x-admin-token", b"secret")],
+    }
+    middleware = ProfilerMiddleware(app, is_authorized=lambda token: token == "secret")
+    with caplog.at_level("INFO", logger=profiler.__name__):
+        asyncio.run(middleware(scope, None, send))
+
+    profile_id = dict(sent[0]["headers"])[b"x-profile-id"].decode("ascii")
+    assert profile_ids == [profile_id]
+    assert profile_id_var.get() is None
+    (record,) = [r for r in caplog.records if r.getMessage() == "request profiled"]
+    assert (record.profileId, record.requestId) == (profile_id, "abc")
+    assert read_profile(profile_id) is not None
+    assert read_profile("../etc/passwd") is None
+
+
+# 正常系：管理者トークンがない場合は計測しない場合
+def test_profiler_middleware_unauthorized(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"x-profile", b"1")]}
+    middleware = ProfilerMiddleware(app, is_authorized=lambda token: False)
+    asyncio.run(middleware(scope, None, send))
+    assert sent[0]["headers"] == []
+    assert list(tmp_path.iterdir()) == []
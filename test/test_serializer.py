@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+from src.models.serializer import encode_json, get_decoder, get_encoder
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.capitalize() for part in rest)
+
+
+class Kind(Enum):
+    IMAGE = "image"
+
+
+@dataclass
+class Item:
+    media_id: str
+    media_variants: Optional[List[Dict[str, str]]] = None
+
+
+@dataclass
+class Card:
+    flashcard_id: str
+    kind: Kind
+    items: List[Item]
+    created_at: Optional[datetime] = None
+    tags: List[str] = field(default_factory=list)
+
+
+# dataclass_json(letter_case=LetterCase.CAMEL)と同じ設定
+Item.dataclass_json_config = {"letter_case": _camel}
+Card.dataclass_json_config = {"letter_case": _camel}
+
+
+# 正常系：キャメルケースのキーでネストしたdataclassを変換できる場合
+def test_encode_nested_dataclass():
+    card = Card(
+        flashcard_id="f1",
+        kind=Kind.IMAGE,
+        items=[Item(media_id="m1", media_variants=[{"thumbnail": "t.webp"}])],
+        created_at=datetime(2025, 1, 1),
+    )
+    assert get_encoder(Card)(card) == {
+        "flashcardId": "f1",
+        "kind": "image",
+        "items": [{"mediaId": "m1", "mediaVariants": [{"thumbnail": "t.webp"}]}],
+        "createdAt": "2025-01-01T00:00:00",
+        "tags": [],
+    }
+    assert encode_json({"cards": [card]}).startswith(b'{"cards":[{"flashcardId":"f1"')
+
+
+# 正常系：キャメルケース・フィールド名のキーと既定値から復元できる場合
+def test_decode_with_defaults():
+    card = get_decoder(Card)(
+        {"flashcard_id": "f1", "kind": "image", "items": [{"mediaId": "m1"}]}
+    )
+    assert card == Card(flashcard_id="f1", kind=Kind.IMAGE, items=[Item("m1")])
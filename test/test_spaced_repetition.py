@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.services.spaced_repetition import ReviewState, schedule_review
+
+NOW = datetime(2025, 1, 1, 9, 0)
+
+
+# 正常系：正解を続けると復習間隔が1日・6日・容易度倍と伸びる場合
+def test_schedule_review_passing():
+    state = schedule_review(ReviewState(), 4, NOW)
+    assert (state.interval_days, state.repetitions) == (1, 1)
+    assert state.due_at == NOW + timedelta(days=1)
+    state = schedule_review(state, 4, NOW)
+    assert (state.interval_days, state.repetitions) == (6, 2)
+    state = schedule_review(state, 5, NOW)
+    assert state.interval_days == 15
+    assert state.ease_factor == pytest.approx(2.6)
+
+
+# 正常系：不正解の場合は連続正解数がリセットされ、すぐに再出題される場合
+def test_schedule_review_lapse():
+    state = ReviewState(interval_days=15, ease_factor=1.4, repetitions=3)
+    state = schedule_review(state, 1, NOW)
+    assert (state.interval_days, state.repetitions) == (0, 0)
+    assert state.ease_factor == 1.3
+    assert state.due_at == NOW + timedelta(minutes=10)
+
+
+# 異常系：評価が範囲外の場合
+def test_schedule_review_invalid_grade():
+    with pytest.raises(ValueError):
+        schedule_review(ReviewState(), 6, NOW)
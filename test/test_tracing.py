@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from src.config import tracing
+from src.config.tracing import (
+    STATUS_CODE_ERROR,
+    current_span_context,
+    encode_otlp_spans,
+    parse_traceparent,
+    run_traced,
+    start_span,
+)
+
+
+class _RecordingExporter:
+    def __init__(self) -> None:
+        self.spans = []
+
+    def on_end(self, span) -> None:
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    recording = _RecordingExporter()
+    monkeypatch.setattr(tracing, "_exporter", recording)
+    return recording
+
+
+def _fail() -> None:
+    raise ValueError("failed")
+
+
+# 正常系：traceparentヘッダーから親スパンを求められる場合
+def test_parse_traceparent():
+    header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    assert parse_traceparent(header) == (
+        "4bf92f3577b34da6a3ce929d0e0e4736",
+        "00f067aa0ba902b7",
+    )
+    assert parse_traceparent(None) is None
+    assert parse_traceparent("00-xyz-00f067aa0ba902b7-01") is None
+    assert parse_traceparent(f"00-{'0' * 32}-00f067aa0ba902b7-01") is None
+
+
+# 正常系：トレーシングが無効な場合はスパンを記録しない場合
+def test_start_span_disabled():
+    with start_span("stage") as span:
+        span.set_attribute("key", "value")
+        assert current_span_context() is None
+
+
+# 正常系：入れ子のスパンが親子関係を持ち、例外をエラーとして記録する場合
+def test_start_span_nested(exporter):
+    with start_span("parent") as parent:
+        with pytest.raises(ValueError):
+            with start_span("child", {"size": 3}):
+                _fail()
+    assert current_span_context() is None
+    child, recorded_parent = exporter.spans
+    assert recorded_parent is parent
+    assert child.trace_id == parent.trace_id
+    assert child.parent_span_id == parent.span_id
+    assert child.status_code == STATUS_CODE_ERROR
+    assert child.attributes == {"size": 3, "exception.type": "ValueError"}
+    assert child.end_time_ns >= child.start_time_ns
+
+
+# 正常系：子プロセス用の実行結果と、OTLP/JSONへの変換ができる場合
+def test_run_traced_and_encode():
+    parent = ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+    span, result, error = run_traced(parent, "process.sum", sum, [1, 2])
+    assert (result, error) == (3, None)
+    _, _, error = run_traced(parent, "process.fail", _fail)
+    assert isinstance(error, ValueError)
+
+    payload = json.loads(encode_otlp_spans([span]))
+    encoded = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert encoded["traceId"] == parent[0]
+    assert encoded["parentSpanId"] == parent[1]
+    assert encoded["name"] == "process.sum"
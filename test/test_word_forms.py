@@ -0,0 +1,64 @@
+from src.services.word_forms import (
+    build_lemma_table,
+    is_regular_inflection,
+    normalize_word,
+    top_completions,
+)
+
+
+# 正常系：大文字・記号・全角文字を含むトークンを正規化できる場合
+def test_normalize_word():
+    assert normalize_word("“Cats,") == "cats"
+    assert normalize_word("Don’t") == "don't"
+    assert normalize_word("ｃａｔ") == "cat"
+    assert normalize_word("123") is None
+    assert normalize_word("—") is None
+
+
+# 正常系：規則変化のみを原形の変化形と判定する場合
+def test_is_regular_inflection():
+    assert is_regular_inflection("cats", "cat")
+    assert is_regular_inflection("running", "run")
+    assert is_regular_inflection("walked", "walk")
+    assert is_regular_inflection("watches", "watch")
+    # 不規則変化・原形自身・別の見出し語・比較級は対象外
+    assert not is_regular_inflection("saw", "see")
+    assert not is_regular_inflection("found", "find")
+    assert not is_regular_inflection("cat", "cat")
+    assert not is_regular_inflection("bed", "be")
+    assert not is_regular_inflection("bigger", "big")
+
+
+# 正常系：規則変化・不規則変化の変化形を原形に解決できる場合
+def test_build_lemma_table():
+    table = build_lemma_table(["run", "cat", "study", "make", "big", "go", "child"])
+    assert table["running"] == "run"
+    assert table["ran"] == "run"
+    assert table["cats"] == "cat"
+    assert table["studied"] == "study"
+    assert table["making"] == "make"
+    assert table["bigger"] == "big"
+    assert table["went"] == "go"
+    assert table["children"] == "child"
+    assert "walked" not in table
+
+
+# 正常系：原形として登録済みの単語は、他の単語の変化形より優先される場合
+def test_build_lemma_table_prefers_lemma():
+    table = build_lemma_table(["lie", "lay"])
+    assert table["lay"] == "lay"
+    assert table["lying"] == "lie"
+
+
+# 正常系：前方一致する単語を頻度の高い順に取得できる場合
+def test_top_completions():
+    words = sorted(["cat", "catch", "category", "cater", "dog", "ca"])
+    frequencies = {"catch": 5.1, "cat": 4.8, "category": 4.8}
+    assert top_completions(words, frequencies, "cat", 3) == ["catch", "cat", "category"]
+    assert top_completions(words, frequencies, "cat", 10) == [
+        "catch",
+        "cat",
+        "category",
+        "cater",
+    ]
+    assert top_completions(words, frequencies, "x", 3) == []